@@ -0,0 +1,187 @@
+import os
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Agent calls are network-bound, so nodes run on a thread pool shared by every
+# session in the worker process. A node that misses its deadline is given up
+# on (its default is used and its dependents go ahead) but its thread keeps
+# running until the call returns, so the pool is bounded to keep stuck calls
+# from piling up threads. A graph run from inside another graph's node uses
+# its own named pool, so it never waits on threads its caller is holding.
+AGENT_DAG_WORKERS = 8
+
+_executors = {}
+_executors_pid = None
+_executors_lock = threading.Lock()
+
+def _get_executor(pool):
+    global _executors_pid
+    with _executors_lock:
+        if _executors_pid != os.getpid():
+            _executors.clear()
+            _executors_pid = os.getpid()
+        if pool not in _executors:
+            _executors[pool] = ThreadPoolExecutor(max_workers=AGENT_DAG_WORKERS, thread_name_prefix=f"agent-dag-{pool}")
+        return _executors[pool]
+
+class Node:
+    __slots__ = ("name", "func", "inputs", "deadline", "default", "when")
+
+    def __init__(self, name, func, inputs=(), deadline=None, default=None, when=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.deadline = deadline
+        self.default = default
+        self.when = when
+
+class AgentDAG:
+    """A turn's agent calls as a dependency graph.
+
+    Each node declares the nodes whose results it takes as keyword
+    arguments; nodes whose inputs are ready run at the same time, so a turn
+    takes as long as its longest chain instead of the sum of its calls.
+
+        dag = AgentDAG()
+        dag.add("context", lambda: analyze(message), deadline=10, default=DEFAULTS)
+        dag.add("question", lambda context: ask(context), inputs=["context"],
+                when=lambda context: context["needs_followup"])
+        results, report = dag.run()
+
+    A node that raises, or runs past its deadline (seconds from when it
+    started), gets its default instead (called with the inputs if it is
+    callable). A node whose when(**inputs) is false is skipped and also
+    gets its default.
+    """
+
+    def __init__(self, pool="default"):
+        self.nodes = {}
+        self.pool = pool
+
+    def add(self, name, func, inputs=(), deadline=None, default=None, when=None):
+        for dependency in inputs:
+            if dependency not in self.nodes:
+                raise ValueError(f"Node {name!r} depends on unknown node {dependency!r}")
+        self.nodes[name] = Node(name, func, inputs, deadline, default, when)
+        return self
+
+    def _fallback(self, node, kwargs):
+        return node.default(**kwargs) if callable(node.default) else node.default
+
+    def run(self, deadline=None):
+        """Run every node and return (results, report).
+
+        deadline, if given, caps the whole turn: nodes still running when it
+        passes get their defaults and nodes not started yet are skipped.
+        report has the total time, per-node timings and status, the sum of
+        node times (the turn's length if run one after another) and the
+        critical path.
+        """
+        # Worker threads need the session's script context to use st.* calls,
+        # and nodes see the caller's context variables (such as the turn's
+        # model latency budget)
+        ctx = get_script_run_ctx(suppress_warning=True)
+        variables = contextvars.copy_context()
+
+        def call(node, kwargs):
+            if ctx is not None:
+                add_script_run_ctx(threading.current_thread(), ctx)
+            try:
+                return variables.copy().run(node.func, **kwargs)
+            finally:
+                if ctx is not None:
+                    add_script_run_ctx(threading.current_thread(), None)
+
+        executor = _get_executor(self.pool)
+        start = time.perf_counter()
+        turn_end = start + deadline if deadline else None
+        results = {}
+        timings = {}
+        pending = dict(self.nodes)
+        running = {}  # future -> (node, kwargs, started)
+
+        def finish(node, value, status, started, error=None):
+            results[node.name] = value
+            timings[node.name] = {
+                "start_ms": round((started - start) * 1000, 1),
+                "end_ms": round((time.perf_counter() - start) * 1000, 1),
+                "status": status,
+            }
+            if error is not None:
+                timings[node.name]["error"] = f"{type(error).__name__}: {error}"
+
+        while pending or running:
+            # Start every node whose inputs are all finished
+            for name, node in list(pending.items()):
+                if any(dependency not in results for dependency in node.inputs):
+                    continue
+                del pending[name]
+                kwargs = {dependency: results[dependency] for dependency in node.inputs}
+                now = time.perf_counter()
+                if turn_end and now >= turn_end:
+                    finish(node, self._fallback(node, kwargs), "skipped", now)
+                elif node.when is not None and not node.when(**kwargs):
+                    finish(node, self._fallback(node, kwargs), "skipped", now)
+                else:
+                    running[executor.submit(call, node, kwargs)] = (node, kwargs, now)
+
+            if not running:
+                if pending and not any(
+                    all(dependency in results for dependency in node.inputs) for node in pending.values()
+                ):
+                    raise RuntimeError(f"Nodes can never run: {', '.join(pending)}")
+                continue
+
+            # Wait until a node finishes or the nearest deadline passes
+            deadlines = [started + node.deadline for node, _, started in running.values() if node.deadline]
+            if turn_end:
+                deadlines.append(turn_end)
+            timeout = max(min(deadlines) - time.perf_counter(), 0) if deadlines else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                node, kwargs, started = running.pop(future)
+                try:
+                    finish(node, future.result(), "ok", started)
+                except Exception as e:
+                    finish(node, self._fallback(node, kwargs), "error", started, e)
+
+            now = time.perf_counter()
+            for future, (node, kwargs, started) in list(running.items()):
+                node_late = node.deadline and now >= started + node.deadline
+                if node_late or (turn_end and now >= turn_end):
+                    del running[future]
+                    future.cancel()
+                    finish(node, self._fallback(node, kwargs), "timeout", started)
+
+        return results, self._report(timings, start)
+
+    def _report(self, timings, start):
+        for timing in timings.values():
+            timing["duration_ms"] = round(timing["end_ms"] - timing["start_ms"], 1)
+
+        # Walk back from the last node to finish, each time through the input
+        # that finished last (the one it was waiting on)
+        path = []
+        current = max(timings, key=lambda name: timings[name]["end_ms"]) if timings else None
+        while current is not None:
+            path.append(current)
+            inputs = self.nodes[current].inputs
+            current = max(inputs, key=lambda name: timings[name]["end_ms"]) if inputs else None
+
+        return {
+            "total_ms": round((time.perf_counter() - start) * 1000, 1),
+            "sequential_ms": round(sum(timing["duration_ms"] for timing in timings.values()), 1),
+            "critical_path": path[::-1],
+            "nodes": timings,
+        }
+
+def format_report(report):
+    """One-line summary of a run report"""
+    path = " -> ".join(f"{name} ({report['nodes'][name]['duration_ms']:.0f} ms)" for name in report["critical_path"])
+    late = [name for name, timing in report["nodes"].items() if timing["status"] in ("timeout", "error")]
+    return (f"{report['total_ms']:.0f} ms (sequential {report['sequential_ms']:.0f} ms), critical path: {path}"
+            + (f"; fell back: {', '.join(late)}" if late else ""))
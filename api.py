@@ -0,0 +1,372 @@
+"""Headless HTTP API over the chat, journal and mood functions.
+
+    python api.py [--host 127.0.0.1] [--port 8000]
+    uvicorn api:app --workers 4          # same data-safety rules as run_workers.py
+
+All routes are under /api and take/return JSON. Every profile route needs a
+registered profile (POST /api/users to create one).
+
+    GET    /api/health
+    GET    /api/users?prefix=&limit=
+    POST   /api/users                                {"username"}
+    GET    /api/users/{u}/chat?limit=50
+    POST   /api/users/{u}/chat?stream=1              {"message"}
+    GET    /api/users/{u}/journal?page=&page_size=&mood=&tag=&start=&end=
+    POST   /api/users/{u}/journal                    {"entry", "mood", "tags"}
+    GET    /api/users/{u}/journal/search?q=&k=5
+    GET    /api/users/{u}/journal/{id}
+    PATCH  /api/users/{u}/journal/{id}               {"entry", "mood", "tags"}
+    DELETE /api/users/{u}/journal/{id}
+    GET    /api/users/{u}/mood/daily?start=&end=
+    GET    /api/users/{u}/mood/summary?start=&end=
+    GET    /api/users/{u}/mood/analytics
+    GET    /api/users/{u}/mood/series?source=&start=&end=
+
+With stream=1 a chat turn is sent as JSON Lines: {"type": "delta", "text"}
+pieces while the reply is generated, then one {"type": "done", "text"} with
+the final reply, which is also what is saved to the chat history.
+
+Journal entries are returned with an "id" (timestamp#text hash, see
+journal_search.entry_id), which the /journal/{id} routes take; encode the
+"#" as %23. Timestamps alone are not unique: imported entries without a
+time all share midnight. Editing an entry's text changes its id.
+"""
+import re
+import sys
+import json
+import math
+import argparse
+from datetime import datetime
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from utils import create_directories
+from user_registry import get_user, search_users, register_user, validate_username
+from chat_agent import generate_response, generate_response_events, load_chat_history, save_chat_buffer
+from message_store import ChatMessageBuffer
+from journal import (
+    MOOD_OPTIONS, PAGE_SIZE_OPTIONS, save_journal_entry, get_journal_page, get_entries_by_ids,
+    update_journal_entry_by_id, delete_journal_entry_by_id,
+)
+from journal_search import find_related, entry_id
+from mood_aggregate import get_daily_aggregate
+from mood_analytics import get_mood_analytics
+from mood_store import SOURCES, get_mood_series, summarize_mood_series
+
+MAX_CHAT_HISTORY = 500
+ENTRY_ID_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}#[0-9a-f]{8}")
+
+class ApiError(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+def _error(status_code, message):
+    return JSONResponse({"error": message}, status_code=status_code)
+
+def _user(request):
+    """Registered spelling of the {username} path parameter (404 if unknown)"""
+    username = get_user(request.path_params["username"])
+    if username is None:
+        raise ApiError(404, "Unknown profile")
+    return username
+
+async def _json_body(request):
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ApiError(400, "Request body must be JSON")
+    if not isinstance(body, dict):
+        raise ApiError(400, "Request body must be a JSON object")
+    return body
+
+def _int_param(request, name, default, minimum=1, maximum=None):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+    if minimum is not None and maximum is not None and not minimum <= value <= maximum:
+        raise ApiError(400, f"{name} must be between {minimum} and {maximum}")
+    if minimum is not None and value < minimum:
+        raise ApiError(400, f"{name} must be at least {minimum}")
+    if maximum is not None and value > maximum:
+        raise ApiError(400, f"{name} must be at most {maximum}")
+    return value
+
+def _date_param(request, name):
+    """Optional YYYY-MM-DD query parameter"""
+    value = request.query_params.get(name)
+    if value:
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise ApiError(400, f"{name} must be a YYYY-MM-DD date")
+    return value or None
+
+def _entry_id_param(request):
+    """The {id} path parameter; anything that can't be an entry id is an unknown entry"""
+    vector_id = request.path_params["id"]
+    if not ENTRY_ID_PATTERN.fullmatch(vector_id):
+        raise ApiError(404, "Unknown entry")
+    return vector_id
+
+def _entry_fields(body, partial=False):
+    """Validated entry, mood and tags from a request body"""
+    text = body.get("entry")
+    if text is not None and (not isinstance(text, str) or not text.strip()):
+        raise ApiError(400, "entry must be non-empty text")
+    if text is None and not partial:
+        raise ApiError(400, "entry is required")
+    mood = body.get("mood")
+    if mood is not None and mood not in MOOD_OPTIONS:
+        raise ApiError(400, f"mood must be one of {', '.join(MOOD_OPTIONS)}")
+    tags = body.get("tags")
+    if tags is not None and (not isinstance(tags, list) or not all(isinstance(t, str) for t in tags)):
+        raise ApiError(400, "tags must be a list of strings")
+    return text, mood, tags
+
+def _records(frame):
+    """DataFrame rows as JSON-safe dicts (NaN -> null, timestamps -> YYYY-MM-DD)"""
+    records = []
+    for row in frame.to_dict(orient="records"):
+        clean = {}
+        for key, value in row.items():
+            if hasattr(value, "strftime"):
+                value = value.strftime("%Y-%m-%d")
+            elif hasattr(value, "item"):
+                value = value.item()
+            if isinstance(value, float) and math.isnan(value):
+                value = None
+            clean[key] = value
+        records.append(clean)
+    return records
+
+# --- Users ---
+
+async def health(request):
+    return JSONResponse({"status": "ok"})
+
+async def list_users(request):
+    limit = _int_param(request, "limit", 50, maximum=1000)
+    users = await run_in_threadpool(search_users, request.query_params.get("prefix", ""), limit)
+    return JSONResponse({"users": users})
+
+async def create_user(request):
+    body = await _json_body(request)
+    username = str(body.get("username", "")).strip()
+    error = validate_username(username)
+    if error:
+        return _error(400, error)
+    if not await run_in_threadpool(register_user, username):
+        return _error(409, f"Profile name '{username}' already exists")
+    return JSONResponse({"username": username}, status_code=201)
+
+# --- Chat ---
+
+async def chat_history(request):
+    username = _user(request)
+    limit = _int_param(request, "limit", 50, maximum=MAX_CHAT_HISTORY)
+    history = await run_in_threadpool(load_chat_history, username)
+    return JSONResponse({"messages": history[-limit:], "total": len(history)})
+
+def _save_turn(username, message, reply):
+    buffer = ChatMessageBuffer()
+    buffer.append("user", message)
+    buffer.append("assistant", reply)
+    save_chat_buffer(username, buffer)
+
+async def chat_turn(request):
+    username = _user(request)
+    body = await _json_body(request)
+    message = body.get("message")
+    if not isinstance(message, str) or not message.strip():
+        return _error(400, "message must be non-empty text")
+
+    if request.query_params.get("stream") not in ("1", "true"):
+        reply = await run_in_threadpool(generate_response, message)
+        await run_in_threadpool(_save_turn, username, message, reply)
+        return JSONResponse({"reply": reply})
+
+    def events():
+        # Runs in Starlette's threadpool, one piece at a time
+        for kind, text in generate_response_events(message):
+            if kind == "done":
+                _save_turn(username, message, text)
+            yield json.dumps({"type": kind, "text": text}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+# --- Journal ---
+
+async def list_journal(request):
+    username = _user(request)
+    page = _int_param(request, "page", 1)
+    page_size = _int_param(request, "page_size", 25, maximum=max(PAGE_SIZE_OPTIONS))
+    moods = request.query_params.getlist("mood") or None
+    tags = request.query_params.getlist("tag") or None
+    entries, matching, total = await run_in_threadpool(
+        get_journal_page, username, page, page_size, moods, tags,
+        _date_param(request, "start"), _date_param(request, "end")
+    )
+    return JSONResponse({
+        "entries": [_with_id(entry) for entry in entries],
+        "matching": matching, "total": total, "page": page, "page_size": page_size
+    })
+
+def _with_id(entry):
+    return dict(entry, id=entry_id(entry))
+
+async def create_journal_entry(request):
+    username = _user(request)
+    text, mood, tags = _entry_fields(await _json_body(request))
+    timestamp = await run_in_threadpool(save_journal_entry, username, text, mood, tags)
+    vector_id = entry_id({"timestamp": timestamp, "entry": text})
+    entry = (await run_in_threadpool(get_entries_by_ids, username, [vector_id]))[0]
+    return JSONResponse(_with_id(entry), status_code=201)
+
+async def get_journal_entry(request):
+    username = _user(request)
+    found = await run_in_threadpool(get_entries_by_ids, username, [_entry_id_param(request)])
+    if not found:
+        return _error(404, "Unknown entry")
+    return JSONResponse(_with_id(found[0]))
+
+async def patch_journal_entry(request):
+    username = _user(request)
+    body = await _json_body(request)
+    text, mood, tags = _entry_fields(body, partial=True)
+    entry = await run_in_threadpool(
+        update_journal_entry_by_id, username, _entry_id_param(request), text, mood, tags,
+        "mood" in body and body["mood"] is None
+    )
+    if entry is None:
+        return _error(404, "Unknown entry")
+    return JSONResponse(_with_id(entry))
+
+async def delete_journal_entry(request):
+    username = _user(request)
+    vector_id = _entry_id_param(request)
+    if not await run_in_threadpool(delete_journal_entry_by_id, username, vector_id):
+        return _error(404, "Unknown entry")
+    return JSONResponse({"deleted": vector_id})
+
+async def search_journal(request):
+    username = _user(request)
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        return _error(400, "q is required")
+    k = _int_param(request, "k", 5, maximum=50)
+
+    def search():
+        related = find_related(username, query, k=k)
+        scores = dict(related)
+        entries = get_entries_by_ids(username, [vector_id for vector_id, _ in related])
+        return [dict(_with_id(entry), score=round(scores[entry_id(entry)], 4)) for entry in entries]
+
+    return JSONResponse({"results": await run_in_threadpool(search)})
+
+# --- Mood ---
+
+async def mood_daily(request):
+    username = _user(request)
+    start, end = _date_param(request, "start"), _date_param(request, "end")
+
+    def daily():
+        frame = get_daily_aggregate(username).to_frame()
+        if start:
+            frame = frame[frame["date"] >= start]
+        if end:
+            frame = frame[frame["date"] <= end]
+        frame = frame.assign(mean=frame["sum"] / frame["count"]).drop(columns="sum")
+        return _records(frame)
+
+    return JSONResponse({"days": await run_in_threadpool(daily)})
+
+async def mood_summary(request):
+    username = _user(request)
+    start, end = _date_param(request, "start"), _date_param(request, "end")
+    summary = await run_in_threadpool(lambda: get_daily_aggregate(username).summary(start, end))
+    return JSONResponse({"summary": summary})
+
+async def mood_analytics(request):
+    username = _user(request)
+
+    def analytics():
+        result = get_mood_analytics(username, get_daily_aggregate(username))
+        if result is None:
+            return None
+        return {
+            "current_streak": result["current_streak"],
+            "longest_streak": result["longest_streak"],
+            "change_points": [
+                {"date": point["date"].isoformat(), "shift": point["shift"]} for point in result["change_points"]
+            ],
+            "weekday": _records(result["weekday"]),
+            "trend": _records(result["trend"]),
+        }
+
+    return JSONResponse({"analytics": await run_in_threadpool(analytics)})
+
+async def mood_series(request):
+    username = _user(request)
+    source = request.query_params.get("source")
+    if source is not None and source not in SOURCES:
+        return _error(400, f"source must be one of {', '.join(SOURCES)}")
+    start, end = _date_param(request, "start"), _date_param(request, "end")
+
+    def series():
+        items = get_mood_series(
+            username, source,
+            datetime.fromisoformat(start) if start else None,
+            datetime.fromisoformat(end + "T23:59:59") if end else None
+        )
+        return {
+            "points": [dict(item, timestamp=item["timestamp"].isoformat()) for item in items],
+            "summary": summarize_mood_series(items),
+        }
+
+    return JSONResponse(await run_in_threadpool(series))
+
+async def handle_api_error(request, exc):
+    return _error(exc.status_code, exc.message)
+
+routes = [
+    Route("/api/health", health),
+    Route("/api/users", list_users, methods=["GET"]),
+    Route("/api/users", create_user, methods=["POST"]),
+    Route("/api/users/{username}/chat", chat_history, methods=["GET"]),
+    Route("/api/users/{username}/chat", chat_turn, methods=["POST"]),
+    Route("/api/users/{username}/journal", list_journal, methods=["GET"]),
+    Route("/api/users/{username}/journal", create_journal_entry, methods=["POST"]),
+    Route("/api/users/{username}/journal/search", search_journal, methods=["GET"]),
+    Route("/api/users/{username}/journal/{id}", get_journal_entry, methods=["GET"]),
+    Route("/api/users/{username}/journal/{id}", patch_journal_entry, methods=["PATCH"]),
+    Route("/api/users/{username}/journal/{id}", delete_journal_entry, methods=["DELETE"]),
+    Route("/api/users/{username}/mood/daily", mood_daily),
+    Route("/api/users/{username}/mood/summary", mood_summary),
+    Route("/api/users/{username}/mood/analytics", mood_analytics),
+    Route("/api/users/{username}/mood/series", mood_series),
+]
+
+create_directories()
+app = Starlette(routes=routes, exception_handlers={ApiError: handle_api_error})
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the headless HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    uvicorn.run(app, host=args.host, port=args.port)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Measure mood calendar rerender time with and without the chart-spec cache.
+
+Each mode runs a small Streamlit script repeatedly under AppTest:
+  - altair: build the month calendar chart and call st.altair_chart (the old path)
+  - object: cache the Altair chart object and call st.altair_chart, which
+    still runs chart.to_dict() (and its schema validation) every rerun
+  - cached: look the spec up in the cache and call st.vega_lite_chart
+
+Streamlit serializes the chart's data on every rerun in all three modes.
+
+    python benchmarks/bench_chart_cache.py [--years 3] [--reruns 30]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_mood_calendar import make_mood_data
+import mood_tracker
+from mood_aggregate import build_daily_aggregate
+
+def altair_script():
+    import streamlit as st
+    import mood_tracker
+    aggregate, year, month, month_end = st.session_state.bench_args
+    chart = mood_tracker.create_mood_calendar(aggregate.daily_mean(f"{year}-{month:02d}-01", month_end), year, month)
+    st.altair_chart(chart, use_container_width=True)
+
+def object_script():
+    import streamlit as st
+    import mood_tracker
+    aggregate, year, month, month_end = st.session_state.bench_args
+    # Scripts are run from their source, so the cache lives on a module
+    charts = mood_tracker.__dict__.setdefault("_bench_charts", {})
+    key = (year, month, aggregate.version)
+    if key not in charts:
+        charts[key] = mood_tracker.create_mood_calendar(aggregate.daily_mean(f"{year}-{month:02d}-01", month_end), year, month)
+    st.altair_chart(charts[key], use_container_width=True)
+
+def cached_script():
+    import streamlit as st
+    import mood_tracker
+    aggregate, year, month, month_end = st.session_state.bench_args
+    spec = mood_tracker.get_chart_spec(
+        ("bench", "month", year, month, aggregate.version),
+        lambda: mood_tracker.create_mood_calendar(aggregate.daily_mean(f"{year}-{month:02d}-01", month_end), year, month)
+    )
+    mood_tracker.show_chart_spec(spec)
+
+def time_reruns(script, args, reruns):
+    at = AppTest.from_function(script, default_timeout=60)
+    at.session_state["bench_args"] = args
+    at.run()  # warm-up (fills the cache in cached mode)
+    timings = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+        assert not at.exception, at.exception
+    return timings
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--reruns", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    mood_data = make_mood_data(args.years)
+    aggregate = build_daily_aggregate(mood_data)
+    last = aggregate.dates()[-1]
+    bench_args = (aggregate, last.year, last.month, f"{last.year}-{last.month:02d}-{last.days_in_month:02d}")
+
+    print(f"{'mode':>8} {'median ms':>10} {'p90 ms':>8}")
+    for name, script in (("altair", altair_script), ("object", object_script), ("cached", cached_script)):
+        timings = sorted(time_reruns(script, bench_args, args.reruns))
+        p90 = timings[int(len(timings) * 0.9) - 1]
+        print(f"{name:>8} {statistics.median(timings):>10.2f} {p90:>8.2f}")
+    print(f"cache stats: {mood_tracker.chart_cache_stats}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
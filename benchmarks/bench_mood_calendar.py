@@ -0,0 +1,87 @@
+"""Micro-benchmark for building the mood calendar grid.
+
+Compares the original per-day DataFrame scan with the vectorized
+build_calendar_frame on synthetic multi-year mood histories.
+
+    python benchmarks/bench_mood_calendar.py [--repeat N]
+"""
+import os
+import sys
+import random
+import argparse
+import calendar
+import timeit
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from mood_tracker import build_calendar_frame, daily_mood_series
+
+MOODS = ["Very Low", "Low", "Neutral", "Good", "Excellent"]
+
+def make_mood_data(years, entries_per_day=2, seed=0):
+    """Synthetic per-entry mood data (as daily_mood_series takes it) covering `years` years up to today"""
+    rng = random.Random(seed)
+    end = datetime.now()
+    day = end - timedelta(days=365 * years)
+    data = []
+    while day <= end:
+        for _ in range(entries_per_day):
+            value = rng.randint(1, 5)
+            data.append({
+                "date": day.strftime("%Y-%m-%d"),
+                "mood": MOODS[value - 1],
+                "mood_value": value,
+                "timestamp": day.strftime("%Y-%m-%d %H:%M:%S")
+            })
+        day += timedelta(days=1)
+    return data
+
+def legacy_calendar_frame(mood_data, year, month):
+    """The calendar grid as it was built before vectorization"""
+    df = pd.DataFrame(mood_data)
+    df["date"] = pd.to_datetime(df["date"])
+    df = df[(df["date"].dt.year == year) & (df["date"].dt.month == month)]
+    daily_mood = df.groupby("date")["mood_value"].mean().reset_index()
+
+    cal_data = []
+    first_day = datetime(year, month, 1)
+    last_day = first_day.replace(day=calendar.monthrange(year, month)[1])
+    for date in pd.date_range(start=first_day, end=last_day):
+        mood_entry = daily_mood[daily_mood["date"] == pd.Timestamp(date)]
+        cal_data.append({
+            "date": date,
+            "day": date.day,
+            "day_of_week": date.weekday(),
+            "week": (date.day - 1 + first_day.weekday()) // 7,
+            "mood_value": mood_entry["mood_value"].values[0] if not mood_entry.empty else None
+        })
+    return pd.DataFrame(cal_data)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    now = datetime.now()
+    print(f"{'years':>5} {'entries':>8} {'legacy ms':>10} {'vectorized ms':>14} {'cached ms':>10}")
+    for years in (1, 3, 10):
+        mood_data = make_mood_data(years)
+        daily = daily_mood_series(mood_data)
+
+        # Sanity check: both builders agree
+        legacy = legacy_calendar_frame(mood_data, now.year, now.month)
+        vectorized = build_calendar_frame(mood_data, now.year, now.month)
+        assert legacy["mood_value"].astype(float).equals(vectorized["mood_value"].astype(float))
+
+        legacy_ms = timeit.timeit(lambda: legacy_calendar_frame(mood_data, now.year, now.month), number=args.repeat) / args.repeat * 1000
+        vectorized_ms = timeit.timeit(lambda: build_calendar_frame(mood_data, now.year, now.month), number=args.repeat) / args.repeat * 1000
+        # Month flips reuse an already-aggregated daily series
+        cached_ms = timeit.timeit(lambda: build_calendar_frame(daily, now.year, now.month), number=args.repeat) / args.repeat * 1000
+        print(f"{years:>5} {len(mood_data):>8} {legacy_ms:>10.2f} {vectorized_ms:>14.2f} {cached_ms:>10.2f}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
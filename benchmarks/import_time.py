@@ -0,0 +1,84 @@
+"""Report cold import times for the app and fail when startup exceeds a budget.
+
+Each module is imported in a fresh interpreter with `python -X importtime`,
+so nothing is shared between measurements. For every module the report
+shows the cumulative import time and the heaviest direct imports it pulled
+in. The check fails (exit code 1) when importing `main`, which is what a
+new Streamlit session pays before the login page renders, takes longer
+than the budget.
+
+    python benchmarks/import_time.py [--budget-ms 1000] [--runs 3] [--top 8]
+
+The budget can also be set with IMPORT_BUDGET_MS.
+"""
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+MODULES = ["main", "chat_agent", "journal", "mood_tracker", "resources", "lofi_player"]
+STARTUP_MODULE = "main"
+DEFAULT_BUDGET_MS = 1000
+
+# "import time: self [us] | cumulative | imported package"
+LINE_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure(module):
+    """Import module in a fresh interpreter and return (cumulative_us, {direct import: cumulative_us})"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    # Children are printed before their parent and indented two spaces per
+    # level, so the direct imports of `module` are the depth-1 lines just
+    # before its own depth-0 line
+    children = {}
+    for line in result.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)), (len(match.group(3)) - 1) // 2, match.group(4)
+        if depth == 0:
+            if name == module:
+                return cumulative, children
+            children = {}
+        elif depth == 1:
+            children[name] = cumulative
+    raise RuntimeError(f"no import time reported for {module}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per module (median is reported)")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest direct imports to list per module")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args(argv)
+
+    totals = {}
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.runs)]
+        totals[module] = statistics.median(total for total, _ in runs) / 1000
+        heaviest = sorted(runs[-1][1].items(), key=lambda item: -item[1])[:args.top]
+
+        print(f"{module}: {totals[module]:.0f} ms")
+        for name, cumulative in heaviest:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+    if STARTUP_MODULE not in totals:
+        return 0
+    startup = totals[STARTUP_MODULE]
+    if startup > args.budget_ms:
+        print(f"FAIL: importing {STARTUP_MODULE} took {startup:.0f} ms (budget {args.budget_ms:.0f} ms)")
+        return 1
+    print(f"OK: importing {STARTUP_MODULE} took {startup:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
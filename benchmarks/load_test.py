@@ -0,0 +1,427 @@
+"""Simulate concurrent users against main.py and report rerun latency and process load.
+
+Every simulated user is an AppTest session driven from its own thread, so
+all of them share one Python process the way sessions share one Streamlit
+server. Each user creates a profile, chats, writes journal entries and
+flips through mood calendar months; every rerun is timed. The chat LLM is
+replaced by a local stand-in that answers after a configurable delay, so
+runs are repeatable and need no model server. CPU, RSS and I/O are read
+for the whole process, so they include the harness itself (AppTest polls
+for each run to finish), which keeps them comparable between runs rather
+than exact.
+
+The app runs in a temporary copy of the repository, so user_data/ is never
+touched. Compare two runs (e.g. before and after a release):
+
+    python benchmarks/load_test.py --users 8 --output before.json
+    python benchmarks/load_test.py --users 8 --output after.json --compare before.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import statistics
+import contextlib
+from datetime import datetime, timedelta
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+APP_DIRS = [".streamlit", "static"]
+
+MOODS = ["Very Low", "Low", "Neutral", "Good", "Excellent"]
+CHAT_MESSAGES = [
+    "I feel really stressed about work lately",
+    "hi",
+    "I can't sleep and keep overthinking everything",
+    "Can you help me plan my week so it feels less overwhelming?",
+    "Today was actually a good day",
+]
+JOURNAL_TEXTS = [
+    "Went for a long walk after work and felt calmer.",
+    "Deadlines are piling up and I snapped at a friend.",
+    "Tried the breathing exercise before the meeting.",
+    "Slept badly again, everything felt heavy today.",
+]
+
+class StandInLLM:
+    """Replaces the chat LLM client: answers after latency_ms (+/- jitter) with canned text"""
+
+    class Reply:
+        def __init__(self, content):
+            self.content = content
+
+    def __init__(self, latency_ms, jitter=0.2, seed=0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self.lock:
+            self.calls += 1
+            delay = self.latency * (1 + self.rng.uniform(-self.jitter, self.jitter))
+        time.sleep(delay)
+        if "actionable suggestion" in prompt:
+            return self.Reply("You might consider writing down what is worrying you most.")
+        if "Combine the Empathy and Practical" in prompt:
+            return self.Reply("That sounds hard. Perhaps try writing down what is worrying you most.")
+        return self.Reply("It sounds like a lot is going on. Tell me more about that.")
+
+class ProcessMonitor:
+    """Samples RSS while running and counts file opens under user_data/ by mode"""
+
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self.rss_samples = []
+        self.opens = {"read": 0, "write": 0}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        sys.addaudithook(self._audit)
+
+    def _audit(self, event, args):
+        if event == "open" and isinstance(args[0], str) and "user_data" in args[0]:
+            mode = args[1] or "r"
+            # os.open passes None for the mode and its flags as the third argument
+            writing = any(c in mode for c in "wax+") if isinstance(mode, str) else bool(args[2] & (os.O_WRONLY | os.O_RDWR))
+            self.opens["write" if writing else "read"] += 1
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss_mb()
+            if rss is not None:
+                self.rss_samples.append(rss)
+
+    def __enter__(self):
+        self.start_io = read_proc_io()
+        self.start_cpu = os.times()
+        self.start_wall = time.perf_counter()
+        self.opens = {"read": 0, "write": 0}
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.wall = time.perf_counter() - self.start_wall
+        end_cpu = os.times()
+        self.cpu_user = end_cpu.user - self.start_cpu.user
+        self.cpu_system = end_cpu.system - self.start_cpu.system
+        end_io = read_proc_io()
+        self.io = {key: end_io[key] - self.start_io[key] for key in end_io} if end_io and self.start_io else {}
+
+def current_rss_mb():
+    """Resident set size of this process in MB (Linux only)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+def read_proc_io():
+    """Syscall and byte counters from /proc/self/io, or None where it does not exist"""
+    try:
+        with open("/proc/self/io") as f:
+            return {key: int(value) for key, value in (line.split(": ") for line in f)}
+    except OSError:
+        return None
+
+def prepare_workdir():
+    """Copy the app into a temporary directory and make it the working directory"""
+    work = tempfile.mkdtemp(prefix="mind-companion-load-")
+    for name in os.listdir(ROOT):
+        if name.endswith(".py"):
+            shutil.copy(os.path.join(ROOT, name), work)
+    for name in APP_DIRS:
+        if os.path.isdir(os.path.join(ROOT, name)):
+            shutil.copytree(os.path.join(ROOT, name), os.path.join(work, name))
+    os.chdir(work)
+    sys.path.insert(0, work)
+    return work
+
+def seed_history(username, days, seed):
+    """Give a profile `days` days of journal history (one entry per day) before the run"""
+    from journal import save_journal_entries
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=days)
+    entries = []
+    for offset in range(days):
+        day = start + timedelta(days=offset, hours=rng.randint(7, 22))
+        entries.append({
+            "timestamp": day.strftime("%Y-%m-%d %H:%M:%S"),
+            "date": day.strftime("%Y-%m-%d"),
+            "entry": rng.choice(JOURNAL_TEXTS),
+            "mood": rng.choice(MOODS),
+            "tags": [],
+        })
+    save_journal_entries(username, entries)
+
+class SimulatedUser:
+    def __init__(self, index, args):
+        self.username = f"loaduser{index:03d}"
+        self.args = args
+        self.rng = random.Random(args.seed + index)
+        self.timings = []  # (action, ms)
+        self.errors = []
+
+    def rerun(self, action, element=None):
+        """Run the script once (after an interaction on element, if given) and record the time"""
+        start = time.perf_counter()
+        (element or self.at).run()
+        self.timings.append((action, (time.perf_counter() - start) * 1000))
+        if self.at.exception:
+            self.errors.append(f"{action}: {self.at.exception[0].value}")
+
+    def create_profile(self):
+        self.rerun("type_username", self.at.text_input(key="new_username_input").input(self.username))
+        self.rerun("login", self.at.button(key="create_new").click())
+
+    def pick_profile(self):
+        """Log in through the existing-profile picker (seeded profiles are already registered)"""
+        search = [box for box in self.at.text_input if box.key == "profile_search"]
+        if search:
+            self.rerun("search_profiles", search[0].input(self.username))
+        self.rerun("select_profile", self.at.selectbox(key="select_existing_user").set_value(self.username))
+        self.rerun("login", self.at.button(key="continue_existing").click())
+
+    def navigate(self, page):
+        self.rerun("navigate", self.at.sidebar.radio(key="nav_radio").set_value(page))
+
+    def run(self):
+        """Log in, chat, write journal entries and step back through mood calendar months"""
+        try:
+            self.at = AppTest.from_file(os.path.join(os.getcwd(), "main.py"), default_timeout=self.args.timeout)
+            self.rerun("login_page")
+            if self.args.history_days:
+                self.pick_profile()
+            else:
+                self.create_profile()
+
+            self.navigate("💬 Chat Support")
+            for _ in range(self.args.turns):
+                self.rerun("chat_turn", self.at.chat_input[0].set_value(self.rng.choice(CHAT_MESSAGES)))
+
+            self.navigate("📝 Journal")
+            for _ in range(self.args.entries):
+                self.at.text_area[0].input(self.rng.choice(JOURNAL_TEXTS))
+                self.at.select_slider[0].set_value(self.rng.choice(MOODS))
+                save = next(button for button in self.at.button if button.label == "Save Entry")
+                self.rerun("journal_save", save.click())
+
+            self.navigate("📊 Mood Calendar")
+            month = next(box for box in self.at.selectbox if box.label == "Month").value
+            for _ in range(self.args.month_flips):
+                month = 12 if month == 1 else month - 1
+                self.rerun("mood_month", next(box for box in self.at.selectbox if box.label == "Month").set_value(month))
+        except Exception as e:
+            self.errors.append(f"{type(e).__name__}: {e}")
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+def latency_stats(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "mean_ms": round(statistics.fmean(values), 2),
+        "p50_ms": round(percentile(values, 0.5), 2),
+        "p90_ms": round(percentile(values, 0.9), 2),
+        "p99_ms": round(percentile(values, 0.99), 2),
+        "max_ms": round(values[-1], 2),
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_load_test(args):
+    work = prepare_workdir()
+    try:
+        return _run(args)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(work, ignore_errors=True)
+
+def allow_concurrent_sessions():
+    """Let several AppTest sessions run in one process at the same time.
+
+    AppTest switches the global.appTest option on for the length of each
+    run and back off afterwards, so one session finishing would switch it
+    off under another still running; keep it on for the whole load test.
+    It likewise clears the Runtime singleton after each run, so fall back
+    to the last runtime seen, the way a server keeps one for its lifetime.
+    It also compiles the script afresh on every run, and concurrent
+    compiles can fail on some Python versions; a server compiles once and
+    shares the bytecode between sessions, so share one ScriptCache the
+    same way.
+    """
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    config.set_option("global.appTest", True)
+    app_test.patch_config_options = lambda options: contextlib.nullcontext()
+
+    last_runtime = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            last_runtime[:] = [cls._instance]
+            return cls._instance
+        if not last_runtime:
+            raise RuntimeError("Runtime hasn't been created!")
+        return last_runtime[0]
+
+    Runtime.instance = classmethod(instance)
+    script_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+
+def _run(args):
+    import streamlit
+    import streamlit.config
+    import streamlit.logger
+    import chat_agent
+    from utils import create_directories
+
+    allow_concurrent_sessions()
+    llm = StandInLLM(args.llm_latency_ms, seed=args.seed)
+    chat_agent.get_llm = lambda: llm
+    create_directories()
+
+    users = [SimulatedUser(i, args) for i in range(args.users)]
+    if args.history_days:
+        for user in users:
+            seed_history(user.username, args.history_days, args.seed)
+        from user_registry import rebuild_registry
+        rebuild_registry()
+
+    threads = [threading.Thread(target=user.run, name=user.username) for user in users]
+    # The app prints debug lines on every chat turn; keep them out of the report
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+    if not args.verbose:
+        streamlit.config.set_option("logger.level", "error")
+        streamlit.logger.set_log_level("error")
+    with quiet, ProcessMonitor() as monitor:
+        for thread in threads:
+            thread.start()
+            time.sleep(args.ramp_s / max(args.users, 1))
+        for thread in threads:
+            thread.join()
+
+    by_action = {}
+    for user in users:
+        for action, ms in user.timings:
+            by_action.setdefault(action, []).append(ms)
+    all_timings = [ms for values in by_action.values() for ms in values]
+    cpu = monitor.cpu_user + monitor.cpu_system
+
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "config": {key: getattr(args, key) for key in (
+            "users", "turns", "entries", "month_flips", "history_days", "llm_latency_ms", "ramp_s", "seed"
+        )},
+        "wall_s": round(monitor.wall, 2),
+        "reruns": len(all_timings),
+        "reruns_per_s": round(len(all_timings) / monitor.wall, 2) if monitor.wall else None,
+        "latency": {"all": latency_stats(all_timings) if all_timings else None,
+                    **{action: latency_stats(values) for action, values in sorted(by_action.items())}},
+        "cpu": {"user_s": round(monitor.cpu_user, 2), "system_s": round(monitor.cpu_system, 2),
+                "percent_of_one_core": round(cpu / monitor.wall * 100, 1) if monitor.wall else None},
+        "rss_mb": {"peak": round(max(monitor.rss_samples), 1) if monitor.rss_samples else None,
+                   "mean": round(statistics.fmean(monitor.rss_samples), 1) if monitor.rss_samples else None},
+        "io": {"user_data_opens": monitor.opens, **monitor.io},
+        "llm_calls": llm.calls,
+        "errors": [f"{user.username}: {error}" for user in users for error in user.errors],
+    }
+
+def print_report(report):
+    print(f"{report['config']['users']} users, {report['reruns']} reruns in {report['wall_s']} s "
+          f"({report['reruns_per_s']} reruns/s), revision {report['revision']}")
+    print(f"{'action':>15} {'count':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for action, stats in report["latency"].items():
+        if stats:
+            print(f"{action:>15} {stats['count']:>6} {stats['p50_ms']:>9.1f} {stats['p90_ms']:>9.1f} "
+                  f"{stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+    print(f"CPU: {report['cpu']['user_s']} s user, {report['cpu']['system_s']} s system "
+          f"({report['cpu']['percent_of_one_core']}% of one core)")
+    print(f"RSS: peak {report['rss_mb']['peak']} MB, mean {report['rss_mb']['mean']} MB")
+    io = report["io"]
+    print(f"I/O: {io['user_data_opens']['read']} reads / {io['user_data_opens']['write']} writes opened under user_data"
+          + (f", {io['syscr']} read / {io['syscw']} write syscalls, {io['wchar']} bytes written" if "syscr" in io else ""))
+    print(f"LLM calls: {report['llm_calls']}")
+    for error in report["errors"]:
+        print(f"ERROR {error}")
+
+def compare_reports(baseline, report):
+    """Print how the headline numbers moved relative to a baseline report"""
+    if baseline["config"] != report["config"]:
+        print("NOTE: the baseline was run with different settings:", baseline["config"])
+
+    def row(name, old, new):
+        if old is None or new is None:
+            return
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{name:>24} {old:>10} {new:>10} {change:>8}")
+
+    print(f"\nCompared with {baseline.get('revision')} ({baseline['created_at']}):")
+    print(f"{'metric':>24} {'baseline':>10} {'current':>10} {'change':>8}")
+    for action, stats in report["latency"].items():
+        old = baseline["latency"].get(action)
+        if stats and old:
+            row(f"{action} p50 ms", old["p50_ms"], stats["p50_ms"])
+            row(f"{action} p90 ms", old["p90_ms"], stats["p90_ms"])
+    row("reruns/s", baseline["reruns_per_s"], report["reruns_per_s"])
+    row("CPU % of one core", baseline["cpu"]["percent_of_one_core"], report["cpu"]["percent_of_one_core"])
+    row("peak RSS MB", baseline["rss_mb"]["peak"], report["rss_mb"]["peak"])
+    row("user_data writes", baseline["io"]["user_data_opens"]["write"], report["io"]["user_data_opens"]["write"])
+    row("user_data reads", baseline["io"]["user_data_opens"]["read"], report["io"]["user_data_opens"]["read"])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=8, help="Simulated users running at the same time")
+    parser.add_argument("--turns", type=int, default=5, help="Chat messages per user")
+    parser.add_argument("--entries", type=int, default=3, help="Journal entries saved per user")
+    parser.add_argument("--month-flips", type=int, default=6, help="Mood calendar months stepped back per user")
+    parser.add_argument("--history-days", type=int, default=180, help="Days of journal history seeded per user")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="Stand-in LLM delay per call")
+    parser.add_argument("--ramp-s", type=float, default=2.0, help="Spread user start times over this many seconds")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds one rerun may take before it fails")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Show the app's own output and Streamlit warnings")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report = run_load_test(args)
+    print_report(report)
+    if baseline:
+        compare_reports(baseline, report)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {output}")
+    return 1 if report["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,26 @@
 import streamlit as st
-from langchain_openai import ChatOpenAI
 # Removed streamlit_chat import as we use native elements now
 import os
 import json
 from datetime import datetime
 # Assuming utils.py exists with get_user_data_path
 from utils import get_user_data_path # Make sure this function exists and works
+from message_store import ChatMessageBuffer
+from storage import locked, write_json
 import traceback # Import for detailed error logging
 import re # Keep for validation robustness
 
-# --- LLM Configuration and Instances (No Changes) ---
+# --- LLM Configuration and Instances ---
+# Clients are created on first use so importing this module (and opening the
+# chat page) does not pay for langchain_openai until a reply is generated.
+# They belong to one worker process: a forked worker starts its own set
+# instead of sharing the parent's connection pools.
+_llm_clients = {}
+_llm_clients_pid = os.getpid()
+
 def get_llm():
+    # langchain_openai pulls in openai, httpx and pydantic; import on demand
+    from langchain_openai import ChatOpenAI
     return ChatOpenAI(
         model="llama3.2:1b",
         base_url="http://localhost:11434/v1",
@@ -20,9 +30,16 @@ def get_llm():
         frequency_penalty=0.5,
         presence_penalty=0.4
     )
-empathy_llm = get_llm()
-practical_llm = get_llm()
-supervisor_llm = get_llm()
+
+def get_llm_client(role):
+    """Get the cached client for a role ("empathy", "practical" or "supervisor")"""
+    global _llm_clients, _llm_clients_pid
+    if _llm_clients_pid != os.getpid():
+        _llm_clients, _llm_clients_pid = {}, os.getpid()
+    client = _llm_clients.get(role)
+    if client is None:
+        client = _llm_clients[role] = get_llm()
+    return client
 
 # --- List of common greetings (for the internal check) ---
 # Moved here for use in get_practical_response
@@ -48,7 +65,7 @@ def get_empathy_response(user_input):
 
     YOUR RESPONSE (Plain text, Max 2 sentences, strictly follow rules above):"""
     try:
-        response = empathy_llm.invoke(prompt)
+        response = get_llm_client("empathy").invoke(prompt)
         # Keep the basic override check just in case
         normalized_input = user_input.lower().strip().rstrip('!.')
         if normalized_input in COMMON_GREETINGS_CHECK and len(response.content.strip().split()) > 7:
@@ -82,7 +99,7 @@ def get_practical_response(user_input):
 
     YOUR RESPONSE (Plain text: 1 suggestion OR 'NO_ACTION_NEEDED'):"""
     try:
-        response = practical_llm.invoke(prompt)
+        response = get_llm_client("practical").invoke(prompt)
         content = response.content.strip()
 
         # Standard checks remain
@@ -99,17 +116,8 @@ def get_practical_response(user_input):
 
 
 
-def combine_responses(user_input, empathy_response, practical_response):
-    # Decide upfront based on the practical response marker
-    if practical_response == "NO_ACTION_NEEDED":
-        # If no action needed, the final response is just the empathy part.
-        # We don't even need to call the supervisor LLM in this case.
-        print("[DEBUG] Combine_Responses: Practical is NO_ACTION_NEEDED. Returning empathy only.")
-        return empathy_response
-    else:
-        # Only call the supervisor if there is practical advice to combine
-        print("[DEBUG] Combine_Responses: Practical advice found. Calling Supervisor LLM.")
-        prompt = f"""Your TASK: Combine the Empathy and Practical components into a single, short, natural response.
+def _combine_prompt(user_input, empathy_response, practical_response):
+    return f"""Your TASK: Combine the Empathy and Practical components into a single, short, natural response.
 
         EMPATHY COMPONENT: {empathy_response}
         PRACTICAL COMPONENT: {practical_response}
@@ -127,7 +135,19 @@ def combine_responses(user_input, empathy_response, practical_response):
         USER INPUT CONTEXT (for reference only): {user_input}
 
         YOUR COMBINED RESPONSE (Plain text, Max 3 sentences):"""
-        response = supervisor_llm.invoke(prompt)
+
+def combine_responses(user_input, empathy_response, practical_response):
+    # Decide upfront based on the practical response marker
+    if practical_response == "NO_ACTION_NEEDED":
+        # If no action needed, the final response is just the empathy part.
+        # We don't even need to call the supervisor LLM in this case.
+        print("[DEBUG] Combine_Responses: Practical is NO_ACTION_NEEDED. Returning empathy only.")
+        return empathy_response
+    else:
+        # Only call the supervisor if there is practical advice to combine
+        print("[DEBUG] Combine_Responses: Practical advice found. Calling Supervisor LLM.")
+        prompt = _combine_prompt(user_input, empathy_response, practical_response)
+        response = get_llm_client("supervisor").invoke(prompt)
         cleaned_response = response.content.strip()
         return cleaned_response
 
@@ -167,6 +187,36 @@ def generate_response(user_input):
         return f"I seem to be having a little trouble formulating a response right now. Perhaps try phrasing that differently? (Error: {str(e)})"
 
 
+def generate_response_events(user_input):
+    """Generate a reply like generate_response, streaming the last step.
+
+    Yields ("delta", text) pieces as the supervisor LLM produces them, then
+    exactly one ("done", reply) with the validated reply that
+    generate_response would return. Clients should show the deltas while
+    waiting and replace them with the final reply.
+    """
+    try:
+        empathy_response = get_empathy_response(user_input) or "I'm processing that. How are you feeling about it?"
+        practical_response = get_practical_response(user_input)
+
+        if practical_response == "NO_ACTION_NEEDED":
+            combined = empathy_response
+            yield "delta", combined
+        else:
+            pieces = []
+            for chunk in get_llm_client("supervisor").stream(_combine_prompt(user_input, empathy_response, practical_response)):
+                if chunk.content:
+                    pieces.append(chunk.content)
+                    yield "delta", chunk.content
+            combined = "".join(pieces).strip()
+
+        yield "done", validate_response(combined) or "I'm not sure how to respond to that. Could you tell me more?"
+    except Exception as e:
+        print(f"ERROR during streamed response generation: {e}")
+        traceback.print_exc()
+        yield "done", f"I seem to be having a little trouble formulating a response right now. Perhaps try phrasing that differently? (Error: {str(e)})"
+
+
 # --- validate_response Function (Removed Duplicate) ---
 def validate_response(text: str) -> str:
     """Clean up common LLM artifacts - keep this robust"""
@@ -240,13 +290,26 @@ def save_chat_history(username, messages):
     chat_path = os.path.join(data_dir, f"{safe_username}_chat.json") # Use os.path.join
 
     try:
-        with open(chat_path, 'w', encoding='utf-8') as f: # Specify encoding
-            json.dump(messages, f, indent=2, ensure_ascii=False) # Use ensure_ascii=False for broader char support
+        # Written via a temp file so other workers never read a half-written history
+        write_json(chat_path, messages, indent=2, ensure_ascii=False) # Use ensure_ascii=False for broader char support
     except Exception as e:
         print(f"Error saving chat history for {username}: {e}") # Print error
         # Avoid crashing the app, maybe show a warning in UI if possible
         # st.error(f"Error saving chat history: {e}") # Be cautious with st calls outside main thread
 
+def save_chat_buffer(username, buffer):
+    """Append a session's unsaved messages to the stored history.
+
+    Runs under the user's chat lock, so two sessions (or worker processes)
+    saving at once do not drop each other's messages.
+    """
+    pending = buffer.pending()
+    if not pending:
+        return
+    with locked(f"chat-{username}"):
+        save_chat_history(username, load_chat_history(username) + pending)
+    buffer.mark_saved()
+
 def load_chat_history(username):
     """Load chat history from a file"""
      # Sanitize username for filename if necessary
@@ -274,16 +337,6 @@ def load_chat_history(username):
 
 
 # --- Chat Page Function (Keep as is) ---
-def get_llm():
-    return ChatOpenAI(
-        model="llama3.2:1b", base_url="http://localhost:11434/v1",
-        temperature=0.2, max_tokens=150, openai_api_key="NA",
-        frequency_penalty=0.5, presence_penalty=0.4
-    )
-empathy_llm = get_llm()
-practical_llm = get_llm()
-supervisor_llm = get_llm()
-
 # --- Your prompt functions (get_empathy_response, get_practical_response, combine_responses) here ---
 # --- Your generate_response and validate_response functions here ---
 # --- Your save/load_chat_history and get_user_data_path functions here ---
@@ -321,29 +374,33 @@ def chat_page():
     """, unsafe_allow_html=True)
     # --- END CUSTOM CSS ---
 
-    # Initialize or load chat history (no change needed here)
+    # Initialize or load chat history. Only the newest messages are kept in
+    # the session (see message_store); older ones stay in the history file.
     if "messages" not in st.session_state:
-        st.session_state.messages = load_chat_history(st.session_state.username)
+        st.session_state.messages = ChatMessageBuffer.from_messages(load_chat_history(st.session_state.username))
         # Add a default assistant message if history is empty
-        if not st.session_state.messages:
-            st.session_state.messages.append(
-                {"role": "assistant", "content": "Hello! How can I help you today?"}
-            )
+        if not st.session_state.messages.total:
+            st.session_state.messages.append("assistant", "Hello! How can I help you today?")
+
+    if st.session_state.messages.offset:
+        if st.button(f"Load earlier messages ({st.session_state.messages.offset} more)", key="load_earlier_messages"):
+            st.session_state.messages.load_earlier(load_chat_history(st.session_state.username))
+            st.rerun()
 
     # Display chat messages using st.chat_message
     # No need for a separate scrollable container usually, as the page scrolls
-    for i, msg in enumerate(st.session_state.messages):
+    for role, content in st.session_state.messages:
         # Use the 'role' ("user" or "assistant") to determine message alignment and icon
-        with st.chat_message(msg["role"]):
+        with st.chat_message(role):
             # Display the content using st.markdown (handles formatting)
-            st.markdown(msg["content"]) # Apply markdown formatting within the message
+            st.markdown(content) # Apply markdown formatting within the message
 
     # --- NATIVE CHAT INPUT WIDGET ---
     # This replaces the st.form and st.text_area for input
     # It pins to the bottom by default in recent Streamlit versions
     if prompt := st.chat_input("What's on your mind?"): # Assigns input to 'prompt' if user enters text
         # 1. Add user message to session state and display it
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        st.session_state.messages.append("user", prompt)
         with st.chat_message("user"):
             st.markdown(prompt)
 
@@ -353,26 +410,35 @@ def chat_page():
             assistant_response = generate_response(prompt)
 
         # 3. Add assistant response to session state and display it
-        st.session_state.messages.append({"role": "assistant", "content": assistant_response})
+        st.session_state.messages.append("assistant", assistant_response)
         with st.chat_message("assistant"):
             st.markdown(assistant_response)
 
-        # 4. Save history
-        save_chat_history(st.session_state.username, st.session_state.messages)
+        # 4. Save history (only the new messages are appended to the stored history)
+        save_chat_buffer(st.session_state.username, st.session_state.messages)
 
         # 5. No st.rerun() needed here - st.chat_input handles the flow better
 
     # Clear chat button (optional, keep if desired)
     st.divider()
     if st.button("Clear Chat History"):
-        st.session_state.messages = [
-            {"role": "assistant", "content": "Chat cleared. How can I help you now?"}
-        ]
-        save_chat_history(st.session_state.username, [])
+        st.session_state.messages = ChatMessageBuffer()
+        st.session_state.messages.append("assistant", "Chat cleared. How can I help you now?")
+        with locked(f"chat-{st.session_state.username}"):
+            save_chat_history(st.session_state.username, [])
         st.success("Chat history cleared.")
         # Need to rerun here because button click doesn't automatically update message display
         st.rerun()
 
+    with st.expander("Session memory"):
+        usage = st.session_state.messages.memory_usage()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Messages in memory", usage["in_memory"])
+        col2.metric("Older messages on disk", usage["on_disk_only"])
+        col3.metric("Buffer size", f"{usage['buffer_bytes'] / 1024:.1f} KB",
+                    delta=f"{(usage['buffer_bytes'] - usage['dict_list_bytes']) / 1024:.1f} KB vs. list of dicts",
+                    delta_color="inverse")
+
 # --- Main execution (Example) ---
 # if __name__ == "__main__":
 #     # Simulate session state for testing if needed
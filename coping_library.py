@@ -0,0 +1,398 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict, deque
+from functools import lru_cache
+from utils import get_user_data_path
+from storage import write_json, read_json
+
+# Coping strategies are answered instantly from a library built from
+# COPING_STRATEGIES, picked for the emotional state and therapeutic approach
+# and skipping what the user has already tried. A Gemini-personalized set for
+# the same state, approach and tried set is generated in the background and
+# served from then on (from memory, or user_data/coping_cache shared by all
+# workers). Personalized sets older than COPING_PERSONALIZATION_TTL are still
+# served while a fresh one is generated.
+COPING_PERSONALIZATION_TTL = 7 * 24 * 3600
+STRATEGIES_PER_ANSWER = 3
+# Personalized sets kept in memory per worker (least recently used go first;
+# they stay on disk)
+COPING_MEMORY_ENTRIES = 256
+
+# Define coping strategies
+COPING_STRATEGIES = {
+    "stressed": [
+        "Deep breathing exercises (4-7-8 technique)",
+        "Progressive muscle relaxation",
+        "Short mindfulness meditation",
+        "Brief physical activity (stretch, walk)",
+        "Grounding techniques using 5 senses"
+    ],
+    "anxious": [
+        "Box breathing (4-4-4-4 pattern)",
+        "Body scan meditation",
+        "Reality testing thoughts",
+        "Creating a worry schedule",
+        "HALT check (Hungry, Angry, Lonely, Tired)"
+    ],
+    "sad": [
+        "Behavioral activation (small positive activities)",
+        "Gratitude practice (3 things)",
+        "Pleasant memory visualization",
+        "Light physical exercise",
+        "Connecting with supportive people"
+    ],
+    "angry": [
+        "Time-out technique",
+        "Physical outlet (exercise, pillow punching)",
+        "Thought challenging",
+        "Distraction techniques",
+        "STOP technique (Stop, Take a breath, Observe, Proceed)"
+    ],
+    "overwhelmed": [
+        "Task chunking and prioritization",
+        "Boundary setting practice",
+        "Sensory grounding (focusing on one sense)",
+        "Brief mindfulness break",
+        "Self-compassion practice"
+    ]
+}
+
+# Used for states COPING_STRATEGIES has no entry for
+DEFAULT_STATE = "stressed"
+APPROACHES = ["CBT", "DBT", "ACT", "Mindfulness", "Supportive"]
+DEFAULT_APPROACH = "Supportive"
+FOCUSES = ["physical", "cognitive", "emotional"]
+
+# name, description, implementation, focus and the approaches each strategy
+# belongs to (an answer mixes one strategy of each focus where it can)
+STRATEGY_DETAILS = {
+    "Deep breathing exercises (4-7-8 technique)": (
+        "4-7-8 Breathing",
+        "Slow breathing with a long exhale calms the nervous system.",
+        "Breathe in for 4 counts, hold for 7, and breathe out slowly for 8. Repeat 4 times.",
+        "physical", ["Mindfulness", "DBT", "Supportive"]),
+    "Progressive muscle relaxation": (
+        "Progressive Muscle Relaxation",
+        "Tensing and releasing muscle groups lets go of stored tension.",
+        "Starting at your feet, tense each muscle group for 5 seconds, then relax it for 10, working up to your face.",
+        "physical", ["CBT", "Mindfulness"]),
+    "Short mindfulness meditation": (
+        "Short Mindfulness Meditation",
+        "A few minutes of noticing the present moment eases racing thoughts.",
+        "Set a 3-minute timer, rest your attention on your breath and gently return to it whenever your mind wanders.",
+        "emotional", ["Mindfulness", "ACT", "DBT"]),
+    "Brief physical activity (stretch, walk)": (
+        "Quick Movement Break",
+        "A short burst of movement burns off stress hormones.",
+        "Stand up and stretch for 2 minutes, or take a 5-minute walk, ideally outside.",
+        "physical", ["CBT", "Supportive"]),
+    "Grounding techniques using 5 senses": (
+        "5 Senses Grounding",
+        "Using your senses brings you back to the present when stress builds.",
+        "Name 5 things you can see, 4 you can touch, 3 you can hear, 2 you can smell, and 1 you can taste.",
+        "cognitive", ["DBT", "Mindfulness"]),
+    "Box breathing (4-4-4-4 pattern)": (
+        "Box Breathing",
+        "An even breathing rhythm steadies the body during anxiety.",
+        "Breathe in for 4, hold for 4, breathe out for 4, hold for 4. Repeat for 2 minutes.",
+        "physical", ["Mindfulness", "DBT", "Supportive"]),
+    "Body scan meditation": (
+        "Body Scan",
+        "Noticing sensations without judging them loosens anxiety's grip on the body.",
+        "Close your eyes and move your attention slowly from your toes to your head, noticing each area for a breath or two.",
+        "emotional", ["Mindfulness", "ACT"]),
+    "Reality testing thoughts": (
+        "Reality-Test Anxious Thoughts",
+        "Checking a worry against the evidence shrinks it to its real size.",
+        "Write the worry down, then list the evidence for and against it and a more balanced way to see it.",
+        "cognitive", ["CBT"]),
+    "Creating a worry schedule": (
+        "Schedule Worry Time",
+        "Postponing worries to a set time stops them taking over the day.",
+        "Pick a 15-minute slot for later today; when a worry comes up, note it down and save it for then.",
+        "cognitive", ["CBT"]),
+    "HALT check (Hungry, Angry, Lonely, Tired)": (
+        "HALT Check",
+        "Basic needs left unmet often make anxiety worse.",
+        "Ask yourself: am I hungry, angry, lonely or tired? Take one small step to meet whichever need comes up.",
+        "emotional", ["DBT", "Supportive"]),
+    "Behavioral activation (small positive activities)": (
+        "One Small Positive Activity",
+        "Doing something small and rewarding lifts mood before motivation arrives.",
+        "Choose one 10-minute activity you used to enjoy, such as music or a favourite drink, and do it now.",
+        "cognitive", ["CBT", "ACT"]),
+    "Gratitude practice (3 things)": (
+        "Three Good Things",
+        "Noticing what went well gently shifts attention from what didn't.",
+        "Write down three things, however small, that went okay today and why.",
+        "emotional", ["Supportive", "CBT", "Mindfulness"]),
+    "Pleasant memory visualization": (
+        "Revisit a Good Memory",
+        "Recalling a warm memory in detail brings back some of its comfort.",
+        "Close your eyes and picture a happy moment: where you were, who was there, what you could hear and feel.",
+        "emotional", ["Supportive", "Mindfulness"]),
+    "Light physical exercise": (
+        "Gentle Exercise",
+        "Light movement raises energy and mood when you feel low.",
+        "Go for a 10-minute walk or do a few gentle stretches, at whatever pace feels manageable.",
+        "physical", ["CBT", "Supportive"]),
+    "Connecting with supportive people": (
+        "Reach Out to Someone",
+        "Sharing how you feel with someone who cares eases the weight of it.",
+        "Send a short message to a friend or family member, even just to say hello.",
+        "emotional", ["Supportive", "DBT"]),
+    "Time-out technique": (
+        "Take a Time-Out",
+        "Stepping away before reacting keeps anger from taking the wheel.",
+        "Tell the other person you need a few minutes, leave the room and come back once you feel calmer.",
+        "physical", ["DBT", "CBT"]),
+    "Physical outlet (exercise, pillow punching)": (
+        "Safe Physical Outlet",
+        "Vigorous movement releases the energy that anger builds up.",
+        "Do 2 minutes of something intense and safe: a brisk walk, jumping jacks or punching a pillow.",
+        "physical", ["DBT", "Supportive"]),
+    "Thought challenging": (
+        "Challenge the Angry Thought",
+        "Questioning the thought behind anger opens up calmer ways to respond.",
+        "Write the thought that is fuelling your anger and ask: is it fully true, and how else could this be seen?",
+        "cognitive", ["CBT"]),
+    "Distraction techniques": (
+        "Healthy Distraction",
+        "Shifting attention for a while lets intense anger pass.",
+        "Pick an absorbing task for 10 minutes, like a puzzle, a game or counting backwards from 100 by 7s.",
+        "cognitive", ["DBT", "Supportive"]),
+    "STOP technique (Stop, Take a breath, Observe, Proceed)": (
+        "STOP Technique",
+        "A quick pause creates space between feeling angry and acting on it.",
+        "Stop what you're doing, take one slow breath, observe what you feel and think, then proceed on purpose.",
+        "emotional", ["DBT", "Mindfulness", "ACT"]),
+    "Task chunking and prioritization": (
+        "Chunk and Prioritize",
+        "Breaking work into small steps makes a mountain of tasks manageable.",
+        "List everything on your mind, circle the one most important item and write its very first 5-minute step.",
+        "cognitive", ["CBT", "Supportive"]),
+    "Boundary setting practice": (
+        "Set One Boundary",
+        "Saying no to one thing frees up room for what matters most.",
+        "Pick one request or commitment you can decline or delay and write the sentence you'll use to say so.",
+        "cognitive", ["DBT", "ACT"]),
+    "Sensory grounding (focusing on one sense)": (
+        "Single-Sense Grounding",
+        "Focusing on one sense quiets a mind pulled in many directions.",
+        "For one minute, notice only what you can hear, naming each sound as it comes and goes.",
+        "physical", ["Mindfulness", "DBT"]),
+    "Brief mindfulness break": (
+        "One-Minute Pause",
+        "A short pause resets your attention when everything feels like too much.",
+        "Stop for one minute, feel your feet on the floor and take three slow breaths before continuing.",
+        "physical", ["Mindfulness", "ACT"]),
+    "Self-compassion practice": (
+        "Self-Compassion Break",
+        "Speaking to yourself kindly eases the pressure of feeling overwhelmed.",
+        "Put a hand on your chest and say: this is hard, others feel this too, may I be kind to myself.",
+        "emotional", ["ACT", "Mindfulness", "Supportive"]),
+}
+
+def _strategy(name):
+    title, description, implementation, _, _ = STRATEGY_DETAILS[name]
+    return {"name": title, "description": description, "implementation": implementation}
+
+def normalize_request(emotional_state, therapeutic_approach):
+    """The library's own state and approach for the free-form ones a context analysis returns"""
+    state = (emotional_state or "").strip().casefold()
+    approach = (therapeutic_approach or "").strip().casefold()
+    return (
+        state if state in COPING_STRATEGIES else DEFAULT_STATE,
+        next((known for known in APPROACHES if known.casefold() == approach), DEFAULT_APPROACH)
+    )
+
+def _tried_key(previously_tried):
+    return tuple(sorted({item.strip().casefold() for item in previously_tried if item and item.strip()}))
+
+def _was_tried(name, tried):
+    return name.casefold() in tried or STRATEGY_DETAILS[name][0].casefold() in tried
+
+@lru_cache(maxsize=2048)
+def _library_strategies(emotional_state, therapeutic_approach, tried):
+    state = emotional_state if emotional_state in COPING_STRATEGIES else DEFAULT_STATE
+    # The state's own strategies come first, then the other states' ones
+    candidates = COPING_STRATEGIES[state] + [
+        name for other, names in COPING_STRATEGIES.items() if other != state for name in names
+    ]
+    untried = [name for name in candidates if not _was_tried(name, tried)]
+    # Fall back to tried ones rather than give fewer strategies
+    pool = untried + [name for name in candidates if name not in untried]
+
+    def rank(name):
+        own_state = name in COPING_STRATEGIES[state]
+        fits_approach = therapeutic_approach in STRATEGY_DETAILS[name][4]
+        return (name not in untried, not own_state, not fits_approach, pool.index(name))
+
+    ranked = sorted(pool, key=rank)
+    chosen = []
+    # One of each focus where the state has one, then the best of the rest
+    for focus in FOCUSES:
+        for name in ranked:
+            if STRATEGY_DETAILS[name][3] == focus and rank(name)[:2] == (False, False):
+                chosen.append(name)
+                break
+    for name in ranked:
+        if len(chosen) >= STRATEGIES_PER_ANSWER:
+            break
+        if name not in chosen:
+            chosen.append(name)
+    chosen = sorted(chosen[:STRATEGIES_PER_ANSWER], key=lambda name: FOCUSES.index(STRATEGY_DETAILS[name][3]))
+    return tuple(chosen)
+
+def library_strategies(emotional_state, therapeutic_approach, previously_tried=()):
+    """Strategies from the library for a state, approach and the strategies already tried"""
+    key = _tried_key(previously_tried)
+    return [_strategy(name) for name in _library_strategies(emotional_state, therapeutic_approach, key)]
+
+# Build the untried answers for every known state and approach up front
+for _state in COPING_STRATEGIES:
+    for _approach in APPROACHES:
+        _library_strategies(_state, _approach, ())
+
+def _get_cache_path(key):
+    digest = hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()
+    return get_user_data_path(f"coping_cache/{digest}.json")
+
+def validate_strategies(strategies):
+    """The strategies if they are a non-empty list of name/description/implementation dicts, else ValueError"""
+    if not isinstance(strategies, list) or not strategies:
+        raise ValueError("expected a non-empty list of strategies")
+    for strategy in strategies:
+        if not isinstance(strategy, dict) or not all(
+            isinstance(strategy.get(field), str) for field in ("name", "description", "implementation")
+        ):
+            raise ValueError(f"malformed strategy: {strategy!r}")
+    return strategies
+
+class CopingLibrary:
+    def __init__(self, memory_entries=COPING_MEMORY_ENTRIES):
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()  # tuple(key) -> (created_at, strategies)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._counts = dict.fromkeys(
+            ["personalized_hits", "stale_hits", "library_answers", "personalizations", "personalization_errors"], 0)
+        self._served_ages = deque(maxlen=500)
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def metrics(self):
+        """Answer counts, how often a personalized set was ready and the age (hours) of those served"""
+        with self._lock:
+            counts = dict(self._counts)
+            ages = list(self._served_ages)
+        answers = counts["personalized_hits"] + counts["library_answers"]
+        counts["hit_rate"] = round(counts["personalized_hits"] / answers, 3) if answers else None
+        counts["served_age_mean_hours"] = round(sum(ages) / len(ages) / 3600, 2) if ages else None
+        counts["served_age_max_hours"] = round(max(ages) / 3600, 2) if ages else None
+        return counts
+
+    def _remember(self, key, created_at, strategies):
+        with self._lock:
+            self._memory[key] = (created_at, strategies)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        stored = read_json(_get_cache_path(list(key)), None)
+        if stored and stored.get("key") == list(key):
+            self._remember(key, stored["created_at"], stored["strategies"])
+            return stored["created_at"], stored["strategies"]
+        return None
+
+    def _personalize(self, key, personalize, emotional_state, therapeutic_approach, previously_tried):
+        try:
+            strategies = validate_strategies(personalize(emotional_state, therapeutic_approach, previously_tried))
+            created_at = time.time()
+            self._remember(key, created_at, strategies)
+            write_json(_get_cache_path(list(key)), {"key": list(key), "created_at": created_at, "strategies": strategies})
+            self._count("personalizations")
+        except Exception as e:
+            # The library answer keeps being used; the next turn tries again
+            self._count("personalization_errors")
+            print(f"Error personalizing coping strategies for {emotional_state}/{therapeutic_approach}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def _schedule(self, key, personalize, emotional_state, therapeutic_approach, previously_tried):
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        threading.Thread(target=self._personalize, daemon=True, name="coping-personalize",
+                         args=(key, personalize, emotional_state, therapeutic_approach, list(previously_tried))).start()
+
+    def get_strategies(self, emotional_state, therapeutic_approach, previously_tried, personalize=None):
+        """Strategies for a turn without waiting on the model.
+
+        personalize(emotional_state, therapeutic_approach, previously_tried)
+        returns a personalized list of strategies; it is run in the background
+        when there is no personalized set yet or the cached one is stale. The
+        state and approach are mapped to the library's own first (see
+        normalize_request), so the cache has one entry per known pair and
+        tried set.
+        """
+        emotional_state, therapeutic_approach = normalize_request(emotional_state, therapeutic_approach)
+        key = (emotional_state, therapeutic_approach, *_tried_key(previously_tried))
+        cached = self._lookup(key)
+        if cached:
+            created_at, strategies = cached
+            age = time.time() - created_at
+            self._count("personalized_hits")
+            with self._lock:
+                self._served_ages.append(age)
+            if age >= COPING_PERSONALIZATION_TTL:
+                self._count("stale_hits")
+                if personalize:
+                    self._schedule(key, personalize, emotional_state, therapeutic_approach, previously_tried)
+            return strategies
+
+        self._count("library_answers")
+        if personalize:
+            self._schedule(key, personalize, emotional_state, therapeutic_approach, previously_tried)
+        return library_strategies(emotional_state, therapeutic_approach, previously_tried)
+
+_library = None
+_library_pid = None
+_library_guard = threading.Lock()
+
+def get_coping_library():
+    """The worker process's shared library"""
+    global _library, _library_pid
+    with _library_guard:
+        if _library is None or _library_pid != os.getpid():
+            _library = CopingLibrary()
+            _library_pid = os.getpid()
+        return _library
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show library coping strategies")
+    parser.add_argument("state")
+    parser.add_argument("approach", nargs="?", default="Supportive")
+    parser.add_argument("--tried", action="append", default=[], help="A strategy already tried (repeatable)")
+    args = parser.parse_args(argv)
+
+    for strategy in library_strategies(args.state, args.approach, args.tried):
+        print(f"{strategy['name']}: {strategy['description']}\n    {strategy['implementation']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,19 @@
 import os
 import streamlit as st
-import requests
 import json
 import google.generativeai as genai
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 import re
 import random
-from datetime import datetime
+from datetime import datetime, timedelta
+from mood_store import record_mood_point, record_mood_points, get_mood_series, summarize_mood_series
+from agent_dag import AgentDAG
+from search_client import get_search_client, parse_videos, parse_organic, parse_news
+from search_cache import get_search_cache
+from recommendation_catalog import find_recommendations, merge_recommendations
+from coping_library import COPING_STRATEGIES, get_coping_library
+from model_router import RoutedModel, turn_budget
 
 # Load environment variables
 load_dotenv()
@@ -35,43 +41,19 @@ THERAPY_APPROACHES = {
     "Supportive": "Provides emotional support and encouragement without specific therapeutic techniques"
 }
 
-# Define coping strategies
-COPING_STRATEGIES = {
-    "stressed": [
-        "Deep breathing exercises (4-7-8 technique)",
-        "Progressive muscle relaxation",
-        "Short mindfulness meditation",
-        "Brief physical activity (stretch, walk)",
-        "Grounding techniques using 5 senses"
-    ],
-    "anxious": [
-        "Box breathing (4-4-4-4 pattern)",
-        "Body scan meditation",
-        "Reality testing thoughts",
-        "Creating a worry schedule",
-        "HALT check (Hungry, Angry, Lonely, Tired)"
-    ],
-    "sad": [
-        "Behavioral activation (small positive activities)",
-        "Gratitude practice (3 things)",
-        "Pleasant memory visualization",
-        "Light physical exercise",
-        "Connecting with supportive people"
-    ],
-    "angry": [
-        "Time-out technique",
-        "Physical outlet (exercise, pillow punching)",
-        "Thought challenging",
-        "Distraction techniques",
-        "STOP technique (Stop, Take a breath, Observe, Proceed)"
-    ],
-    "overwhelmed": [
-        "Task chunking and prioritization",
-        "Boundary setting practice",
-        "Sensory grounding (focusing on one sense)",
-        "Brief mindfulness break",
-        "Self-compassion practice"
-    ]
+# Context analysis used when the message can't be analyzed
+DEFAULT_CONTEXT_ANALYSIS = {
+    "emotional_state": "neutral",
+    "emotional_intensity": 2,
+    "therapeutic_approach": "Supportive",
+    "needs_followup": False,
+    "followup_question": "",
+    "suggest_coping_strategies": False,
+    "recommend_content": False,
+    "content_categories": [],
+    "detected_interests": [],
+    "potential_stressors": [],
+    "sensitivity_level": 2
 }
 
 # Define agent classes
@@ -79,7 +61,7 @@ class TherapyContextAgent:
     """Agent to understand user's emotional state and therapy needs"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = RoutedModel("context")
     
     def analyze_message(self, user_message: str, conversation_history: List[Dict[str, Any]], 
                         user_profile: Dict[str, Any]) -> Dict[str, Any]:
@@ -151,25 +133,13 @@ class TherapyContextAgent:
         except Exception as e:
             st.error(f"Error parsing context analysis: {e}")
             # Return default response if parsing fails
-            return {
-                "emotional_state": "neutral",
-                "emotional_intensity": 2,
-                "therapeutic_approach": "Supportive",
-                "needs_followup": False,
-                "followup_question": "",
-                "suggest_coping_strategies": False,
-                "recommend_content": False,
-                "content_categories": [],
-                "detected_interests": [],
-                "potential_stressors": [],
-                "sensitivity_level": 2
-            }
+            return dict(DEFAULT_CONTEXT_ANALYSIS)
 
 class TherapeuticQuestionAgent:
     """Agent to generate meaningful therapeutic follow-up questions"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = RoutedModel("question")
     
     def generate_question(self, 
                          user_message: str, 
@@ -241,21 +211,34 @@ class CopingStrategyAgent:
     """Agent to suggest appropriate coping strategies based on emotional state"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = RoutedModel("coping")
         self.coping_strategies = COPING_STRATEGIES
     
     def get_strategies(self, 
                       emotional_state: str, 
                       therapeutic_approach: str,
                       user_profile: Dict[str, Any]) -> List[Dict[str, str]]:
-        """Get personalized coping strategies based on emotional state and therapeutic approach"""
-        
-        # Get base strategies for the emotional state
-        base_strategies = self.coping_strategies.get(emotional_state, self.coping_strategies.get("stressed", []))
+        """Get personalized coping strategies based on emotional state and therapeutic approach.
+
+        Answers at once from the coping library; a personalized set is
+        generated in the background and used from the next time on.
+        """
         
         # Get user's previously tried strategies
         previously_tried = user_profile.get("tried_strategies", [])
         
+        return get_coping_library().get_strategies(
+            emotional_state, therapeutic_approach, previously_tried, self.personalize_strategies)
+    
+    def personalize_strategies(self,
+                               emotional_state: str,
+                               therapeutic_approach: str,
+                               previously_tried: List[str]) -> List[Dict[str, str]]:
+        """Ask Gemini for 3 personalized coping strategies; raises if the answer can't be parsed"""
+        
+        # Get base strategies for the emotional state
+        base_strategies = self.coping_strategies.get(emotional_state, self.coping_strategies.get("stressed", []))
+        
         prompt = f"""
         You are a professional mental health therapist suggesting personalized coping strategies.
         
@@ -284,153 +267,93 @@ class CopingStrategyAgent:
         Format as a list of JSON objects with "name", "description", and "implementation" keys.
         """
         
-        try:
-            response = self.model.generate_content(prompt)
-            
-            # Parse the response to get the strategies
-            strategies_text = response.text
-            # Extract JSON from the text (may be in a code block)
-            strategies_text = re.sub(r'```json', '', strategies_text)
-            strategies_text = re.sub(r'```', '', strategies_text)
-            strategies_text = strategies_text.strip()
-            
-            strategies = json.loads(strategies_text)
-            return strategies
-        except Exception as e:
-            st.error(f"Error generating coping strategies: {e}")
-            # Return default strategies if parsing fails
-            return [
-                {
-                    "name": "Deep Breathing",
-                    "description": "Slow, deep breathing to activate the parasympathetic nervous system and reduce stress.",
-                    "implementation": "Breathe in for 4 counts, hold for 2, exhale for 6. Repeat 5 times."
-                },
-                {
-                    "name": "Grounding Exercise",
-                    "description": "Connect with the present moment using your senses to reduce anxiety.",
-                    "implementation": "Name 5 things you can see, 4 you can touch, 3 you can hear, 2 you can smell, and 1 you can taste."
-                },
-                {
-                    "name": "Positive Reframing",
-                    "description": "Shift perspective on a challenging situation to find meaning or opportunity.",
-                    "implementation": "Write down one challenging situation and three potential positives or lessons from it."
-                }
-            ]
+        response = self.model.generate_content(prompt)
+        
+        # Parse the response to get the strategies
+        strategies_text = response.text
+        # Extract JSON from the text (may be in a code block)
+        strategies_text = re.sub(r'```json', '', strategies_text)
+        strategies_text = re.sub(r'```', '', strategies_text)
+        strategies_text = strategies_text.strip()
+        
+        return json.loads(strategies_text)
+
+# Seconds get_recommendations waits for its searches before answering with
+# the ones that have finished
+RECOMMENDATION_DEADLINE = 8
 
 class ContentRecommendationAgent:
     """Agent to recommend external content based on user needs"""
     
-    def __init__(self):
+    def __init__(self, live_search: Optional[bool] = None):
         self.serper_api_key = SERPER_API_KEY
+        # Recommendations come from the local catalog. Live search adds
+        # Serper results after the catalog's when RECOMMENDATION_LIVE_SEARCH=1
+        # (or live_search=True) and there is an API key.
+        if live_search is None:
+            live_search = os.getenv("RECOMMENDATION_LIVE_SEARCH", "").lower() in ("1", "true", "on")
+        self.live_search = bool(live_search and self.serper_api_key)
     
-    def search_youtube(self, query: str, num_results: int = 2) -> List[Dict[str, Any]]:
-        """Search for YouTube videos using Serper API"""
-        url = "https://google.serper.dev/videos"
-        
-        payload = json.dumps({
-            "q": query,
-            "num": num_results
-        })
-        
-        headers = {
-            'X-API-KEY': self.serper_api_key,
-            'Content-Type': 'application/json'
-        }
-        
+    def _with_live(self, items: List[Dict[str, Any]], live: Optional[bool], search) -> List[Dict[str, Any]]:
+        """Catalog items plus the results of search() when live search is on"""
+        if self.live_search if live is None else live:
+            return merge_recommendations(items, search())
+        return items
+    
+    def search_youtube(self, query: str, num_results: int = 2, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Search for YouTube videos using Serper API (cached for the category's TTL)"""
         try:
-            response = requests.post(url, headers=headers, data=payload)
-            response.raise_for_status()
-            results = response.json()
-            
-            video_results = []
-            if "videos" in results:
-                for video in results["videos"]:
-                    # Extract YouTube ID from link
-                    video_id = None
-                    link = video.get("link", "")
-                    if "youtube.com/watch?v=" in link:
-                        video_id = link.split("youtube.com/watch?v=")[1].split("&")[0]
-                    elif "youtu.be/" in link:
-                        video_id = link.split("youtu.be/")[1].split("?")[0]
-                        
-                    video_results.append({
-                        "title": video.get("title", ""),
-                        "link": link,
-                        "video_id": video_id,
-                        "source": "YouTube",
-                        "snippet": video.get("snippet", ""),
-                        "thumbnail": video.get("thumbnail", ""),
-                        "type": "video"
-                    })
-                    
-            return video_results
-            
+            results = get_search_cache().search("videos", query, num_results, category, api_key=self.serper_api_key)
+            return [{**video, "source": "YouTube", "type": "video"} for video in parse_videos(results)]
         except Exception as e:
             st.error(f"Error in YouTube search: {e}")
             return []
     
-    def search_web(self, query: str, num_results: int = 3) -> List[Dict[str, Any]]:
-        """Search for web content using Serper API"""
-        url = "https://google.serper.dev/search"
-        
-        payload = json.dumps({
-            "q": query,
-            "num": num_results
-        })
-        
-        headers = {
-            'X-API-KEY': self.serper_api_key,
-            'Content-Type': 'application/json'
-        }
-        
+    def search_web(self, query: str, num_results: int = 3, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Search for web content using Serper API (cached for the category's TTL)"""
         try:
-            response = requests.post(url, headers=headers, data=payload)
-            response.raise_for_status()
-            results = response.json()
-            
-            web_results = []
-            if "organic" in results:
-                for result in results["organic"]:
-                    web_results.append({
-                        "title": result.get("title", ""),
-                        "link": result.get("link", ""),
-                        "snippet": result.get("snippet", ""),
-                        "source": result.get("source", ""),
-                        "type": "web"
-                    })
-                    
-            return web_results
-            
+            results = get_search_cache().search("search", query, num_results, category, api_key=self.serper_api_key)
+            return [{**result, "type": "web"} for result in parse_organic(results)]
         except Exception as e:
             st.error(f"Error in web search: {e}")
             return []
     
-    def get_meditation_resources(self, duration: str = "short", style: str = "guided") -> List[Dict[str, Any]]:
+    def get_meditation_resources(self, duration: str = "short", style: str = "guided",
+                                 emotional_state: Optional[str] = None, live: Optional[bool] = None) -> List[Dict[str, Any]]:
         """Get meditation resources based on duration and style"""
+        items = find_recommendations("meditation", emotional_state, stressors=[duration, style])
         search_query = f"{duration} {style} meditation"
-        return self.search_youtube(search_query, 2)
+        return self._with_live(items, live, lambda: self.search_youtube(search_query, 2, "meditation"))
     
-    def get_therapy_resources(self, approach: str, issue: str = None) -> List[Dict[str, Any]]:
+    def get_therapy_resources(self, approach: str, issue: str = None,
+                              emotional_state: Optional[str] = None, live: Optional[bool] = None) -> List[Dict[str, Any]]:
         """Get therapy resources based on approach and issue"""
+        items = find_recommendations("therapy_resources", emotional_state, approach, [issue] if issue else [])
         search_query = f"{approach} therapy techniques"
         if issue:
             search_query += f" for {issue}"
-        return self.search_youtube(search_query, 2)
+        return self._with_live(items, live, lambda: self.search_youtube(search_query, 2, "therapy_resources"))
     
-    def get_mental_health_articles(self, topic: str) -> List[Dict[str, Any]]:
+    def get_mental_health_articles(self, topic: str, emotional_state: Optional[str] = None,
+                                   live: Optional[bool] = None) -> List[Dict[str, Any]]:
         """Get mental health articles from reputable sources"""
+        items = find_recommendations("mental_health_articles", emotional_state or topic, stressors=[topic], limit=3)
         search_query = f"{topic} mental health articles"
-        return self.search_web(search_query, 3)
+        return self._with_live(items, live, lambda: self.search_web(search_query, 3, "mental_health_articles"))
     
-    def get_podcast_recommendations(self, topic: str) -> List[Dict[str, Any]]:
+    def get_podcast_recommendations(self, topic: str, emotional_state: Optional[str] = None,
+                                    live: Optional[bool] = None) -> List[Dict[str, Any]]:
         """Get podcast recommendations based on topic"""
+        items = find_recommendations("podcasts", emotional_state or topic, stressors=[topic], limit=3)
         search_query = f"best podcasts for {topic} mental health"
-        return self.search_web(search_query, 3)
+        return self._with_live(items, live, lambda: self.search_web(search_query, 3, "podcasts"))
     
-    def get_relaxation_music(self) -> List[Dict[str, Any]]:
+    def get_relaxation_music(self, emotional_state: Optional[str] = None, stressors: List[str] = (),
+                             live: Optional[bool] = None) -> List[Dict[str, Any]]:
         """Get relaxation music recommendations"""
+        items = find_recommendations("relaxation_music", emotional_state, stressors=stressors)
         search_query = "relaxation music for anxiety stress relief"
-        return self.search_youtube(search_query, 2)
+        return self._with_live(items, live, lambda: self.search_youtube(search_query, 2, "relaxation_music"))
     
     def get_recommendations(self, 
                           context_analysis: Dict[str, Any], 
@@ -458,31 +381,47 @@ class ContentRecommendationAgent:
         if sensitivity >= 4:
             content_categories = ["therapy_resources", "meditation"] + content_categories
         
-        # Add therapy resources if appropriate
+        # Decide the categories first, so searches that would be trimmed
+        # never run
         stressors = context_analysis.get("potential_stressors", [])
+        plan = []
+        
+        # Add therapy resources if appropriate
         if therapeutic_approach in ["CBT", "DBT", "ACT"] and stressors:
-            recommendations["therapy_resources"] = self.get_therapy_resources(
-                therapeutic_approach, 
-                stressors[0] if stressors else None
-            )
+            plan.append(("therapy_resources", lambda live: self.get_therapy_resources(
+                therapeutic_approach, stressors[0], emotional_state, live)))
         
         # Add meditation resources for high emotional intensity
         if emotional_intensity >= 3 or "meditation" in content_categories:
-            recommendations["meditation"] = self.get_meditation_resources()
+            plan.append(("meditation", lambda live: self.get_meditation_resources(
+                emotional_state=emotional_state, live=live)))
         
         # Add mental health articles if appropriate
         if "learning" in content_categories or "education" in content_categories:
             topic = stressors[0] if stressors else emotional_state
-            recommendations["mental_health_articles"] = self.get_mental_health_articles(topic)
+            plan.append(("mental_health_articles", lambda live: self.get_mental_health_articles(
+                topic, emotional_state, live)))
         
         # Add relaxation music for stressed or anxious states
         if emotional_state in ["stressed", "anxious"] or "relaxation" in content_categories:
-            recommendations["relaxation_music"] = self.get_relaxation_music()
+            plan.append(("relaxation_music", lambda live: self.get_relaxation_music(
+                emotional_state, stressors, live)))
         
         # Limit the maximum number of categories
-        if len(recommendations) > max_categories:
-            # Keep only the first max_categories items
-            recommendations = dict(list(recommendations.items())[:max_categories])
+        plan = plan[:max(max_categories, 0)]
+        
+        # Answer from the catalog, then enrich with live searches run at the
+        # same time, keeping whatever has finished by the deadline
+        for category, get in plan:
+            recommendations[category] = get(False)
+        if self.live_search and plan:
+            dag = AgentDAG(pool="recommendations")
+            for category, get in plan:
+                dag.add(category, lambda get=get: get(True))
+            results, _ = dag.run(deadline=RECOMMENDATION_DEADLINE)
+            for category, _ in plan:
+                if results.get(category) is not None:
+                    recommendations[category] = results[category]
         
         return recommendations
 
@@ -490,7 +429,7 @@ class TherapeuticResponseAgent:
     """Agent to craft therapeutic responses"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = RoutedModel("response")
     
     def craft_response(self, 
                       user_message: str,
@@ -618,65 +557,70 @@ class MoodTrackerAgent:
     def __init__(self):
         pass
     
-    def record_mood(self, user_profile: Dict[str, Any], emotional_state: str, emotional_intensity: int) -> Dict[str, Any]:
-        """Record the user's current mood in their profile"""
+    def record_mood(self, user_profile: Dict[str, Any], emotional_state: str, emotional_intensity: int,
+                    username: Optional[str] = None) -> Dict[str, Any]:
+        """Record the user's current mood in the mood time-series store.
+
+        Moods are stored per user, so nothing is recorded without a username.
+        Moods left in the profile by older versions are moved over by
+        migrate_profile_moods, which run_therapy_turn calls first.
+        """
         
-        # Initialize mood tracking if not present
-        if "mood_tracker" not in user_profile:
-            user_profile["mood_tracker"] = []
+        username = username or user_profile.get("username")
+        if not username:
+            return user_profile
         
-        # Add the current mood
-        user_profile["mood_tracker"].append({
-            "timestamp": datetime.now().isoformat(),
-            "emotional_state": emotional_state,
-            "intensity": emotional_intensity
-        })
+        # The store rolls older points up into daily/weekly buckets, so the
+        # full history is kept without growing the profile
+        record_mood_point(username, "chat", emotional_state, emotional_intensity)
+        
+        return user_profile
+    
+    def migrate_profile_moods(self, user_profile: Dict[str, Any], username: Optional[str] = None) -> Dict[str, Any]:
+        """Move any moods kept in the profile by older versions into the store"""
         
-        # Keep only the last 30 entries to avoid profile bloat
-        user_profile["mood_tracker"] = user_profile["mood_tracker"][-30:]
+        username = username or user_profile.get("username")
+        if username and user_profile.get("mood_tracker"):
+            record_mood_points(username, [
+                {"source": "chat", "label": m["emotional_state"], "value": m["intensity"], "timestamp": m["timestamp"]}
+                for m in user_profile.pop("mood_tracker")
+            ])
         
         return user_profile
     
-    def get_mood_summary(self, user_profile: Dict[str, Any]) -> Dict[str, Any]:
-        """Get a summary of recent mood trends"""
+    def get_mood_summary(self, user_profile: Dict[str, Any], username: Optional[str] = None,
+                         days: int = 30) -> Dict[str, Any]:
+        """Get a summary of recent mood trends (mood_data timestamps are ISO strings)"""
+        
+        username = username or user_profile.get("username")
+        mood_data = get_mood_series(username, source="chat", start=datetime.now() - timedelta(days=days)) if username else []
         
-        if "mood_tracker" not in user_profile or not user_profile["mood_tracker"]:
+        if not mood_data:
             return {
                 "has_data": False,
                 "message": "Not enough mood data collected yet. Continue talking with MindfulCompanion to track your mood over time."
             }
         
-        mood_data = user_profile["mood_tracker"]
-        
-        # Count occurrences of each emotional state
-        emotions = {}
-        for entry in mood_data:
-            state = entry["emotional_state"]
-            if state in emotions:
-                emotions[state] += 1
-            else:
-                emotions[state] = 1
-        
-        # Calculate average intensity
-        avg_intensity = sum(entry["intensity"] for entry in mood_data) / len(mood_data)
+        summary = summarize_mood_series(mood_data)
         
         # Find most common emotion
-        most_common = max(emotions.items(), key=lambda x: x[1])
+        emotions = summary["labels"]
+        most_common = max(emotions.items(), key=lambda x: x[1]) if emotions else ("neutral", 0)
         
         return {
             "has_data": True,
             "emotions": emotions,
             "most_common_emotion": most_common[0],
-            "average_intensity": round(avg_intensity, 1),
-            "num_entries": len(mood_data),
-            "mood_data": mood_data
+            "average_intensity": round(summary["average"], 1),
+            "num_entries": summary["count"],
+            "mood_data": [dict(item, timestamp=item["timestamp"].isoformat()) for item in mood_data]
         }
 
 class JournalAgent:
     """Agent to manage therapeutic journaling"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = RoutedModel("journal")
     
     def generate_prompt(self, context_analysis: Dict[str, Any]) -> str:
         """Generate an appropriate journaling prompt based on context"""
@@ -724,11 +668,98 @@ class JournalAgent:
         
         return user_profile
 
+# Seconds a turn's model calls should fit in; calls that would run over go to
+# a faster model tier
+TURN_LATENCY_BUDGET = 15
+
+# Seconds each step of a turn may take before its fallback is used
+TURN_DEADLINES = {
+    "context": 10,
+    "question": 8,
+    "strategies": 10,
+    "recommendations": 12,
+    "mood": 5,
+    "response": 20
+}
+
+def run_therapy_turn(user_message: str,
+                     conversation_history: List[Dict[str, Any]],
+                     user_profile: Dict[str, Any],
+                     agents: Dict[str, Any],
+                     username: Optional[str] = None) -> Dict[str, Any]:
+    """Answer one user message with the therapy agents.
+
+    agents maps "context", "question", "coping", "content", "response" and
+    "mood" to the agent objects. The follow-up question, coping strategies,
+    content recommendations and mood recording only need the context
+    analysis, so they run at the same time once it is done, and the response
+    is crafted when all of them have finished (or run out of time). The
+    response dict gets the turn's timings under "turn_report".
+
+    Moods kept in the profile by older versions are moved to the mood store
+    before any agent runs, since the context and coping agents read the
+    profile while the mood node writes to the store. This function is
+    library-only: the main app's chat page goes through chat_agent.py.
+    """
+    agents["mood"].migrate_profile_moods(user_profile, username)
+
+    dag = AgentDAG()
+    dag.add("context",
+            lambda: agents["context"].analyze_message(user_message, conversation_history, user_profile),
+            deadline=TURN_DEADLINES["context"],
+            default=lambda: dict(DEFAULT_CONTEXT_ANALYSIS))
+    dag.add("question",
+            lambda context: agents["question"].generate_question(
+                user_message, conversation_history, context, context.get("therapeutic_approach", "Supportive")),
+            inputs=["context"],
+            when=lambda context: context.get("needs_followup"),
+            deadline=TURN_DEADLINES["question"],
+            # The analysis already suggests a question to fall back on
+            default=lambda context: context.get("followup_question") or None)
+    dag.add("strategies",
+            lambda context: agents["coping"].get_strategies(
+                context.get("emotional_state", "neutral"), context.get("therapeutic_approach", "Supportive"), user_profile),
+            inputs=["context"],
+            when=lambda context: context.get("suggest_coping_strategies"),
+            deadline=TURN_DEADLINES["strategies"])
+    dag.add("recommendations",
+            lambda context: agents["content"].get_recommendations(
+                context, user_profile.get("interests", []),
+                context.get("emotional_state", "neutral"), context.get("therapeutic_approach", "Supportive")),
+            inputs=["context"],
+            when=lambda context: context.get("recommend_content"),
+            deadline=TURN_DEADLINES["recommendations"])
+    dag.add("mood",
+            lambda context: agents["mood"].record_mood(
+                user_profile, context.get("emotional_state", "neutral"), context.get("emotional_intensity", 2), username),
+            inputs=["context"],
+            deadline=TURN_DEADLINES["mood"])
+    dag.add("response",
+            lambda context, question, strategies, recommendations: agents["response"].craft_response(
+                user_message, conversation_history, context, strategies, recommendations, question),
+            inputs=["context", "question", "strategies", "recommendations"],
+            deadline=TURN_DEADLINES["response"],
+            default=lambda context, question, strategies, recommendations: {
+                "text": "I'm here to support you through this. Would you like to tell me more about what you're experiencing?",
+                "has_followup": False,
+                "followup_question": None,
+                "has_coping_strategies": False,
+                "coping_strategies": [],
+                "has_recommendations": False,
+                "recommendations": {},
+                "context_analysis": context
+            })
+
+    with turn_budget(TURN_LATENCY_BUDGET):
+        results, report = dag.run()
+    response = results["response"]
+    response["turn_report"] = report
+    return response
+
 class UserProfileManager:
     """Manages persistent user profile information"""
 import os
 import streamlit as st
-import requests
 import json
 import google.generativeai as genai
 from typing import List, Dict, Any, Optional
@@ -757,7 +788,7 @@ class ContextCheckAgent:
     """Agent to determine if external search is needed based on user query"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = RoutedModel("search_check")
     
     def check_search_needed(self, user_query: str) -> Dict[str, Any]:
         """Determine if the query requires external search and what type"""
@@ -807,48 +838,10 @@ class SerperSearchAgent:
         
     def search(self, query: str, num_results: int = 5) -> List[Dict[str, Any]]:
         """Search for web results using Serper API"""
-        url = "https://google.serper.dev/search"
-        
-        payload = json.dumps({
-            "q": query,
-            "num": num_results
-        })
-        
-        headers = {
-            'X-API-KEY': self.api_key,
-            'Content-Type': 'application/json'
-        }
-        
         try:
-            response = requests.post(url, headers=headers, data=payload)
-            response.raise_for_status()
-            results = response.json()
-            
-            # Extract organic search results
-            organic_results = []
-            if "organic" in results:
-                for result in results["organic"]:
-                    organic_results.append({
-                        "title": result.get("title", ""),
-                        "link": result.get("link", ""),
-                        "snippet": result.get("snippet", ""),
-                        "source": result.get("source", "")
-                    })
-                    
-            # Extract news results if available
-            news_results = []
-            if "news" in results:
-                for result in results["news"]:
-                    news_results.append({
-                        "title": result.get("title", ""),
-                        "link": result.get("link", ""),
-                        "snippet": result.get("snippet", ""),
-                        "source": result.get("source", ""),
-                        "date": result.get("date", "")
-                    })
-            
+            results = get_search_client().search("search", query, num_results, api_key=self.api_key)
             # Combine and return results, prioritizing news if available
-            combined_results = news_results + organic_results
+            combined_results = parse_news(results) + parse_organic(results)
             return combined_results[:num_results]
             
         except Exception as e:
@@ -863,44 +856,9 @@ class YouTubeSearchAgent:
         
     def search(self, query: str, num_results: int = 3) -> List[Dict[str, Any]]:
         """Search for YouTube videos using Serper API"""
-        url = "https://google.serper.dev/videos"
-        
-        payload = json.dumps({
-            "q": query,
-            "num": num_results
-        })
-        
-        headers = {
-            'X-API-KEY': self.api_key,
-            'Content-Type': 'application/json'
-        }
-        
         try:
-            response = requests.post(url, headers=headers, data=payload)
-            response.raise_for_status()
-            results = response.json()
-            
-            video_results = []
-            if "videos" in results:
-                for video in results["videos"]:
-                    # Extract YouTube ID from link
-                    video_id = None
-                    link = video.get("link", "")
-                    if "youtube.com/watch?v=" in link:
-                        video_id = link.split("youtube.com/watch?v=")[1].split("&")[0]
-                    elif "youtu.be/" in link:
-                        video_id = link.split("youtu.be/")[1].split("?")[0]
-                        
-                    video_results.append({
-                        "title": video.get("title", ""),
-                        "link": link,
-                        "video_id": video_id,
-                        "source": video.get("source", "YouTube"),
-                        "snippet": video.get("snippet", ""),
-                        "thumbnail": video.get("thumbnail", "")
-                    })
-                    
-            return video_results
+            results = get_search_client().search("videos", query, num_results, api_key=self.api_key)
+            return parse_videos(results)
             
         except Exception as e:
             st.error(f"Error in YouTube search: {e}")
@@ -910,7 +868,7 @@ class ResponseGenerationAgent:
     """Agent to compile and format final responses"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = RoutedModel("search_response")
     
     def generate_response(self, 
                          user_query: str, 
@@ -962,6 +920,57 @@ class ResponseGenerationAgent:
             st.error(f"Error generating response: {e}")
             return "I apologize, but I encountered an error while generating your response. Please try again with a more specific query."
 
+# Seconds each step of a search turn may take before its fallback is used
+SEARCH_TURN_DEADLINES = {
+    "check": 10,
+    "news": 15,
+    "videos": 15,
+    "response": 30
+}
+
+def run_search_turn(user_query: str,
+                    context_agent: ContextCheckAgent,
+                    serper_agent: SerperSearchAgent,
+                    youtube_agent: YouTubeSearchAgent,
+                    response_agent: ResponseGenerationAgent) -> Dict[str, Any]:
+    """Answer one query: the search check, then the news and video searches
+    at the same time, then the response.
+
+    Returns a dict with the response text, the video results and the turn's
+    timings under "turn_report".
+    """
+    dag = AgentDAG()
+    dag.add("check",
+            lambda: context_agent.check_search_needed(user_query),
+            deadline=SEARCH_TURN_DEADLINES["check"],
+            default=lambda: {
+                "needs_search": False,
+                "needs_news": False,
+                "needs_videos": False,
+                "search_query": user_query,
+                "reason": "Query analysis timed out"
+            })
+    dag.add("news",
+            lambda check: serper_agent.search(check.get("search_query") or user_query),
+            inputs=["check"],
+            when=lambda check: check.get("needs_search") and check.get("needs_news"),
+            deadline=SEARCH_TURN_DEADLINES["news"],
+            default=lambda check: [])
+    dag.add("videos",
+            lambda check: youtube_agent.search(check.get("search_query") or user_query),
+            inputs=["check"],
+            when=lambda check: check.get("needs_search") and check.get("needs_videos"),
+            deadline=SEARCH_TURN_DEADLINES["videos"],
+            default=lambda check: [])
+    dag.add("response",
+            lambda check, news, videos: response_agent.generate_response(user_query, news, videos, check),
+            inputs=["check", "news", "videos"],
+            deadline=SEARCH_TURN_DEADLINES["response"],
+            default="I apologize, but I encountered an error while generating your response. Please try again with a more specific query.")
+    
+    results, report = dag.run()
+    return {"text": results["response"], "videos": results["videos"], "turn_report": report}
+
 # Initialize session state
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
@@ -1012,49 +1021,24 @@ if user_query:
     
     # Create a placeholder for the assistant's response
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            # 1. Context check
-            context_analysis = context_agent.check_search_needed(user_query)
-            
-            web_results = []
-            video_results = []
+        with st.spinner("Thinking..."), turn_budget(TURN_LATENCY_BUDGET):
+            turn = run_search_turn(user_query, context_agent, serper_agent, youtube_agent, response_agent)
+            response_text = turn["text"]
+            video_results = turn["videos"]
             
-            # 2. Perform searches if needed
-            if context_analysis["needs_search"]:
-                search_query = context_analysis["search_query"]
-                
-                # Search for web content if needed
-                if context_analysis["needs_news"]:
-                    with st.spinner("Searching articles and news..."):
-                        web_results = serper_agent.search(search_query)
-                
-                # Search for videos if needed
-                if context_analysis["needs_videos"]:
-                    with st.spinner("Searching videos..."):
-                        video_results = youtube_agent.search(search_query)
+            # Display the response
+            st.markdown(response_text)
             
-            # 3. Generate final response
-            with st.spinner("Generating response..."):
-                response_text = response_agent.generate_response(
-                    user_query, 
-                    web_results, 
-                    video_results,
-                    context_analysis
-                )
-                
-                # Display the response
-                st.markdown(response_text)
-                
-                # Display videos in a horizontal layout if available
-                if video_results:
-                    st.markdown("### Related Videos")
-                    cols = st.columns(min(3, len(video_results)))
-                    for i, video in enumerate(video_results):
-                        with cols[i % 3]:
-                            if video["video_id"]:
-                                st.video(f"https://www.youtube.com/watch?v={video['video_id']}")
-                            st.markdown(f"**{video['title']}**")
-                            st.markdown(f"[Watch on YouTube]({video['link']})")
+            # Display videos in a horizontal layout if available
+            if video_results:
+                st.markdown("### Related Videos")
+                cols = st.columns(min(3, len(video_results)))
+                for i, video in enumerate(video_results):
+                    with cols[i % 3]:
+                        if video["video_id"]:
+                            st.video(f"https://www.youtube.com/watch?v={video['video_id']}")
+                        st.markdown(f"**{video['title']}**")
+                        st.markdown(f"[Watch on YouTube]({video['link']})")
             
             # Add assistant response to chat history
             st.session_state.chat_history.append({
@@ -1,24 +1,161 @@
 import streamlit as st
 import os
-import json
+import shutil
 from datetime import datetime
 from utils import get_user_data_path
+from storage import locked, write_json, read_json
+from journal_search import index_entries_async, remove_entries_async, ensure_indexed, find_related, entry_id, timestamp_of
+from mood_aggregate import update_daily_aggregate, reset_daily_aggregate
+
+MOOD_OPTIONS = ["Very Low", "Low", "Neutral", "Good", "Excellent"]
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+
+def _get_legacy_journal_path(username):
+    return get_user_data_path(f"journals/{username}_journal.json")
+
+def _get_journal_dir(username):
+    return get_user_data_path(f"journals/{username}")
+
+def _get_partition_path(username, month):
+    return os.path.join(_get_journal_dir(username), f"{month}.json")
+
+def _get_manifest_path(username):
+    return os.path.join(_get_journal_dir(username), "manifest.json")
+
+def _get_index_path(username):
+    return os.path.join(_get_journal_dir(username), "index.json")
+
+def _month_of(timestamp):
+    """Partition key (YYYY-MM) for an entry timestamp"""
+    return timestamp[:7]
+
+def _write_json(path, data, indent=None):
+    write_json(path, data, indent=indent)
+
+def _journal_lock(username):
+    """Lock held while a user's partitions, manifest and index are rewritten"""
+    return locked(f"journal-{username}")
+
+def get_journal_manifest(username):
+    """Get the partition manifest ({"partitions": {"YYYY-MM": {"count", "updated", "revision"}}}) for a user"""
+    _ensure_partitioned(username)
+    return read_json(_get_manifest_path(username), {"partitions": {}})
+
+def _load_partition(username, month):
+    return read_json(_get_partition_path(username, month), [])
+
+def _write_partitions(username, partitions):
+    """Write changed month partitions ({month: entries}) and update the manifest"""
+    os.makedirs(_get_journal_dir(username), exist_ok=True)
+    manifest = read_json(_get_manifest_path(username), {"partitions": {}})
+    updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    for month, entries in partitions.items():
+        partition_path = _get_partition_path(username, month)
+        if entries:
+            _write_json(partition_path, entries, indent=2)
+            # revision counts writes, so backups see every change even when
+            # two land within the same second of "updated"
+            revision = manifest["partitions"].get(month, {}).get("revision", 0) + 1
+            manifest["partitions"][month] = {"count": len(entries), "updated": updated, "revision": revision}
+        else:
+            if os.path.exists(partition_path):
+                os.remove(partition_path)
+            manifest["partitions"].pop(month, None)
+
+    _write_json(_get_manifest_path(username), manifest, indent=2)
+
+def repartition_journal(username):
+    """Split a legacy {username}_journal.json into month partitions.
+
+    The legacy file is kept as {username}_journal.json.bak. Returns the
+    number of entries moved.
+    """
+    with _journal_lock(username):
+        return _repartition_journal(username)
+
+def _repartition_journal(username):
+    legacy_path = _get_legacy_journal_path(username)
+    entries = read_json(legacy_path, [])
+
+    partitions = {}
+    for entry in entries:
+        partitions.setdefault(_month_of(entry["timestamp"]), []).append(entry)
+
+    # Merge with anything already partitioned
+    for month in partitions:
+        existing = _load_partition(username, month)
+        known = {(e["timestamp"], e["entry"]) for e in existing}
+        partitions[month] = existing + [e for e in partitions[month] if (e["timestamp"], e["entry"]) not in known]
+
+    _write_partitions(username, partitions)
+    if os.path.exists(legacy_path):
+        os.replace(legacy_path, legacy_path + ".bak")
+    _write_json(_get_index_path(username), _build_index(_load_all_entries(username)))
+    reset_daily_aggregate(username)
+    return len(entries)
+
+def _ensure_partitioned(username):
+    """Migrate a legacy monolithic journal on first access"""
+    if os.path.exists(_get_legacy_journal_path(username)):
+        with _journal_lock(username):
+            # Another worker may have migrated it while we waited for the lock
+            if os.path.exists(_get_legacy_journal_path(username)):
+                _repartition_journal(username)
+
+def _months_in_range(manifest, start_date=None, end_date=None):
+    months = sorted(manifest["partitions"])
+    if start_date:
+        months = [m for m in months if m >= start_date[:7]]
+    if end_date:
+        months = [m for m in months if m <= end_date[:7]]
+    return months
+
+def _load_all_entries(username, start_date=None, end_date=None):
+    """Load the raw entries from the partitions overlapping an optional date range"""
+    manifest = get_journal_manifest(username)
+    entries = []
+    for month in _months_in_range(manifest, start_date, end_date):
+        entries.extend(_load_partition(username, month))
+    return entries
+
+def _build_index(entries):
+    """Build the lightweight metadata index (newest first) used for filtering and counts"""
+    index = [
+        {
+            "timestamp": entry["timestamp"],
+            "date": entry.get("date", entry["timestamp"][:10]),
+            "mood": entry.get("mood"),
+            "tags": entry.get("tags") or []
+        }
+        for entry in entries
+    ]
+    index.sort(key=lambda x: x["timestamp"], reverse=True)
+    return index
+
+def _update_index(username, added=None, removed=None):
+    """Apply added entries and removed (timestamp, ...) items to the stored index"""
+    # Read the stored index directly: a write has just touched the manifest,
+    # so the staleness check in get_journal_index would force a full rebuild
+    index = read_json(_get_index_path(username), None)
+    if index is None:
+        # The partitions already hold this change
+        _write_json(_get_index_path(username), _build_index(_load_all_entries(username)))
+        return
+    for item in removed or []:
+        if item in index:
+            index.remove(item)
+    index = _build_index(added or []) + index
+    index.sort(key=lambda x: x["timestamp"], reverse=True)
+    _write_json(_get_index_path(username), index)
 
 def save_journal_entry(username, entry, mood=None, tags=None):
-    """Save a journal entry to a JSON file"""
+    """Save a journal entry to the current month's partition"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     date = datetime.now().strftime("%Y-%m-%d")
-    journal_path = get_user_data_path(f"journals/{username}_journal.json")
-    
-    # Load existing entries if file exists
-    if os.path.exists(journal_path):
-        with open(journal_path, 'r') as f:
-            try:
-                entries = json.load(f)
-            except:
-                entries = []
-    else:
-        entries = []
+    month = _month_of(timestamp)
+
+    _ensure_partitioned(username)
     
     # Add new entry
     entry_data = {
@@ -29,47 +166,280 @@ def save_journal_entry(username, entry, mood=None, tags=None):
         "tags": tags or []
     }
     
-    entries.append(entry_data)
+    with _journal_lock(username):
+        # Load only this month's entries
+        entries = _load_partition(username, month)
+        entries.append(entry_data)
+        
+        # Save updated partition, manifest and index
+        _write_partitions(username, {month: entries})
+        _update_index(username, added=[entry_data])
+        update_daily_aggregate(username, added=[entry_data])
     
-    # Save updated entries
-    with open(journal_path, 'w') as f:
-        json.dump(entries, f, indent=2)
+    # Embed for related-entry search off the request path
+    index_entries_async(username, [entry_data])
     
     return timestamp
 
-def get_journal_entries(username):
-    """Retrieve journal entries for a user"""
-    journal_path = get_user_data_path(f"journals/{username}_journal.json")
-    
-    if not os.path.exists(journal_path):
+def save_journal_entries(username, new_entries, progress=None):
+    """Save many entries in one batch: each touched month partition, the
+    manifest and the index are written once.
+
+    Entries whose (timestamp, text) already exist are skipped. progress, if
+    given, is called as progress(partitions_done, partitions_total).
+    Returns the list of entries actually added.
+    """
+    _ensure_partitioned(username)
+
+    by_month = {}
+    for entry in new_entries:
+        by_month.setdefault(_month_of(entry["timestamp"]), []).append(entry)
+
+    with _journal_lock(username):
+        return _save_journal_entries(username, by_month, progress)
+
+def _save_journal_entries(username, by_month, progress):
+    added = []
+    partitions = {}
+    for done, month in enumerate(sorted(by_month), start=1):
+        entries = _load_partition(username, month)
+        known = {(e["timestamp"], e["entry"]) for e in entries}
+        month_added = 0
+        for entry in by_month[month]:
+            key = (entry["timestamp"], entry["entry"])
+            if key not in known:
+                known.add(key)
+                entries.append(entry)
+                month_added += 1
+        if month_added:
+            partitions[month] = entries
+            added.extend(entries[-month_added:])
+        if progress:
+            progress(done, len(by_month))
+
+    if added:
+        _write_partitions(username, partitions)
+        _update_index(username, added=added)
+        update_daily_aggregate(username, added=added)
+        index_entries_async(username, added)
+
+    return added
+
+def get_journal_entries(username, start_date=None, end_date=None):
+    """Retrieve journal entries for a user, optionally limited to an inclusive YYYY-MM-DD range"""
+    entries = _load_all_entries(username, start_date, end_date)
+    if start_date or end_date:
+        entries = [
+            e for e in entries
+            if (not start_date or e.get("date", "") >= start_date) and (not end_date or e.get("date", "") <= end_date)
+        ]
+    # Sort by timestamp (newest first)
+    entries.sort(key=lambda x: x["timestamp"], reverse=True)
+    return entries
+
+def get_journal_index(username):
+    """Get the metadata index for a user's journal, rebuilding it if missing or stale"""
+    _ensure_partitioned(username)
+    manifest_path = _get_manifest_path(username)
+    index_path = _get_index_path(username)
+
+    if not os.path.exists(manifest_path):
         return []
-    
-    with open(journal_path, 'r') as f:
-        try:
-            entries = json.load(f)
-            # Sort by timestamp (newest first)
-            entries.sort(key=lambda x: x["timestamp"], reverse=True)
-            return entries
-        except:
-            return []
+
+    def stored_index():
+        if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(manifest_path):
+            return read_json(index_path, None)
+        return None
+
+    index = stored_index()
+    if index is not None:
+        return index
+
+    # Rebuild under the journal lock so a save can't land between reading
+    # the partitions and writing the index (the save's own index update
+    # would then be overwritten)
+    with _journal_lock(username):
+        index = stored_index()
+        if index is None:
+            index = _build_index(_load_all_entries(username))
+            _write_json(index_path, index)
+    return index
+
+def _index_matches(item, moods=None, tags=None, start_date=None, end_date=None):
+    if moods and item["mood"] not in moods:
+        return False
+    if tags and not any(tag in item["tags"] for tag in tags):
+        return False
+    if start_date and item["date"] < start_date:
+        return False
+    if end_date and item["date"] > end_date:
+        return False
+    return True
+
+def filter_journal_index(index, moods=None, tags=None, start_date=None, end_date=None):
+    """Filter index items by mood, tags and an inclusive YYYY-MM-DD date range"""
+    if not (moods or tags or start_date or end_date):
+        return index
+    return [item for item in index if _index_matches(item, moods, tags, start_date, end_date)]
+
+def get_journal_page(username, page=1, page_size=25, moods=None, tags=None, start_date=None, end_date=None):
+    """Get one page of journal entries (newest first) matching the filters.
+
+    Filtering and counting happen on the index; only the partitions holding
+    the requested page's entries are read.
+
+    Returns (entries, matching_count, total_count).
+    """
+    index = get_journal_index(username)
+    matches = filter_journal_index(index, moods, tags, start_date, end_date)
+
+    start = max(page - 1, 0) * page_size
+    wanted = [item["timestamp"] for item in matches[start:start + page_size]]
+    if not wanted:
+        return [], len(matches), len(index)
+
+    return get_entries_by_timestamps(username, wanted), len(matches), len(index)
+
+def get_entries_by_timestamps(username, timestamps):
+    """Fetch entries for the given timestamps, in the order given"""
+    by_timestamp = {}
+    for month in sorted({_month_of(t) for t in timestamps}):
+        for entry in _load_partition(username, month):
+            by_timestamp.setdefault(entry["timestamp"], []).append(entry)
+
+    found = []
+    for timestamp in timestamps:
+        if by_timestamp.get(timestamp):
+            found.append(by_timestamp[timestamp].pop(0))
+    return found
+
+def get_entries_by_ids(username, vector_ids):
+    """Fetch entries for the given related-search ids (see journal_search.entry_id), in the order given"""
+    by_id = {}
+    for month in sorted({_month_of(timestamp_of(i)) for i in vector_ids}):
+        for entry in _load_partition(username, month):
+            by_id.setdefault(entry_id(entry), entry)
+    return [by_id[i] for i in vector_ids if i in by_id]
+
+def find_page_for_date(index, target_date, page_size):
+    """Get the 1-based page that holds the newest entry on or before target_date"""
+    for position, item in enumerate(index):
+        if item["date"] <= target_date:
+            return position // page_size + 1
+    return max((len(index) - 1) // page_size + 1, 1)
 
 def delete_journal_entry(username, index):
-    """Delete a journal entry by index"""
-    journal_path = get_user_data_path(f"journals/{username}_journal.json")
-    
-    # Load entries
-    entries = get_journal_entries(username)
-    if index < len(entries):
-        # Remove the entry
-        entries.pop(index)
-        
-        # Save updated entries
-        with open(journal_path, 'w') as f:
-            json.dump(entries, f, indent=2)
-        
-        return True
+    """Delete a journal entry by its position in the newest-first list"""
+    items = get_journal_index(username)
+    if index < len(items):
+        return delete_journal_entry_by_timestamp(username, items[index]["timestamp"])
+    return False
+
+def delete_journal_entry_by_timestamp(username, timestamp, entry_text=None):
+    """Delete the first journal entry with the given timestamp (and text, if given)"""
+    return _delete_entry(
+        username, _month_of(timestamp),
+        lambda e: e["timestamp"] == timestamp and (entry_text is None or e["entry"] == entry_text)
+    )
+
+def delete_journal_entry_by_id(username, vector_id):
+    """Delete the journal entry with the given id (see journal_search.entry_id)"""
+    return _delete_entry(username, _month_of(timestamp_of(vector_id)), lambda e: entry_id(e) == vector_id)
+
+def _delete_entry(username, month, matches):
+    with _journal_lock(username):
+        entries = _load_partition(username, month)
+        for i, entry in enumerate(entries):
+            if matches(entry):
+                removed = entries.pop(i)
+                _write_partitions(username, {month: entries})
+                _update_index(username, removed=_build_index([removed]))
+                update_daily_aggregate(username, removed=[removed])
+                remove_entries_async(username, [removed])
+                return True
     return False
 
+def update_journal_entry(username, timestamp, entry=None, mood=None, tags=None, clear_mood=False):
+    """Change the text, mood and/or tags of the first entry with the given timestamp.
+
+    Arguments left as None are kept; pass clear_mood=True to remove the
+    mood. Returns the updated entry, or None if there is no such entry.
+    """
+    return _update_entry(username, _month_of(timestamp), lambda e: e["timestamp"] == timestamp,
+                         entry, mood, tags, clear_mood)
+
+def update_journal_entry_by_id(username, vector_id, entry=None, mood=None, tags=None, clear_mood=False):
+    """Like update_journal_entry, for the entry with the given id (see journal_search.entry_id)"""
+    return _update_entry(username, _month_of(timestamp_of(vector_id)), lambda e: entry_id(e) == vector_id,
+                         entry, mood, tags, clear_mood)
+
+def _update_entry(username, month, matches, entry, mood, tags, clear_mood):
+    with _journal_lock(username):
+        entries = _load_partition(username, month)
+        for i, old in enumerate(entries):
+            if not matches(old):
+                continue
+            new = dict(old)
+            if entry is not None:
+                new["entry"] = entry
+            if mood is not None or clear_mood:
+                new["mood"] = mood
+            if tags is not None:
+                new["tags"] = tags
+            entries[i] = new
+
+            _write_partitions(username, {month: entries})
+            _update_index(username, added=[new], removed=_build_index([old]))
+            update_daily_aggregate(username, added=[new], removed=[old])
+            if new["entry"] != old["entry"]:
+                remove_entries_async(username, [old])
+                index_entries_async(username, [new])
+            return new
+    return None
+
+def backup_journal(username, backup_dir):
+    """Copy a user's journal partitions into backup_dir, skipping unchanged ones.
+
+    Only partitions whose manifest record (count, "updated" stamp and write
+    revision) differs from the last backup's manifest are copied. Returns
+    the list of months copied.
+    """
+    manifest = get_journal_manifest(username)
+    target_dir = os.path.join(backup_dir, username)
+    os.makedirs(target_dir, exist_ok=True)
+    previous = read_json(os.path.join(target_dir, "manifest.json"), {"partitions": {}})
+
+    copied = []
+    for month, info in manifest["partitions"].items():
+        if previous["partitions"].get(month) != info:
+            shutil.copy2(_get_partition_path(username, month), os.path.join(target_dir, f"{month}.json"))
+            copied.append(month)
+
+    for month in set(previous["partitions"]) - set(manifest["partitions"]):
+        stale_path = os.path.join(target_dir, f"{month}.json")
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+
+    _write_json(os.path.join(target_dir, "manifest.json"), manifest, indent=2)
+    return copied
+
+def show_related_entries(username, text, exclude=None, k=3):
+    """Show past entries similar to the given text"""
+    # Backfill entries written before the vector index existed
+    if "journal_vectors_checked" not in st.session_state:
+        st.session_state.journal_vectors_checked = True
+        ensure_indexed(username, _load_all_entries(username))
+    
+    related = find_related(username, text, k=k, exclude_id=entry_id(exclude) if exclude else None)
+    if not related:
+        return
+    
+    st.caption("Related entries")
+    for entry in get_entries_by_ids(username, [vector_id for vector_id, _ in related]):
+        preview = entry["entry"] if len(entry["entry"]) <= 150 else entry["entry"][:150] + "..."
+        mood = f" ({entry['mood']})" if entry.get("mood") else ""
+        st.markdown(f"- **{entry['timestamp']}**{mood}: {preview}")
+
 def journal_page():
     """Display the journal interface"""
     st.title("📝 Reflection Journal")
@@ -88,7 +458,7 @@ def journal_page():
         with col1:
             mood = st.select_slider(
                 "How are you feeling today?",
-                options=["Very Low", "Low", "Neutral", "Good", "Excellent"],
+                options=MOOD_OPTIONS,
                 value="Neutral"
             )
         
@@ -104,50 +474,97 @@ def journal_page():
                 st.success(f"Entry saved at {timestamp}")
             else:
                 st.warning("Please write something before saving.")
+        
+        # Related past entries for what is being written
+        if journal_entry:
+            show_related_entries(st.session_state.username, journal_entry)
+        
+        # Bulk import from other journaling apps
+        with st.expander("Import entries from another app"):
+            st.caption("CSV (with timestamp/date, entry/text, mood and tags columns), JSON/JSON Lines, "
+                       "or Markdown with one dated heading per entry.")
+            uploaded_file = st.file_uploader("Export file", type=["csv", "json", "jsonl", "md", "markdown", "txt"])
+            if uploaded_file and st.button("Import", key="import_entries"):
+                # Imported here to avoid a circular import (journal_import uses this module)
+                from journal_import import import_uploaded_file
+                
+                progress_bar = st.progress(0.0, text="Reading entries...")
+                
+                def report(stage, done, total):
+                    if stage == "read":
+                        progress_bar.progress(0.0, text=f"Read {done} entries...")
+                    else:
+                        progress_bar.progress(done / total, text=f"Writing month {done} of {total}...")
+                
+                try:
+                    stats = import_uploaded_file(st.session_state.username, uploaded_file, report)
+                    progress_bar.progress(1.0, text="Import complete")
+                    st.success(f"Imported {stats['imported']} of {stats['read']} entries "
+                               f"({stats['duplicates']} duplicates skipped, {stats['invalid']} invalid).")
+                    if stats["unrecognized_moods"]:
+                        st.warning(f"{stats['unrecognized_moods']} entries had a mood that could not be matched and were imported without one.")
+                except Exception as e:
+                    st.error(f"Import failed: {e}")
     
     with tab2:
         st.header("Previous Entries")
-        entries = get_journal_entries(st.session_state.username)
+        index = get_journal_index(st.session_state.username)
         
         # Filter options
         col1, col2 = st.columns(2)
         with col1:
             mood_filter = st.multiselect(
                 "Filter by mood",
-                options=["Very Low", "Low", "Neutral", "Good", "Excellent"],
+                options=MOOD_OPTIONS,
                 default=[]
             )
         
         with col2:
-            # Get unique tags from all entries
+            # Get unique tags from the index
             all_tags = set()
-            for entry in entries:
-                if "tags" in entry and entry["tags"]:
-                    all_tags.update(entry["tags"])
+            for item in index:
+                all_tags.update(item["tags"])
             
             tag_filter = st.multiselect("Filter by tags", options=sorted(list(all_tags)), default=[])
         
-        # Apply filters
-        if mood_filter or tag_filter:
-            filtered_entries = []
-            for entry in entries:
-                include = True
-                
-                if mood_filter and ("mood" not in entry or entry["mood"] not in mood_filter):
-                    include = False
-                
-                if tag_filter and ("tags" not in entry or not any(tag in entry["tags"] for tag in tag_filter)):
-                    include = False
-                
-                if include:
-                    filtered_entries.append(entry)
-            
-            display_entries = filtered_entries
-        else:
-            display_entries = entries
+        # Date range and paging options
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            date_range = st.date_input("Date range", value=(), key="journal_date_range")
+            start_date = end_date = None
+            if len(date_range) == 2:
+                start_date = date_range[0].strftime("%Y-%m-%d")
+                end_date = date_range[1].strftime("%Y-%m-%d")
+        
+        with col2:
+            page_size = st.selectbox("Entries per page", PAGE_SIZE_OPTIONS, index=1, key="journal_page_size")
+        
+        with col3:
+            jump_date = st.date_input("Jump to date", value=None, key="journal_jump_date")
+        
+        matches = filter_journal_index(index, mood_filter, tag_filter, start_date, end_date)
+        page_count = max((len(matches) - 1) // page_size + 1, 1)
+        
+        # Reset to the first page whenever the filters change
+        filter_key = (tuple(mood_filter), tuple(tag_filter), start_date, end_date, page_size)
+        if st.session_state.get("journal_filter_key") != filter_key:
+            st.session_state.journal_filter_key = filter_key
+            st.session_state.journal_page_num = 1
+        
+        if jump_date and st.session_state.get("journal_last_jump") != jump_date:
+            st.session_state.journal_last_jump = jump_date
+            st.session_state.journal_page_num = find_page_for_date(matches, jump_date.strftime("%Y-%m-%d"), page_size)
+        
+        page_num = min(st.session_state.get("journal_page_num", 1), page_count)
+        
+        display_entries, matching_count, total_count = get_journal_page(
+            st.session_state.username, page_num, page_size,
+            mood_filter, tag_filter, start_date, end_date
+        )
         
         # Show entries count
-        st.write(f"Showing {len(display_entries)} of {len(entries)} entries")
+        st.write(f"Showing {len(display_entries)} of {matching_count} matching entries "
+                 f"({total_count} total) | Page {page_num} of {page_count}")
         
         # Display entries
         if not display_entries:
@@ -166,9 +583,30 @@ def journal_page():
                 if "tags" in entry and entry["tags"]:
                     st.write("Tags: " + ", ".join(entry["tags"]))
                 
-                if st.button("Delete Entry", key=f"del_{i}"):
-                    if delete_journal_entry(st.session_state.username, entries.index(entry)):
+                if st.checkbox("Show related entries", key=f"related_{page_num}_{i}"):
+                    show_related_entries(st.session_state.username, entry["entry"], exclude=entry)
+                
+                if st.button("Delete Entry", key=f"del_{page_num}_{i}"):
+                    if delete_journal_entry_by_timestamp(st.session_state.username, entry["timestamp"], entry["entry"]):
                         st.success("Entry deleted.")
                         st.rerun()
                     else:
-                        st.error("Failed to delete entry.")
\ No newline at end of file
+                        st.error("Failed to delete entry.")
+        
+        # Page navigation
+        if page_count > 1:
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("← Newer", disabled=page_num <= 1, use_container_width=True):
+                    st.session_state.journal_page_num = page_num - 1
+                    st.rerun()
+            with col2:
+                selected_page = st.number_input("Page", min_value=1, max_value=page_count, value=page_num,
+                                                key=f"journal_page_input_{page_num}")
+                if selected_page != page_num:
+                    st.session_state.journal_page_num = int(selected_page)
+                    st.rerun()
+            with col3:
+                if st.button("Older →", disabled=page_num >= page_count, use_container_width=True):
+                    st.session_state.journal_page_num = page_num + 1
+                    st.rerun()
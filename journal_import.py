@@ -0,0 +1,248 @@
+import io
+import re
+import sys
+import csv
+import json
+import hashlib
+import argparse
+from datetime import datetime
+from journal import MOOD_OPTIONS, save_journal_entries
+
+# Mood labels from other apps (Daylio, numeric scales, ...) mapped onto the
+# five journal moods
+MOOD_ALIASES = {
+    "very low": "Very Low", "very bad": "Very Low", "awful": "Very Low", "terrible": "Very Low", "1": "Very Low",
+    "low": "Low", "bad": "Low", "sad": "Low", "down": "Low", "2": "Low",
+    "neutral": "Neutral", "meh": "Neutral", "okay": "Neutral", "ok": "Neutral", "fine": "Neutral", "3": "Neutral",
+    "good": "Good", "happy": "Good", "4": "Good",
+    "excellent": "Excellent", "great": "Excellent", "rad": "Excellent", "amazing": "Excellent", "5": "Excellent",
+}
+
+TIMESTAMP_FORMATS = [
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M",
+    "%Y-%m-%d", "%d/%m/%Y %H:%M", "%d/%m/%Y", "%B %d, %Y", "%b %d, %Y",
+]
+
+TIMESTAMP_FIELDS = ["timestamp", "datetime", "date", "created", "created_at", "full_date"]
+TEXT_FIELDS = ["entry", "text", "content", "body", "note", "notes"]
+
+JSON_CHUNK_SIZE = 64 * 1024
+
+def normalize_mood(value):
+    """Map a mood value onto MOOD_OPTIONS.
+
+    Returns (mood, recognized); empty values are (None, True).
+    """
+    if value is None or str(value).strip() == "":
+        return None, True
+    text = str(value).strip()
+    if text in MOOD_OPTIONS:
+        return text, True
+    mood = MOOD_ALIASES.get(text.lower())
+    return mood, mood is not None
+
+def parse_timestamp(value):
+    """Parse a timestamp in one of TIMESTAMP_FORMATS into the journal's format"""
+    text = str(value or "").strip()
+    # Drop fractional seconds and UTC offsets from ISO timestamps
+    text = re.sub(r"(\d{2}:\d{2}:\d{2})(\.\d+)?(Z|[+-]\d{2}:?\d{2})?$", r"\1", text)
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    return None
+
+def _first_field(record, names):
+    lowered = {str(k).strip().lower(): v for k, v in record.items()}
+    for name in names:
+        if lowered.get(name) not in (None, ""):
+            return lowered[name]
+    return None
+
+def _parse_tags(value):
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(tag).strip() for tag in value if str(tag).strip()]
+    return [tag.strip() for tag in re.split(r"[,;|]", str(value)) if tag.strip()]
+
+def iter_csv_records(stream):
+    """Yield raw records from a CSV export with a header row"""
+    for row in csv.DictReader(stream):
+        yield row
+
+def iter_json_records(stream):
+    """Yield raw records from a JSON array or JSON Lines export without loading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    eof = False
+
+    while True:
+        # Skip separators between records
+        stripped = buffer.lstrip()
+        if not started and stripped:
+            started = True
+            if stripped[0] == "[":
+                stripped = stripped[1:]
+        stripped = stripped.lstrip().lstrip(",").lstrip()
+        if stripped.startswith("]"):
+            return
+        buffer = stripped
+
+        if buffer:
+            try:
+                record, end = decoder.raw_decode(buffer)
+                buffer = buffer[end:]
+                yield record
+                continue
+            except ValueError:
+                if eof:
+                    raise
+        elif eof:
+            return
+
+        chunk = stream.read(JSON_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+        buffer += chunk
+
+def iter_markdown_records(stream):
+    """Yield raw records from Markdown where each entry starts with a dated heading.
+
+    Example:
+        ## 2024-03-01 08:30
+        Mood: Good
+        Tags: work, sleep
+        Entry text...
+    """
+    record = None
+    lines = []
+
+    def finish():
+        record["entry"] = "\n".join(lines).strip()
+        return record
+
+    for line in stream:
+        line = line.rstrip("\n")
+        heading = re.match(r"^#{1,6}\s+(.*)$", line)
+        if heading and parse_timestamp(heading.group(1)):
+            if record is not None:
+                yield finish()
+            record = {"timestamp": heading.group(1)}
+            lines = []
+            continue
+        if record is None:
+            continue
+        meta = re.match(r"^(mood|tags)\s*:\s*(.*)$", line.strip(), re.IGNORECASE)
+        if meta and not lines:
+            record[meta.group(1).lower()] = meta.group(2)
+        else:
+            lines.append(line)
+
+    if record is not None:
+        yield finish()
+
+RECORD_READERS = {
+    "csv": iter_csv_records,
+    "json": iter_json_records,
+    "md": iter_markdown_records,
+}
+
+def detect_format(filename):
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension in ("markdown", "md", "txt"):
+        return "md"
+    if extension in ("json", "jsonl", "ndjson"):
+        return "json"
+    return "csv"
+
+def normalize_records(records, stats):
+    """Validate and normalize raw records into journal entries, dropping in-file duplicates"""
+    seen = set()
+    for record in records:
+        if not isinstance(record, dict):
+            stats["invalid"] += 1
+            continue
+
+        timestamp = parse_timestamp(_first_field(record, TIMESTAMP_FIELDS))
+        text = _first_field(record, TEXT_FIELDS)
+        if not timestamp or not text or not str(text).strip():
+            stats["invalid"] += 1
+            continue
+        text = str(text).strip()
+
+        key = (timestamp, hashlib.sha1(text.encode("utf-8")).hexdigest())
+        if key in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(key)
+
+        mood, recognized = normalize_mood(_first_field(record, ["mood"]))
+        if not recognized:
+            stats["unrecognized_moods"] += 1
+
+        yield {
+            "timestamp": timestamp,
+            "date": timestamp[:10],
+            "entry": text,
+            "mood": mood,
+            "tags": _parse_tags(_first_field(record, ["tags", "tag", "activities"]))
+        }
+
+def import_journal(username, stream, fmt, progress=None):
+    """Stream an export into the user's journal in one batched write.
+
+    stream is a text stream; fmt is "csv", "json" or "md". progress, if
+    given, is called as progress(stage, done, total) while reading and
+    writing. Returns a stats dict.
+    """
+    stats = {"read": 0, "imported": 0, "duplicates": 0, "invalid": 0, "unrecognized_moods": 0}
+
+    entries = []
+    for entry in normalize_records(RECORD_READERS[fmt](stream), stats):
+        entries.append(entry)
+        if progress and len(entries) % 500 == 0:
+            progress("read", len(entries), None)
+
+    stats["read"] = len(entries) + stats["duplicates"] + stats["invalid"]
+    added = save_journal_entries(
+        username, entries,
+        progress=(lambda done, total: progress("write", done, total)) if progress else None
+    )
+    stats["imported"] = len(added)
+    stats["duplicates"] += len(entries) - len(added)
+    return stats
+
+def import_uploaded_file(username, uploaded_file, progress=None):
+    """Import a Streamlit UploadedFile (or any binary file object with a name)"""
+    stream = io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+    try:
+        return import_journal(username, stream, detect_format(uploaded_file.name), progress)
+    finally:
+        stream.detach()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import journal entries from CSV, JSON or Markdown exports")
+    parser.add_argument("username")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(RECORD_READERS), help="Input format (default: from file extension)")
+    args = parser.parse_args(argv)
+
+    def report(stage, done, total):
+        if stage == "read":
+            print(f"Read {done} entries...")
+        else:
+            print(f"Wrote partition {done}/{total}")
+
+    with open(args.path, "r", encoding="utf-8-sig", newline="") as f:
+        stats = import_journal(args.username, f, args.format or detect_format(args.path), report)
+
+    print(f"Imported {stats['imported']} of {stats['read']} entries "
+          f"({stats['duplicates']} duplicates, {stats['invalid']} invalid, "
+          f"{stats['unrecognized_moods']} unrecognized moods)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+import os
+import re
+import json
+import zlib
+import queue
+import threading
+import numpy as np
+from utils import get_user_data_path
+from storage import locked, write_json, atomic_write
+
+# Hashing projection settings: every token is hashed into one of VECTOR_DIM
+# buckets, so no vocabulary has to be stored or kept in sync.
+VECTOR_DIM = 512
+VECTOR_DTYPE = np.float32
+# Rows scored at a time, bounding a query's working memory
+SCORE_BLOCK_ROWS = 4096
+# Removed entries leave a dead row behind; the matrix is rewritten without
+# them once there are at least this many and they make up this share of it
+COMPACT_MIN_ROWS = 64
+COMPACT_DEAD_FRACTION = 0.25
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "had", "has",
+    "have", "i", "i'm", "im", "in", "is", "it", "its", "me", "my", "of", "on", "or", "so",
+    "that", "the", "this", "to", "today", "was", "were", "with", "am", "about", "very"
+}
+
+_worker_lock = threading.Lock()
+_queue = queue.Queue()
+_worker = None
+
+def _get_vectors_path(username):
+    return get_user_data_path(f"vectors/{username}_vectors.f32")
+
+def _get_ids_path(username):
+    return get_user_data_path(f"vectors/{username}_ids.json")
+
+def _tokenize(text):
+    return [t for t in re.findall(r"[a-z']+", text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+def embed_text(text):
+    """Embed text as an L2-normalized, sublinear-TF hashed vector"""
+    vector = np.zeros(VECTOR_DIM, dtype=VECTOR_DTYPE)
+    for token in _tokenize(text):
+        h = zlib.crc32(token.encode("utf-8"))
+        # Use one hash bit as a sign to reduce the bias of bucket collisions
+        vector[h % VECTOR_DIM] += 1.0 if (h >> 31) & 1 else -1.0
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def entry_id(entry):
+    """Key of an entry's vector row: its timestamp plus a hash of its text.
+
+    Timestamps alone repeat (date-only imports all land on midnight), but
+    the journal never holds two entries with the same timestamp and text.
+    """
+    return f"{entry['timestamp']}#{zlib.crc32(entry['entry'].encode('utf-8')):08x}"
+
+def timestamp_of(vector_id):
+    return vector_id.split("#", 1)[0]
+
+def _load_ids(username):
+    ids_path = _get_ids_path(username)
+    if not os.path.exists(ids_path):
+        return []
+    with open(ids_path, 'r') as f:
+        try:
+            ids = json.load(f)
+        except:
+            return []
+    # Indexes written before rows had entry ids are keyed by bare timestamps;
+    # treat them as empty so they are rebuilt (add_entries cuts off the old rows)
+    if any(i is not None and "#" not in i for i in ids):
+        return []
+    return ids
+
+def _save_ids(username, ids):
+    write_json(_get_ids_path(username), ids)
+
+def _stored_rows(username):
+    vectors_path = _get_vectors_path(username)
+    if not os.path.exists(vectors_path):
+        return 0
+    return os.path.getsize(vectors_path) // (VECTOR_DIM * np.dtype(VECTOR_DTYPE).itemsize)
+
+def _open_matrix(username, rows):
+    """Memory-map the first `rows` vectors of a user's matrix read-only.
+
+    Returns None when the matrix holds fewer rows than ids (a compaction
+    that replaced the matrix but never saved its ids); add_entries then
+    rebuilds the index from scratch.
+    """
+    if not rows or _stored_rows(username) < rows:
+        return None
+    return np.memmap(_get_vectors_path(username), dtype=VECTOR_DTYPE, mode='r', shape=(rows, VECTOR_DIM))
+
+def add_entries(username, entries):
+    """Embed entries and append them to the user's vector matrix (skips already-indexed ones)"""
+    with locked(f"vectors-{username}"):
+        os.makedirs(os.path.dirname(_get_ids_path(username)), exist_ok=True)
+        ids = _load_ids(username)
+        if _stored_rows(username) < len(ids):
+            ids = []
+        known = set(ids)
+        new_entries = []
+        for entry in entries:
+            if entry_id(entry) not in known:
+                known.add(entry_id(entry))
+                new_entries.append(entry)
+        if not new_entries:
+            return 0
+
+        vectors = np.vstack([embed_text(e["entry"]) for e in new_entries]).astype(VECTOR_DTYPE)
+        # The ids file is only updated after the rows are on disk, so readers
+        # never see an id without its vector. Rows left behind by a write that
+        # never got its ids saved are cut off first to keep rows and ids aligned.
+        with open(_get_vectors_path(username), 'ab') as f:
+            f.truncate(len(ids) * VECTOR_DIM * np.dtype(VECTOR_DTYPE).itemsize)
+            f.write(vectors.tobytes())
+        _save_ids(username, ids + [entry_id(e) for e in new_entries])
+        return len(new_entries)
+
+def remove_entries(username, entries):
+    """Stop returning entries from related-entry queries, compacting the matrix once enough rows are dead"""
+    with locked(f"vectors-{username}"):
+        ids = _load_ids(username)
+        positions = {vector_id: i for i, vector_id in enumerate(ids) if vector_id is not None}
+        removed = 0
+        for entry in entries:
+            i = positions.pop(entry_id(entry), None)
+            if i is not None:
+                ids[i] = None
+                removed += 1
+        if not removed:
+            return 0
+        dead = ids.count(None)
+        if dead >= max(COMPACT_MIN_ROWS, COMPACT_DEAD_FRACTION * len(ids)):
+            _compact(username, ids)
+        else:
+            _save_ids(username, ids)
+        return removed
+
+def _compact(username, ids):
+    """Rewrite the matrix and ids without dead rows (caller holds the vectors lock)"""
+    live = [i for i, vector_id in enumerate(ids) if vector_id is not None]
+    matrix = _open_matrix(username, len(ids))
+    with atomic_write(_get_vectors_path(username), 'wb') as f:
+        if matrix is not None:
+            for start in range(0, len(live), SCORE_BLOCK_ROWS):
+                f.write(np.asarray(matrix[live[start:start + SCORE_BLOCK_ROWS]]).tobytes())
+    # The matrix is replaced first: if the ids are never saved, the matrix is
+    # shorter than the ids and _open_matrix refuses it until it is rebuilt
+    _save_ids(username, [ids[i] for i in live])
+
+def _run_worker():
+    while True:
+        operation, username, entries = _queue.get()
+        try:
+            if operation == "add":
+                add_entries(username, entries)
+            else:
+                remove_entries(username, entries)
+        except Exception as e:
+            print(f"Error updating journal index for {username}: {e}")
+        finally:
+            _queue.task_done()
+
+def _enqueue(operation, username, entries):
+    global _worker
+    if not entries:
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_worker, name="journal-indexer", daemon=True)
+            _worker.start()
+    _queue.put((operation, username, list(entries)))
+
+def index_entries_async(username, entries):
+    """Queue entries for embedding on the background indexing thread"""
+    _enqueue("add", username, entries)
+
+def remove_entries_async(username, entries):
+    """Queue entries for removal behind any pending adds, so a quick save-then-delete leaves no row behind"""
+    _enqueue("remove", username, entries)
+
+def ensure_indexed(username, entries):
+    """Queue any entries that are missing from the vector index (e.g. entries written before it existed)"""
+    known = set(_load_ids(username))
+    missing = [e for e in entries if entry_id(e) not in known]
+    index_entries_async(username, missing)
+    return len(missing)
+
+def find_related(username, text, k=5, exclude_id=None):
+    """Find the k entries most similar to text.
+
+    Returns a list of (entry id, score) pairs, best first; see entry_id.
+    Scores are cosine similarities after IDF re-weighting of the hashed
+    dimensions.
+    """
+    # Ids and matrix are read together so a compaction can't pair them up
+    # wrongly; the memmap keeps reading the old file if one is swapped in
+    with locked(f"vectors-{username}"):
+        ids = _load_ids(username)
+        matrix = _open_matrix(username, len(ids))
+    query = embed_text(text)
+    if matrix is None or not query.any():
+        return []
+
+    # IDF over the hashed buckets, computed from the matrix itself. The
+    # matrix is read in blocks so a query never holds a full copy of it.
+    doc_freq = np.zeros(VECTOR_DIM, dtype=np.int64)
+    for start in range(0, matrix.shape[0], SCORE_BLOCK_ROWS):
+        doc_freq += np.count_nonzero(matrix[start:start + SCORE_BLOCK_ROWS], axis=0)
+    idf = (np.log((1 + matrix.shape[0]) / (1 + doc_freq)) + 1.0).astype(VECTOR_DTYPE)
+
+    # cos(row * idf, query * idf) = (row @ (query * idf**2)) / (|query * idf| * |row * idf|),
+    # and |row * idf| = sqrt(row**2 @ idf**2)
+    query = query * idf
+    query /= np.linalg.norm(query) or 1.0
+    query *= idf
+    idf_squared = idf * idf
+    scores = np.empty(matrix.shape[0], dtype=VECTOR_DTYPE)
+    for start in range(0, matrix.shape[0], SCORE_BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + SCORE_BLOCK_ROWS])
+        norms = np.sqrt((block * block) @ idf_squared)
+        norms[norms == 0] = 1.0
+        scores[start:start + len(block)] = (block @ query) / norms
+
+    valid = np.array([i is not None and i != exclude_id for i in ids[:matrix.shape[0]]])
+    scores = np.where(valid & (scores > 0), scores, -1.0)
+
+    k = min(k, int((scores > 0).sum()))
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(ids[i], float(scores[i])) for i in top]
@@ -0,0 +1,43 @@
+import os
+import sys
+import glob
+import argparse
+from utils import get_user_data_path
+from journal import repartition_journal, backup_journal
+
+def find_journal_users():
+    """Find users with a legacy journal file or a partitioned journal directory"""
+    journal_dir = get_user_data_path("journals")
+    users = set()
+    for path in glob.glob(os.path.join(journal_dir, "*_journal.json")):
+        users.add(os.path.basename(path)[:-len("_journal.json")])
+    for path in glob.glob(os.path.join(journal_dir, "*", "manifest.json")):
+        users.add(os.path.basename(os.path.dirname(path)))
+    return sorted(u for u in users if u)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Journal storage maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    repartition_parser = subparsers.add_parser("repartition", help="Split legacy journal files into month partitions")
+    repartition_parser.add_argument("users", nargs="*", help="Users to repartition (default: all)")
+
+    backup_parser = subparsers.add_parser("backup", help="Copy changed month partitions to a backup directory")
+    backup_parser.add_argument("backup_dir")
+    backup_parser.add_argument("users", nargs="*", help="Users to back up (default: all)")
+
+    args = parser.parse_args(argv)
+    users = args.users or find_journal_users()
+
+    for username in users:
+        if args.command == "repartition":
+            count = repartition_journal(username)
+            print(f"{username}: repartitioned {count} entries")
+        else:
+            copied = backup_journal(username, args.backup_dir)
+            print(f"{username}: copied {len(copied)} partition(s) {', '.join(copied)}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
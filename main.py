@@ -1,37 +1,30 @@
 import streamlit as st
-import os
-import glob
-from journal import journal_page
-from chat_agent import chat_page
-from mood_tracker import mood_tracker_page
-from resources import resources_page
-# --- MODIFIED IMPORT ---
-# from calming_frequency import calming_frequency_page  # Old import
-from lofi_player import lofi_sounds_page  # New import for the lofi player page
-# --- END MODIFICATION ---
+import importlib
 from utils import apply_theme, create_directories, THEMES
-import re # Import re for username validation
+from user_registry import count_users, search_users, register_user, validate_username
+from profiling import profile_page, show_profiling_toggle
 
 # Ensure necessary directories exist
 create_directories()
 
-def get_existing_users():
-    """Get a list of existing users based on journal files"""
-    # Ensure the directory exists before searching
-    journal_dir = "user_data/journals"
-    os.makedirs(journal_dir, exist_ok=True) # Create if it doesn't exist
-    
-    journal_files = glob.glob(os.path.join(journal_dir, "*_journal.json")) # Use os.path.join
-    users = []
-    for file in journal_files:
-        # Extract username from filename
-        filename = os.path.basename(file)
-        # Handle potential empty filenames or unexpected formats
-        if filename.endswith("_journal.json"):
-            username = filename[:-len("_journal.json")] # More robust removal
-            if username: # Ensure username is not empty after stripping
-                users.append(username)
-    return sorted(list(set(users))) # Use set to avoid duplicates just in case
+# Page modules are imported only when their page is first opened, so the
+# login screen (and every rerun of it) does not load the LLM clients,
+# pandas/altair and the rest. Python caches the modules after that.
+PAGES = {
+    "💬 Chat Support": ("chat_agent", "chat_page"),
+    "📝 Journal": ("journal", "journal_page"),
+    "📊 Mood Calendar": ("mood_tracker", "mood_tracker_page"),
+    "🎧 Lofi Sounds": ("lofi_player", "lofi_sounds_page"),
+    "📚 Resources": ("resources", "resources_page"),
+}
+
+# Profiles listed in the login picker at once
+PROFILE_PICKER_LIMIT = 50
+
+def load_page(page_key):
+    """Import the module behind a page and return its page function"""
+    module_name, function_name = PAGES[page_key]
+    return getattr(importlib.import_module(module_name), function_name)
 
 def main():
     st.set_page_config(
@@ -59,17 +52,24 @@ def main():
         st.header("Welcome!")
         st.subheader("Please select or create a profile to continue")
 
-        # Get existing users
-        existing_users = get_existing_users()
+        # Profiles come from the registry, so there is no directory scan per rerun
+        total_users = count_users()
 
         col1, col2 = st.columns(2)
 
         with col1:
             st.subheader("👤 Select Existing Profile")
 
-            if existing_users:
+            if total_users:
+                # Only the first PROFILE_PICKER_LIMIT matches are listed; typing narrows them down
+                prefix = ""
+                if total_users > PROFILE_PICKER_LIMIT:
+                    prefix = st.text_input("Search profiles:", key="profile_search", placeholder="Start typing a name...")
+                matching_users = search_users(prefix, limit=PROFILE_PICKER_LIMIT)
+                if total_users > PROFILE_PICKER_LIMIT:
+                    st.caption(f"Showing {len(matching_users)} of {total_users} profiles")
                 # Add a placeholder option
-                options = [""] + existing_users
+                options = [""] + matching_users
                 selected_user = st.selectbox(
                     "Choose your profile:",
                     options=options,
@@ -91,24 +91,16 @@ def main():
             if new_username: # Only show button if there's input
                 if st.button("Create and Continue", key="create_new"):
                     # Validate username (allow spaces, but sanitize for filenames later if needed)
-                    # Simple validation: not empty and not too long
                     clean_username = new_username.strip()
-                    if not clean_username:
-                         st.error("Profile name cannot be empty.")
-                    elif len(clean_username) > 50:
-                         st.error("Profile name is too long (max 50 characters).")
-                    # Check if username already exists (case-insensitive)
-                    elif clean_username.lower() in [u.lower() for u in existing_users]:
-                        st.error(f"Profile name '{clean_username}' already exists. Please choose another.")
+                    error = validate_username(clean_username)
+                    if error:
+                         st.error(error)
                     else:
-                        # Basic check for problematic characters if needed for filenames
-                        # This regex allows letters, numbers, spaces, hyphens, underscores
-                        if not re.match("^[a-zA-Z0-9 _-]+$", clean_username):
-                             st.error("Profile name can only contain letters, numbers, spaces, underscores, and hyphens.")
+                        # Registering fails if the name already exists (case-insensitive)
+                        if not register_user(clean_username):
+                            st.error(f"Profile name '{clean_username}' already exists. Please choose another.")
                         else:
                             st.session_state.username = clean_username
-                            # Optionally: create placeholder files immediately
-                            # create_user_files(clean_username)
                             st.success(f"Profile '{clean_username}' created!")
                             st.rerun()
 
@@ -148,30 +140,10 @@ def main():
 
             st.divider()
 
-            # Navigation
-            pages = {
-                "💬 Chat Support": chat_page,
-                "📝 Journal": journal_page,
-                "📊 Mood Calendar": mood_tracker_page,
-                # --- MODIFIED PAGE ENTRY ---
-                "🎧 Lofi Sounds": lofi_sounds_page, # Renamed key and uses the new function
-                # --- END MODIFICATION ---
-                "📚 Resources": resources_page
-            }
-
-            # Use icons in radio buttons (optional but nice)
-            page_keys_with_icons = {
-                 "💬 Chat Support": "💬 Chat Support",
-                 "📝 Journal": "📝 Journal",
-                 "📊 Mood Calendar": "📊 Mood Calendar",
-                 "🎧 Lofi Sounds": "🎧 Lofi Sounds",
-                 "📚 Resources": "📚 Resources",
-            }
-
+            # Navigation (page keys already include their icons)
             selected_page_key = st.radio(
                 "Navigation",
-                list(page_keys_with_icons.keys()),
-                format_func=lambda key: page_keys_with_icons[key], # Display text with icon
+                list(PAGES.keys()),
                 key="nav_radio"
             )
 
@@ -195,9 +167,13 @@ def main():
                 "This app provides tools for reflection and relaxation. Remember, it's not a substitute for professional help."
             )
 
+            show_profiling_toggle()
+
         # Display selected page
-        if selected_page_key in pages:
-            pages[selected_page_key]() # Call the function associated with the selected key
+        if selected_page_key in PAGES:
+            # Timed (including the first import of the page module) when profiling is on
+            with profile_page(PAGES[selected_page_key][1]):
+                load_page(selected_page_key)() # Import the page module on first use and call its page function
         else:
             st.error("Page not found.") # Fallback
 
@@ -0,0 +1,149 @@
+import sys
+import uuid
+from array import array
+
+# Messages kept in memory per session; older ones stay in the chat history
+# file and are read back only when the user asks for them
+MAX_WINDOW_MESSAGES = 100
+LOAD_EARLIER_STEP = 50
+
+# Role strings are stored once here and referenced by index from every buffer
+ROLES = ("user", "assistant", "system")
+_ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+def _role_code(role):
+    code = _ROLE_CODES.get(role)
+    if code is None:
+        raise ValueError(f"Unknown chat role {role!r}, expected one of {', '.join(ROLES)}")
+    return code
+
+def message_id(message, position):
+    """Id of a stored message; messages saved before ids existed are keyed by their position.
+
+    Those always sit at the start of the history (it only grows at the
+    end or is cleared), so their positions never change.
+    """
+    return message.get("id") or f"legacy-{position}"
+
+class ChatMessageBuffer:
+    """Columnar, size-capped window onto a chat history.
+
+    Roles are kept as one byte each in an array, and contents and message
+    ids in plain lists, instead of one dict per message. Only the newest
+    max_window messages are held; offset is the number of older messages
+    that exist only in the history file, and unsaved the number of newest
+    messages not written to it yet (those are never evicted). Iterating
+    yields (role, content) tuples.
+
+    Other sessions may append to or clear the history file meanwhile, so
+    earlier messages are found by the id of the oldest message held rather
+    than by position, and offset is only a count for display.
+    """
+
+    __slots__ = ("_roles", "_contents", "_ids", "offset", "unsaved", "max_window")
+
+    def __init__(self, max_window=MAX_WINDOW_MESSAGES):
+        self._roles = array("B")
+        self._contents = []
+        self._ids = []
+        self.offset = 0
+        self.unsaved = 0
+        self.max_window = max_window
+
+    @classmethod
+    def from_messages(cls, messages, max_window=MAX_WINDOW_MESSAGES):
+        """Window onto a stored history (a list of {"role", "content"} dicts)"""
+        buffer = cls(max_window)
+        buffer.offset = max(len(messages) - max_window, 0)
+        for position in range(buffer.offset, len(messages)):
+            message = messages[position]
+            buffer._roles.append(_role_code(message["role"]))
+            buffer._contents.append(message["content"])
+            buffer._ids.append(message_id(message, position))
+        return buffer
+
+    def __len__(self):
+        return len(self._contents)
+
+    def __iter__(self):
+        for code, content in zip(self._roles, self._contents):
+            yield ROLES[code], content
+
+    @property
+    def total(self):
+        """Messages in the whole history, including the ones not held in memory"""
+        return self.offset + len(self._contents)
+
+    def append(self, role, content):
+        self._roles.append(_role_code(role))
+        self._contents.append(content)
+        self._ids.append(uuid.uuid4().hex)
+        self.unsaved += 1
+        self._evict()
+
+    def _evict(self):
+        excess = min(len(self._contents) - self.max_window, len(self._contents) - self.unsaved)
+        if excess > 0:
+            del self._roles[:excess]
+            del self._contents[:excess]
+            del self._ids[:excess]
+            self.offset += excess
+
+    def load_earlier(self, history, count=LOAD_EARLIER_STEP):
+        """Bring up to count older messages back from the stored history.
+
+        They are the messages stored just before the oldest one held here
+        and stay in memory until the next append trims the window again.
+        Returns how many were loaded.
+        """
+        end = self._anchor_position(history)
+        start = max(end - count, 0)
+        earlier = history[start:end]
+        self._roles[0:0] = array("B", (_role_code(message["role"]) for message in earlier))
+        self._contents[0:0] = [message["content"] for message in earlier]
+        self._ids[0:0] = [message_id(message, start + i) for i, message in enumerate(earlier)]
+        self.offset = start
+        return len(earlier)
+
+    def _anchor_position(self, history):
+        """Position in history of the oldest saved message held here (0 if it is gone)"""
+        saved = len(self._ids) - self.unsaved
+        if not saved:
+            # Nothing saved is held: everything stored is older
+            return len(history)
+        anchor = self._ids[0]
+        if anchor.startswith("legacy-"):
+            position = int(anchor[len("legacy-"):])
+            return position if position < len(history) and "id" not in history[position] else 0
+        # Held messages were usually saved recently, so search from the end
+        for position in range(len(history) - 1, -1, -1):
+            if history[position].get("id") == anchor:
+                return position
+        # The history was cleared by another session
+        return 0
+
+    def pending(self):
+        """Messages appended since the last save, as {"role", "content"} dicts to add to the history"""
+        start = len(self._contents) - self.unsaved
+        return [{"id": key, "role": ROLES[code], "content": content}
+                for code, content, key in zip(self._roles[start:], self._contents[start:], self._ids[start:])]
+
+    def mark_saved(self):
+        self.unsaved = 0
+        self._evict()
+
+    def memory_usage(self):
+        """Approximate bytes held by this buffer, next to the same window kept as a list of dicts"""
+        content_bytes = sum(sys.getsizeof(content) for content in self._contents)
+        id_bytes = sys.getsizeof(self._ids) + sum(sys.getsizeof(key) for key in self._ids)
+        buffer_bytes = (
+            sys.getsizeof(self) + sys.getsizeof(self._roles) + sys.getsizeof(self._contents) + content_bytes + id_bytes
+        )
+        sample = {"id": "", "role": "assistant", "content": ""}
+        dict_bytes = sys.getsizeof([None] * len(self._contents)) + len(self._contents) * sys.getsizeof(sample) + content_bytes
+        return {
+            "in_memory": len(self._contents),
+            "on_disk_only": self.offset,
+            "buffer_bytes": buffer_bytes,
+            "dict_list_bytes": dict_bytes,
+        }
@@ -0,0 +1,269 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Each Gemini agent asks for a model by agent name and the router picks the
+# tier: classification steps use a small, fast model and only the steps that
+# write what the user reads use the large one.
+#
+# A turn can set a latency budget with turn_budget(seconds). When what is
+# left of it is less than a tier usually takes (a moving average of its
+# recent calls), the call goes to the next cheaper tier instead.
+#
+# GEMINI_LARGE_MODEL and GEMINI_SMALL_MODEL pick the Gemini model of each
+# tier; setting either to "local" uses the local stand-in backend, which
+# answers classification prompts with keyword rules and needs no network.
+# MODEL_ROUTES=context=large,response=small overrides agent tiers.
+TIER_ORDER = ["large", "small", "local"]
+AGENT_TIERS = {
+    "context": "small",
+    "question": "small",
+    "journal": "small",
+    "search_check": "small",
+    "coping": "large",
+    "response": "large",
+    "search_response": "large",
+}
+# Starting guesses (ms) for each tier's latency, until calls are measured
+EXPECTED_LATENCY_MS = {"large": 2500, "small": 800, "local": 1}
+LATENCY_SMOOTHING = 0.2
+
+_budget = ContextVar("turn_budget", default=None)
+
+class TurnBudget:
+    def __init__(self, seconds):
+        self.deadline = time.perf_counter() + seconds
+
+    def remaining_ms(self):
+        return max(self.deadline - time.perf_counter(), 0) * 1000
+
+@contextmanager
+def turn_budget(seconds):
+    """Route the model calls made inside the block (and in AgentDAG nodes it runs) to fit in seconds"""
+    token = _budget.set(TurnBudget(seconds))
+    try:
+        yield _budget.get()
+    finally:
+        _budget.reset(token)
+
+class LocalResponse:
+    """Stands in for a Gemini response (only .text is used)"""
+
+    def __init__(self, text):
+        self.text = text
+
+EMOTION_KEYWORDS = {
+    "anxious": ["anxious", "anxiety", "worried", "worry", "nervous", "panic", "scared", "afraid", "fear"],
+    "stressed": ["stressed", "stress", "pressure", "deadline", "busy", "tense", "exhausted", "burnout"],
+    "sad": ["sad", "down", "depressed", "lonely", "hopeless", "cry", "crying", "empty", "grief", "miss"],
+    "angry": ["angry", "anger", "furious", "mad", "annoyed", "irritated", "frustrated", "hate"],
+    "overwhelmed": ["overwhelmed", "too much", "can't cope", "cannot cope", "drowning", "swamped"],
+    "happy": ["happy", "great", "good", "excited", "grateful", "calm", "better", "relieved"],
+}
+STRESSOR_KEYWORDS = ["work", "job", "boss", "exam", "exams", "school", "study", "money", "debt", "family",
+                     "partner", "relationship", "friend", "friends", "sleep", "health", "deadline", "deadlines"]
+APPROACH_BY_STATE = {"anxious": "CBT", "stressed": "Mindfulness", "sad": "CBT", "angry": "DBT",
+                     "overwhelmed": "ACT", "happy": "Supportive", "neutral": "Supportive"}
+INTENSIFIERS = ["very", "really", "so ", "extremely", "can't", "cannot", "always", "never"]
+
+def _quoted(prompt, label):
+    match = re.search(label + r'\s*"(.*?)"\s*\n', prompt, re.S)
+    return match.group(1) if match else ""
+
+def classify_message(prompt):
+    """Keyword-rule answer to TherapyContextAgent.analyze_message's prompt"""
+    message = _quoted(prompt, r"User's current message:").casefold()
+    counts = {state: sum(message.count(word) for word in words) for state, words in EMOTION_KEYWORDS.items()}
+    state = max(counts, key=counts.get) if any(counts.values()) else "neutral"
+    intensity = min(1 + counts.get(state, 0) + sum(message.count(word) for word in INTENSIFIERS), 5)
+    stressors = [word for word in STRESSOR_KEYWORDS if re.search(rf"\b{word}\b", message)]
+    distressed = state not in ("neutral", "happy")
+    return json.dumps({
+        "emotional_state": state,
+        "emotional_intensity": intensity if distressed else 2,
+        "therapeutic_approach": APPROACH_BY_STATE[state],
+        "needs_followup": distressed and not stressors,
+        "followup_question": "What do you think has been contributing most to how you feel?" if distressed else "",
+        "suggest_coping_strategies": distressed,
+        "recommend_content": distressed,
+        "content_categories": ["relaxation"] if state in ("anxious", "stressed") else [],
+        "detected_interests": [],
+        "potential_stressors": stressors,
+        "sensitivity_level": 4 if intensity >= 4 and distressed else 2
+    })
+
+SEARCH_WORDS = ["latest", "news", "today", "current", "recent", "who is", "what is", "when", "price", "2024", "2025"]
+VIDEO_WORDS = ["how to", "tutorial", "video", "show me", "learn", "guide", "watch"]
+
+def classify_search(prompt):
+    """Keyword-rule answer to ContextCheckAgent.check_search_needed's prompt"""
+    query = _quoted(prompt, r"Analyze this user query:")
+    lowered = query.casefold()
+    needs_news = any(word in lowered for word in SEARCH_WORDS)
+    needs_videos = any(word in lowered for word in VIDEO_WORDS)
+    return json.dumps({
+        "needs_search": needs_news or needs_videos,
+        "needs_news": needs_news,
+        "needs_videos": needs_videos,
+        "search_query": query,
+        "reason": "Keyword rules (local model)"
+    })
+
+class LocalBackend:
+    """Answers without a network call.
+
+    responders maps agent names to functions from prompt to response text;
+    the defaults handle the classification agents. Other agents get
+    default_text if one is given; otherwise the backend doesn't serve them
+    and the router won't send them here. latency (seconds) is added to
+    every call, for trying out routing under load.
+    """
+
+    def __init__(self, responders=None, default_text="", latency=0.0):
+        self.responders = {"context": classify_message, "search_check": classify_search, **(responders or {})}
+        self.default_text = default_text
+        self.latency = latency
+
+    def serves(self, agent):
+        return agent in self.responders or bool(self.default_text)
+
+    def generate(self, agent, prompt):
+        if self.latency:
+            time.sleep(self.latency)
+        responder = self.responders.get(agent)
+        return LocalResponse(responder(prompt) if responder else self.default_text)
+
+class GeminiBackend:
+    """A Gemini model; google.generativeai is configured by the caller"""
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self._model = None
+
+    def serves(self, agent):
+        return True
+
+    def generate(self, agent, prompt):
+        if self._model is None:
+            import google.generativeai as genai
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model.generate_content(prompt)
+
+def _backend(model_name):
+    return LocalBackend() if model_name == "local" else GeminiBackend(model_name)
+
+def default_backends():
+    return {
+        "large": _backend(os.getenv("GEMINI_LARGE_MODEL", "gemini-2.0-flash")),
+        "small": _backend(os.getenv("GEMINI_SMALL_MODEL", "gemini-2.0-flash-lite")),
+        "local": LocalBackend(),
+    }
+
+def default_routes():
+    routes = dict(AGENT_TIERS)
+    for pair in filter(None, os.getenv("MODEL_ROUTES", "").split(",")):
+        agent, _, tier = pair.partition("=")
+        if tier.strip() in TIER_ORDER:
+            routes[agent.strip()] = tier.strip()
+    return routes
+
+class ModelRouter:
+    def __init__(self, backends=None, routes=None):
+        self.backends = backends or default_backends()
+        self.routes = routes or default_routes()
+        self._latency = dict(EXPECTED_LATENCY_MS)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def choose_tier(self, agent):
+        """(tier, downgraded) for an agent's next call under the current turn budget"""
+        serving = [tier for tier in TIER_ORDER if tier in self.backends and self.backends[tier].serves(agent)]
+        routed = self.routes.get(agent, "large")
+        # The routed tier, or the nearest more expensive one if it can't answer this agent
+        tier = next((tier for tier in reversed(serving) if TIER_ORDER.index(tier) <= TIER_ORDER.index(routed)),
+                    serving[-1])
+        budget = _budget.get()
+        if budget is None:
+            return tier, False
+        remaining = budget.remaining_ms()
+        chosen = tier
+        for cheaper in serving[serving.index(tier):]:
+            chosen = cheaper
+            if self._latency[cheaper] <= remaining:
+                break
+        return chosen, chosen != tier
+
+    def generate(self, agent, prompt):
+        tier, downgraded = self.choose_tier(agent)
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = self.backends[tier].generate(agent, prompt)
+            ok = True
+            return response
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                if ok:
+                    self._latency[tier] += LATENCY_SMOOTHING * (elapsed_ms - self._latency[tier])
+                stats = self._stats.setdefault(agent, {"calls": 0, "errors": 0, "downgrades": 0, "tiers": {}})
+                stats["calls"] += 1
+                stats["errors"] += not ok
+                stats["downgrades"] += downgraded
+                stats["tiers"][tier] = stats["tiers"].get(tier, 0) + 1
+
+    def metrics(self):
+        """Per-agent call, error and downgrade counts and calls per tier, plus each tier's expected latency (ms)"""
+        with self._lock:
+            return {
+                "agents": json.loads(json.dumps(self._stats)),
+                "expected_latency_ms": {tier: round(ms, 1) for tier, ms in self._latency.items()}
+            }
+
+_router = None
+_router_pid = None
+_router_lock = threading.Lock()
+
+def get_model_router():
+    """The worker process's shared router"""
+    global _router, _router_pid
+    with _router_lock:
+        if _router is None or _router_pid != os.getpid():
+            _router = ModelRouter()
+            _router_pid = os.getpid()
+        return _router
+
+class RoutedModel:
+    """Drop-in for genai.GenerativeModel in an agent: generate_content goes through the router"""
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    def generate_content(self, prompt):
+        return get_model_router().generate(self.agent, prompt)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show model routing")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("routes", help="Which tier and model each agent uses")
+    classify_parser = subparsers.add_parser("classify", help="Run the local classifier on a message")
+    classify_parser.add_argument("message")
+    args = parser.parse_args(argv)
+
+    if args.command == "routes":
+        backends = default_backends()
+        for agent, tier in sorted(default_routes().items()):
+            backend = backends[tier]
+            print(f"{agent:>16} {tier:>6} {getattr(backend, 'model_name', 'local')}")
+    else:
+        print(classify_message(f'User\'s current message: "{args.message}"\n'))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
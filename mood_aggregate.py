@@ -0,0 +1,223 @@
+import os
+import time
+import threading
+from datetime import date as date_cls
+import numpy as np
+import pandas as pd
+from utils import get_user_data_path
+from storage import locked, atomic_write
+
+MOOD_LABELS = ["Very Low", "Low", "Neutral", "Good", "Excellent"]
+MOOD_VALUES = {label: i + 1 for i, label in enumerate(MOOD_LABELS)}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _get_aggregate_path(username):
+    return get_user_data_path(f"mood_data/{username}_daily.npz")
+
+class DailyMoodAggregate:
+    """Per-day mood aggregate backed by NumPy arrays.
+
+    Rows are kept sorted by day ordinal. Each row holds the entry count, the
+    sum of mood values and per-label counts; min, max and the most frequent
+    label are derived from the label counts, so removing an entry never
+    needs the raw journal. version is bumped on every change.
+
+    Aggregates returned by get_daily_aggregate are shared by every session
+    in the process and are never changed in place: writers change a copy()
+    and save it, which swaps it in. Adding a day inserts a row, so it costs
+    O(days) like the save that follows.
+    """
+
+    def __init__(self, days=None, label_counts=None, version=0):
+        self.days = np.asarray(days if days is not None else [], dtype=np.int32)
+        self.label_counts = np.asarray(
+            label_counts if label_counts is not None else np.zeros((0, len(MOOD_LABELS))), dtype=np.int32
+        ).reshape(-1, len(MOOD_LABELS))
+        self.version = int(version)
+        self._rows = {int(day): i for i, day in enumerate(self.days)}
+
+    def __len__(self):
+        return len(self.days)
+
+    def copy(self):
+        return DailyMoodAggregate(self.days.copy(), self.label_counts.copy(), self.version)
+
+    @property
+    def count(self):
+        return self.label_counts.sum(axis=1)
+
+    @property
+    def sum(self):
+        return self.label_counts @ np.arange(1, len(MOOD_LABELS) + 1, dtype=np.int32)
+
+    @property
+    def min(self):
+        return np.where(self.count > 0, np.argmax(self.label_counts > 0, axis=1) + 1, 0)
+
+    @property
+    def max(self):
+        reversed_first = np.argmax(self.label_counts[:, ::-1] > 0, axis=1)
+        return np.where(self.count > 0, len(MOOD_LABELS) - reversed_first, 0)
+
+    @property
+    def top_label(self):
+        """Index into MOOD_LABELS of the most frequent mood per day (ties go to the lower mood)"""
+        return np.argmax(self.label_counts, axis=1)
+
+    def _insert_day(self, ordinal):
+        position = int(np.searchsorted(self.days, ordinal))
+        self.days = np.insert(self.days, position, ordinal)
+        self.label_counts = np.insert(self.label_counts, position, 0, axis=0)
+        if position == len(self.days) - 1:
+            self._rows[ordinal] = position
+        else:
+            self._rows = {int(day): i for i, day in enumerate(self.days)}
+        return position
+
+    def add(self, day, mood, delta=1):
+        """Add (or with delta=-1, remove) one entry with the given mood on day (a date or YYYY-MM-DD)"""
+        if mood not in MOOD_VALUES:
+            return False
+        if isinstance(day, str):
+            day = date_cls.fromisoformat(day[:10])
+        ordinal = day.toordinal()
+
+        row = self._rows.get(ordinal)
+        if row is None:
+            if delta < 0:
+                return False
+            row = self._insert_day(ordinal)
+
+        column = MOOD_VALUES[mood] - 1
+        self.label_counts[row, column] = max(self.label_counts[row, column] + delta, 0)
+        self.version += 1
+        return True
+
+    def _range_mask(self, start=None, end=None):
+        mask = self.count > 0
+        if start is not None:
+            mask &= self.days >= pd.Timestamp(start).toordinal()
+        if end is not None:
+            mask &= self.days <= pd.Timestamp(end).toordinal()
+        return mask
+
+    def dates(self, mask=None):
+        days = self.days if mask is None else self.days[mask]
+        # Ordinal 719163 is 1970-01-01
+        return pd.to_datetime((days - 719163).astype("int64"), unit="D")
+
+    def daily_mean(self, start=None, end=None):
+        """Series of the daily mean mood value indexed by date"""
+        mask = self._range_mask(start, end)
+        return pd.Series(self.sum[mask] / self.count[mask], index=self.dates(mask), name="mood_value")
+
+    def summary(self, start=None, end=None):
+        """Entry-weighted average, most common mood (with its entry count) and days logged in a range"""
+        mask = self._range_mask(start, end)
+        if not mask.any():
+            return None
+        totals = self.label_counts[mask].sum(axis=0)
+        top = int(np.argmax(totals))
+        return {
+            "average": float(self.sum[mask].sum() / totals.sum()),
+            "most_common": MOOD_LABELS[top],
+            "most_common_count": int(totals[top]),
+            "days_logged": int(mask.sum()),
+            "entries": int(totals.sum())
+        }
+
+    def to_frame(self):
+        """All per-day columns (days with entries only) as a DataFrame"""
+        mask = self.count > 0
+        return pd.DataFrame({
+            "date": self.dates(mask),
+            "count": self.count[mask],
+            "sum": self.sum[mask],
+            "min": self.min[mask],
+            "max": self.max[mask],
+            "top_mood": np.array(MOOD_LABELS, dtype=object)[self.top_label[mask]]
+        })
+
+def build_daily_aggregate(entries):
+    """Build an aggregate from raw journal entries"""
+    # Start from a clock-based version so a rebuilt aggregate never reuses
+    # a version number handed out before
+    aggregate = DailyMoodAggregate(version=time.time_ns() // 1000)
+    for entry in sorted(entries, key=lambda e: e.get("date") or e["timestamp"][:10]):
+        aggregate.add(entry.get("date") or entry["timestamp"][:10], entry.get("mood"))
+    return aggregate
+
+def save_daily_aggregate(username, aggregate):
+    path = _get_aggregate_path(username)
+    with atomic_write(path, 'wb') as f:
+        np.savez(f, days=aggregate.days, label_counts=aggregate.label_counts, version=np.int64(aggregate.version))
+    with _cache_lock:
+        _cache[username] = (os.path.getmtime(path), aggregate)
+
+def _load_daily_aggregate(username):
+    """The stored aggregate (from the cache when the file is unchanged), or None if there is none"""
+    path = _get_aggregate_path(username)
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    with _cache_lock:
+        cached = _cache.get(username)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        with np.load(path) as data:
+            aggregate = DailyMoodAggregate(data["days"], data["label_counts"], int(data["version"]))
+    except Exception as e:
+        print(f"Error loading mood aggregate for {username}, rebuilding: {e}")
+        return None
+    with _cache_lock:
+        _cache[username] = (mtime, aggregate)
+    return aggregate
+
+def get_daily_aggregate(username):
+    """Get a user's daily mood aggregate, building it from the journal if it does not exist yet"""
+    aggregate = _load_daily_aggregate(username)
+    if aggregate is not None:
+        return aggregate
+
+    # Imported here because journal updates this module on every write
+    from journal import get_journal_entries, _journal_lock
+    # Journal writes update the aggregate while holding the journal lock, so
+    # building under it too means no write lands between reading the journal
+    # and saving what was built from it
+    with _journal_lock(username), locked(f"mood-daily-{username}"):
+        aggregate = _load_daily_aggregate(username)
+        if aggregate is None:
+            aggregate = build_daily_aggregate(get_journal_entries(username))
+            save_daily_aggregate(username, aggregate)
+    return aggregate
+
+def update_daily_aggregate(username, added=None, removed=None):
+    """Apply added/removed journal entries to the stored aggregate (callers hold the journal lock)"""
+    # Reload under the lock so changes saved by another worker are not lost.
+    # The change is made on a copy so readers of the cached aggregate never
+    # see it half-applied, and a failed save leaves the cache as it was.
+    with locked(f"mood-daily-{username}"):
+        aggregate = _load_daily_aggregate(username)
+        if aggregate is None:
+            # Built from the journal (which already includes this change) on first read
+            return
+        aggregate = aggregate.copy()
+        changed = False
+        for entry in added or []:
+            changed |= aggregate.add(entry.get("date") or entry["timestamp"][:10], entry.get("mood"))
+        for entry in removed or []:
+            changed |= aggregate.add(entry.get("date") or entry["timestamp"][:10], entry.get("mood"), delta=-1)
+        if changed:
+            save_daily_aggregate(username, aggregate)
+
+def reset_daily_aggregate(username):
+    """Drop the stored aggregate so it is rebuilt from the journal on next read"""
+    path = _get_aggregate_path(username)
+    with locked(f"mood-daily-{username}"):
+        if os.path.exists(path):
+            os.remove(path)
+        with _cache_lock:
+            _cache.pop(username, None)
@@ -0,0 +1,137 @@
+import threading
+from collections import OrderedDict
+from datetime import date as date_cls
+import numpy as np
+import pandas as pd
+
+WEEKDAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# Results are cached per (username, aggregate version); old versions fall out
+MAX_CACHED_RESULTS = 64
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _window_mean(cum_sum, cum_count, window):
+    """Entry-weighted trailing mean over `window` days from cumulative sums (NaN where no entries)"""
+    sums = cum_sum[window:] - cum_sum[:-window]
+    counts = cum_count[window:] - cum_count[:-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+def _rolling_mean(cum_sum, cum_count, window):
+    """Trailing rolling mean aligned to each day (NaN for the first window - 1 days)"""
+    n = len(cum_sum) - 1
+    if n < window:
+        return np.full(n, np.nan)
+    return np.concatenate((np.full(window - 1, np.nan), _window_mean(cum_sum, cum_count, window)))
+
+def _streaks(logged):
+    """Lengths and end positions of consecutive runs of logged days"""
+    padded = np.concatenate(([False], logged, [False])).astype(np.int8)
+    edges = np.diff(padded)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return ends - starts, ends - 1
+
+def _change_points(cum_sum, cum_count, window, threshold):
+    """Days where the mean of the next `window` days differs from the previous `window` days by >= threshold"""
+    n = len(cum_sum) - 1
+    if n < 2 * window:
+        return []
+    positions = np.arange(window, n - window + 1)
+    before_sum = cum_sum[positions] - cum_sum[positions - window]
+    before_count = cum_count[positions] - cum_count[positions - window]
+    after_sum = cum_sum[positions + window] - cum_sum[positions]
+    after_count = cum_count[positions + window] - cum_count[positions]
+
+    valid = (before_count >= window // 3) & (after_count >= window // 3)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shift = np.where(valid, after_sum / np.maximum(after_count, 1) - before_sum / np.maximum(before_count, 1), 0.0)
+
+    # Keep only the strongest shift within each `window`-day neighbourhood
+    candidates = np.flatnonzero(np.abs(shift) >= threshold)
+    hints = []
+    for i in candidates[np.argsort(-np.abs(shift[candidates]))]:
+        if all(abs(int(i) - j) >= window for j, _ in hints):
+            hints.append((int(i), float(shift[i])))
+    return sorted((positions[i], delta) for i, delta in hints)
+
+def compute_mood_analytics(aggregate, today=None, change_window=14, change_threshold=1.0):
+    """Compute trend statistics from a DailyMoodAggregate.
+
+    Returns a dict with a daily "trend" DataFrame (mean, 7- and 30-day
+    rolling means), "weekday" averages, "current_streak"/"longest_streak"
+    (consecutive days with at least one entry) and "change_points" hints.
+    """
+    counts_by_day = aggregate.count
+    mask = counts_by_day > 0
+    if not mask.any():
+        return None
+
+    today = today or date_cls.today()
+    days = aggregate.days[mask]
+    first = int(days[0])
+    last = max(int(days[-1]), today.toordinal())
+    n = last - first + 1
+
+    # Dense per-day arrays from the first logged day through today
+    day_sum = np.zeros(n)
+    day_count = np.zeros(n)
+    day_sum[days - first] = aggregate.sum[mask]
+    day_count[days - first] = counts_by_day[mask]
+
+    cum_sum = np.concatenate(([0.0], np.cumsum(day_sum)))
+    cum_count = np.concatenate(([0.0], np.cumsum(day_count)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        daily_mean = np.where(day_count > 0, day_sum / np.maximum(day_count, 1), np.nan)
+
+    dates = pd.to_datetime(np.arange(first, last + 1) - 719163, unit="D")
+    trend = pd.DataFrame({
+        "date": dates,
+        "mood_value": daily_mean,
+        "rolling_7": _rolling_mean(cum_sum, cum_count, 7),
+        "rolling_30": _rolling_mean(cum_sum, cum_count, 30)
+    })
+
+    # Per-weekday averages (Monday=0), weighted by entries
+    weekdays = (np.arange(first, last + 1) - 1) % 7
+    weekday_sum = np.bincount(weekdays, weights=day_sum, minlength=7)
+    weekday_count = np.bincount(weekdays, weights=day_count, minlength=7)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weekday_mean = np.where(weekday_count > 0, weekday_sum / np.maximum(weekday_count, 1), np.nan)
+    weekday = pd.DataFrame({"weekday": WEEKDAY_NAMES, "mood_value": weekday_mean, "entries": weekday_count.astype(int)})
+
+    lengths, ends = _streaks(day_count > 0)
+    today_position = today.toordinal() - first
+    # A streak is still current if it ends today or yesterday
+    current = [length for length, end in zip(lengths, ends) if end >= today_position - 1]
+
+    change_points = [
+        {"date": dates[position].date(), "shift": delta}
+        for position, delta in _change_points(cum_sum, cum_count, change_window, change_threshold)
+    ]
+
+    return {
+        "trend": trend,
+        "weekday": weekday,
+        "current_streak": int(current[-1]) if current else 0,
+        "longest_streak": int(lengths.max()) if len(lengths) else 0,
+        "change_points": change_points
+    }
+
+def get_mood_analytics(username, aggregate):
+    """compute_mood_analytics cached by (username, aggregate version, day)"""
+    key = (username, aggregate.version, date_cls.today())
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    result = compute_mood_analytics(aggregate)
+
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > MAX_CACHED_RESULTS:
+            _cache.popitem(last=False)
+    return result
@@ -0,0 +1,237 @@
+import os
+import json
+from datetime import datetime, timedelta
+from utils import get_user_data_path
+from storage import locked, write_json
+from mood_aggregate import get_daily_aggregate, MOOD_LABELS
+
+# Points newer than RAW_RETENTION_DAYS are kept as-is; older ones are rolled
+# up per day, and days older than DAILY_RETENTION_DAYS per ISO week. Nothing
+# is ever dropped, but storage grows by at most one row per source per week
+# once data is old.
+RAW_RETENTION_DAYS = 30
+DAILY_RETENTION_DAYS = 365
+
+SOURCES = ("chat", "journal")
+# Only chat points are written to the store file. Journal moods are already
+# kept per day by the journal's daily aggregate (mood_aggregate.py), which
+# every journal write updates, so the series reads them from there and a
+# journal mood is never stored twice.
+STORED_SOURCES = ("chat",)
+
+def _get_store_path(username):
+    return get_user_data_path(f"mood_data/{username}_series.json")
+
+def _empty_store():
+    # raw rows: [timestamp, source, label, value]
+    # rollup buckets: "<period start>|<source>" -> {"count", "sum", "min", "max", "labels": {label: n}}
+    return {"raw": [], "daily": {}, "weekly": {}}
+
+def _load_store(username):
+    path = _get_store_path(username)
+    if not os.path.exists(path):
+        return _empty_store()
+    with open(path, 'r') as f:
+        try:
+            return json.load(f)
+        except:
+            return _empty_store()
+
+def _store_lock(username):
+    return locked(f"mood-series-{username}")
+
+def _save_store(username, store):
+    write_json(_get_store_path(username), store, separators=(",", ":"))
+
+def _week_start(day):
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+def _bucket_add(buckets, key, label, value, delta=1):
+    bucket = buckets.get(key)
+    if bucket is None:
+        if delta < 0:
+            return False
+        bucket = buckets[key] = {"count": 0, "sum": 0, "min": value, "max": value, "labels": {}}
+    bucket["count"] += delta
+    bucket["sum"] += delta * value
+    if delta > 0:
+        bucket["min"] = min(bucket["min"], value)
+        bucket["max"] = max(bucket["max"], value)
+    if label:
+        bucket["labels"][label] = bucket["labels"].get(label, 0) + delta
+        if bucket["labels"][label] <= 0:
+            del bucket["labels"][label]
+    if bucket["count"] <= 0:
+        del buckets[key]
+    return True
+
+def _tier_for(timestamp, now):
+    age = now - timestamp
+    if age <= timedelta(days=RAW_RETENTION_DAYS):
+        return "raw"
+    if age <= timedelta(days=DAILY_RETENTION_DAYS):
+        return "daily"
+    return "weekly"
+
+def _add_to_tier(store, tier, timestamp, source, label, value, delta=1):
+    if tier == "daily":
+        return _bucket_add(store["daily"], f"{timestamp.date().isoformat()}|{source}", label, value, delta)
+    return _bucket_add(store["weekly"], f"{_week_start(timestamp.date())}|{source}", label, value, delta)
+
+def _compact(store, now):
+    """Roll raw points and daily buckets that have aged out into the next tier"""
+    raw_cutoff = (now - timedelta(days=RAW_RETENTION_DAYS)).isoformat(timespec="seconds")
+    kept = []
+    for row in store["raw"]:
+        if row[0] >= raw_cutoff:
+            kept.append(row)
+        else:
+            timestamp = datetime.fromisoformat(row[0])
+            _add_to_tier(store, _tier_for(timestamp, now), timestamp, row[1], row[2], row[3])
+    store["raw"] = kept
+
+    daily_cutoff = (now - timedelta(days=DAILY_RETENTION_DAYS)).date().isoformat()
+    for key in [k for k in store["daily"] if k.split("|")[0] < daily_cutoff]:
+        day, source = key.split("|")
+        bucket = store["daily"].pop(key)
+        weekly_key = f"{_week_start(datetime.fromisoformat(day).date())}|{source}"
+        target = store["weekly"].get(weekly_key)
+        if target is None:
+            store["weekly"][weekly_key] = bucket
+        else:
+            target["count"] += bucket["count"]
+            target["sum"] += bucket["sum"]
+            target["min"] = min(target["min"], bucket["min"])
+            target["max"] = max(target["max"], bucket["max"])
+            for label, n in bucket["labels"].items():
+                target["labels"][label] = target["labels"].get(label, 0) + n
+
+def record_mood_points(username, points, now=None):
+    """Record mood points: dicts with source (one of STORED_SOURCES), label, value (1-5) and optional timestamp.
+
+    Points are filed into the tier matching their age, so back-dated
+    imports go straight into the rollups.
+    """
+    if not points:
+        return
+    for point in points:
+        if point["source"] not in STORED_SOURCES:
+            raise ValueError(f"{point['source']} moods are not recorded here (see STORED_SOURCES)")
+    now = now or datetime.now()
+    with _store_lock(username):
+        store = _load_store(username)
+        for point in points:
+            timestamp = point.get("timestamp") or now
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp)
+            timestamp = timestamp.replace(microsecond=0, tzinfo=None)
+            tier = _tier_for(timestamp, now)
+            if tier == "raw":
+                store["raw"].append([timestamp.isoformat(timespec="seconds"), point["source"], point.get("label"), point["value"]])
+            else:
+                _add_to_tier(store, tier, timestamp, point["source"], point.get("label"), point["value"])
+        store["raw"].sort(key=lambda row: row[0])
+        _compact(store, now)
+        _save_store(username, store)
+
+def record_mood_point(username, source, label, value, timestamp=None):
+    """Record a single mood point (see record_mood_points)"""
+    record_mood_points(username, [{"source": source, "label": label, "value": value, "timestamp": timestamp}])
+
+def remove_mood_point(username, source, label, value, timestamp):
+    """Remove a previously recorded point, from whichever tier now holds it"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    timestamp = timestamp.replace(microsecond=0, tzinfo=None)
+    key = [timestamp.isoformat(timespec="seconds"), source, label, value]
+    with _store_lock(username):
+        store = _load_store(username)
+        if key in store["raw"]:
+            store["raw"].remove(key)
+        elif not _add_to_tier(store, "daily", timestamp, source, label, value, delta=-1):
+            _add_to_tier(store, "weekly", timestamp, source, label, value, delta=-1)
+        _save_store(username, store)
+
+def get_mood_series(username, source=None, start=None, end=None):
+    """Get mood points oldest first at the best resolution kept for each period.
+
+    Each item has timestamp (period start for rollups), resolution ("raw",
+    "daily" or "weekly"), source, count, mean, min, max and labels
+    ({label: count}). start/end are optional datetimes. Journal moods come
+    from the journal's daily aggregate, one "daily" item per day.
+    """
+    store = _load_store(username)
+    series = []
+
+    if source in (None, "journal"):
+        aggregate = get_daily_aggregate(username)
+        mask = aggregate.count > 0
+        if start is not None:
+            mask &= aggregate.days >= start.toordinal()
+        if end is not None:
+            mask &= aggregate.days <= end.toordinal()
+        for day, count, total, low, high, label_counts in zip(
+            aggregate.dates(mask), aggregate.count[mask], aggregate.sum[mask],
+            aggregate.min[mask], aggregate.max[mask], aggregate.label_counts[mask]
+        ):
+            series.append({
+                "timestamp": day.to_pydatetime(),
+                "resolution": "daily",
+                "source": "journal",
+                "count": int(count),
+                "mean": float(total / count),
+                "min": int(low),
+                "max": int(high),
+                "labels": {label: int(n) for label, n in zip(MOOD_LABELS, label_counts) if n}
+            })
+
+    for resolution in ("weekly", "daily"):
+        for key, bucket in store[resolution].items():
+            period, bucket_source = key.split("|")
+            series.append({
+                "timestamp": datetime.fromisoformat(period),
+                "resolution": resolution,
+                "source": bucket_source,
+                "count": bucket["count"],
+                "mean": bucket["sum"] / bucket["count"],
+                "min": bucket["min"],
+                "max": bucket["max"],
+                "labels": dict(bucket["labels"])
+            })
+
+    for timestamp, row_source, label, value in store["raw"]:
+        series.append({
+            "timestamp": datetime.fromisoformat(timestamp),
+            "resolution": "raw",
+            "source": row_source,
+            "count": 1,
+            "mean": value,
+            "min": value,
+            "max": value,
+            "labels": {label: 1} if label else {}
+        })
+
+    series = [
+        item for item in series
+        if (source is None or item["source"] == source)
+        and (start is None or item["timestamp"] >= start)
+        and (end is None or item["timestamp"] <= end)
+    ]
+    series.sort(key=lambda item: item["timestamp"])
+    return series
+
+def summarize_mood_series(series):
+    """Label counts, average value and number of points across a series"""
+    labels = {}
+    total = 0
+    value_sum = 0
+    for item in series:
+        total += item["count"]
+        value_sum += item["mean"] * item["count"]
+        for label, n in item["labels"].items():
+            labels[label] = labels.get(label, 0) + n
+    return {
+        "labels": labels,
+        "average": value_sum / total if total else None,
+        "count": total
+    }
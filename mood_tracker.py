@@ -1,39 +1,85 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from datetime import datetime, timedelta
+from datetime import datetime
 import calendar
-from utils import get_user_data_path
-from journal import get_journal_entries
-
-def get_mood_data(username):
-    """Extract mood data from journal entries"""
-    entries = get_journal_entries(username)
-    
-    # Convert mood to numeric
-    mood_map = {
-        "Very Low": 1,
-        "Low": 2,
-        "Neutral": 3,
-        "Good": 4,
-        "Excellent": 5
-    }
-    
-    mood_data = []
-    for entry in entries:
-        if "mood" in entry and entry["mood"] and "date" in entry:
-            mood_data.append({
-                "date": entry["date"],
-                "mood": entry["mood"],
-                "mood_value": mood_map.get(entry["mood"], 3),
-                "timestamp": entry["timestamp"]
-            })
-    
-    return mood_data
+import threading
+from collections import OrderedDict
+from mood_aggregate import get_daily_aggregate
+from mood_analytics import get_mood_analytics
+
+# Vega-Lite specs keyed by (username, chart kind, period..., data version)
+MAX_CACHED_CHART_SPECS = 128
+
+_chart_spec_cache = OrderedDict()
+_chart_spec_lock = threading.Lock()
+chart_cache_stats = {"hits": 0, "misses": 0}
+
+def get_chart_spec(key, build_chart):
+    """Get a cached Vega-Lite spec, calling build_chart() only on a miss.
+
+    key must include the aggregate's data version so journal writes
+    invalidate it. Caching the spec rather than the Altair chart saves the
+    chart.to_dict() call (and its schema validation) st.altair_chart makes
+    on every rerun; Streamlit still serializes the inline datasets, which
+    are stored as DataFrames for that. See benchmarks/bench_chart_cache.py.
+    Returns None if build_chart returns None.
+    """
+    with _chart_spec_lock:
+        if key in _chart_spec_cache:
+            _chart_spec_cache.move_to_end(key)
+            chart_cache_stats["hits"] += 1
+            return _chart_spec_cache[key]
+        chart_cache_stats["misses"] += 1
+
+    chart = build_chart()
+    spec = None
+    if chart is not None:
+        spec = chart.to_dict()
+        for name, values in spec.get("datasets", {}).items():
+            spec["datasets"][name] = pd.DataFrame(values)
+
+    with _chart_spec_lock:
+        _chart_spec_cache[key] = spec
+        while len(_chart_spec_cache) > MAX_CACHED_CHART_SPECS:
+            _chart_spec_cache.popitem(last=False)
+    return spec
+
+def show_chart_spec(spec):
+    """Render a cached spec (streamlit pops keys off the top level, so pass a copy)"""
+    st.vega_lite_chart(dict(spec), use_container_width=True)
+
+def daily_mood_series(mood_data):
+    """Daily mean mood_value indexed by date (multiple entries per day are averaged)"""
+    df = pd.DataFrame(mood_data, columns=["date", "mood", "mood_value", "timestamp"])
+    return df.groupby(pd.to_datetime(df["date"]))["mood_value"].mean()
+
+def build_calendar_frame(mood_data, year, month):
+    """Build the month's calendar grid (one row per day) with the daily mean mood.
+
+    mood_data is either a list of {"date", "mood", "mood_value", "timestamp"}
+    dicts (one per journal entry) or a Series of daily mean mood values
+    indexed by date. The grid is computed in one pass: the daily means are
+    reindexed onto the month's dates and the week/weekday coordinates are
+    derived arithmetically.
+    """
+    first_day = pd.Timestamp(year=year, month=month, day=1)
+    date_range = pd.date_range(start=first_day, periods=first_day.days_in_month, freq="D")
+    
+    daily_mood = mood_data if isinstance(mood_data, pd.Series) else daily_mood_series(mood_data)
+    
+    day = date_range.day.to_numpy()
+    return pd.DataFrame({
+        "date": date_range,
+        "day": day,
+        "day_of_week": date_range.weekday.to_numpy(),  # Monday=0, Sunday=6
+        "week": (day - 1 + first_day.weekday()) // 7,
+        "mood_value": daily_mood.reindex(date_range).to_numpy()
+    })
 
 def create_mood_calendar(mood_data, year=None, month=None):
     """Create a calendar heatmap of mood"""
-    if not mood_data:
+    if mood_data is None:
         return None
     
     # Set default year and month to current if not specified
@@ -42,48 +88,7 @@ def create_mood_calendar(mood_data, year=None, month=None):
         year = now.year
         month = now.month
     
-    # Convert to dataframe
-    df = pd.DataFrame(mood_data)
-    df["date"] = pd.to_datetime(df["date"])
-    
-    # Filter to the selected month
-    df = df[
-        (df["date"].dt.year == year) & 
-        (df["date"].dt.month == month)
-    ]
-    
-    # If multiple entries per day, use the average
-    daily_mood = df.groupby("date")["mood_value"].mean().reset_index()
-    
-    # Create the calendar data
-    cal_data = []
-    
-    # Get the first day of the month and the number of days
-    first_day = datetime(year, month, 1)
-    last_day = first_day.replace(day=calendar.monthrange(year, month)[1])
-    
-    # Create a date range for the entire month
-    date_range = pd.date_range(start=first_day, end=last_day)
-    
-    # Calculate week and day coordinates for the calendar
-    for date in date_range:
-        day_of_week = date.weekday()  # Monday=0, Sunday=6
-        week_num = (date.day - 1 + first_day.weekday()) // 7
-        
-        # Find mood for this date if it exists
-        mood_entry = daily_mood[daily_mood["date"] == pd.Timestamp(date)]
-        mood_value = mood_entry["mood_value"].values[0] if not mood_entry.empty else None
-        
-        cal_data.append({
-            "date": date,
-            "day": date.day,
-            "day_of_week": day_of_week,
-            "week": week_num,
-            "mood_value": mood_value
-        })
-    
-    # Convert to dataframe
-    cal_df = pd.DataFrame(cal_data)
+    cal_df = build_calendar_frame(mood_data, year, month)
     
     # Create the calendar grid with fixed labelExpr
     calendar_heatmap = alt.Chart(cal_df).mark_rect().encode(
@@ -116,22 +121,100 @@ def create_mood_calendar(mood_data, year=None, month=None):
     
     return calendar_heatmap + day_labels
 
+def build_year_frame(aggregate, years):
+    """One row per logged day in the given years, with GitHub-style week/weekday coordinates.
+
+    Only aggregated cells are produced (at most 366 per year), whatever the
+    number of underlying journal entries.
+    """
+    frames = []
+    for year in years:
+        daily = aggregate.daily_mean(f"{year:04d}-01-01", f"{year:04d}-12-31")
+        if daily.empty:
+            continue
+        jan_first_weekday = pd.Timestamp(year=year, month=1, day=1).weekday()
+        frames.append(pd.DataFrame({
+            "year": year,
+            "date": daily.index,
+            "week": (daily.index.dayofyear.to_numpy() - 1 + jan_first_weekday) // 7,
+            "day_of_week": daily.index.weekday.to_numpy(),
+            "mood_value": daily.to_numpy().round(2)
+        }))
+    if not frames:
+        return pd.DataFrame(columns=["year", "date", "week", "day_of_week", "mood_value"])
+    return pd.concat(frames, ignore_index=True)
+
+def create_year_heatmap(aggregate, years):
+    """Create a year-at-a-glance heatmap (one row of weeks per year)"""
+    year_df = build_year_frame(aggregate, years)
+    if year_df.empty:
+        return None
+    
+    return alt.Chart(year_df).mark_rect(cornerRadius=2).encode(
+        x=alt.X('week:O', axis=alt.Axis(title=None, labels=False, ticks=False)),
+        y=alt.Y('day_of_week:O',
+                axis=alt.Axis(title=None, values=[0, 2, 4],
+                              labelExpr="['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'][datum.value]")),
+        color=alt.Color('mood_value:Q',
+                       scale=alt.Scale(domain=[1, 5], range=['#ff9999', '#99ff99']),
+                       legend=alt.Legend(title="Mood",
+                                        values=[1, 2, 3, 4, 5],
+                                        labelExpr="['Very Low', 'Low', 'Neutral', 'Good', 'Excellent'][datum.value-1]")),
+        tooltip=['date:T', 'mood_value:Q']
+    ).properties(
+        width=700,
+        height=120
+    ).facet(
+        row=alt.Row('year:O', title=None, sort='descending')
+    )
+
 def mood_tracker_page():
     """Display the mood tracker interface"""
     st.title("📊 Mood Calendar")
     
-    # Get mood data
-    mood_data = get_mood_data(st.session_state.username)
+    # Per-day aggregate maintained on every journal write
+    aggregate = get_daily_aggregate(st.session_state.username)
     
-    if not mood_data:
+    if not aggregate.count.any():
         st.info("No mood data available yet. Start adding mood to your journal entries to see your mood on the calendar.")
         return
     
-    # Month and year selection
+    # Year range comes from the data instead of a fixed window
     now = datetime.now()
-    years = list(range(now.year - 2, now.year + 1))
+    first_year = min(aggregate.dates(aggregate.count > 0)[0].year, now.year)
+    years = list(range(first_year, now.year + 1))
     months = list(range(1, 13))
     
+    view = st.radio("View", ["Month", "Year", "All years"], horizontal=True, key="mood_view")
+    
+    if view == "Month":
+        show_month_view(aggregate, years, months, now)
+    else:
+        if view == "Year":
+            selected_year = st.selectbox("Year", years, index=len(years) - 1, key="heatmap_year")
+            heatmap_years = [selected_year]
+        else:
+            heatmap_years = years
+        
+        year_heatmap = get_chart_spec(
+            (st.session_state.username, "year", tuple(heatmap_years), aggregate.version),
+            lambda: create_year_heatmap(aggregate, heatmap_years)
+        )
+        if year_heatmap:
+            show_chart_spec(year_heatmap)
+        else:
+            st.write("No mood data available for this period.")
+        
+        summary = aggregate.summary(f"{heatmap_years[0]:04d}-01-01", f"{heatmap_years[-1]:04d}-12-31")
+        if summary:
+            period = str(heatmap_years[0]) if len(heatmap_years) == 1 else f"{heatmap_years[0]}-{heatmap_years[-1]}"
+            st.write(f"Average mood for {period}: **{summary['average']:.1f}/5** "
+                     f"across **{summary['days_logged']}** logged days")
+    
+    show_mood_trends(st.session_state.username, aggregate)
+
+def show_month_view(aggregate, years, months, now):
+    """Display the single-month calendar with its summary"""
     col1, col2 = st.columns(2)
     with col1:
         selected_year = st.selectbox("Year", years, index=years.index(now.year))
@@ -140,10 +223,16 @@ def mood_tracker_page():
         selected_month = st.selectbox("Month", months, index=now.month - 1, 
                                      format_func=lambda m: calendar.month_name[m])
     
+    month_start = f"{selected_year:04d}-{selected_month:02d}-01"
+    month_end = f"{selected_year:04d}-{selected_month:02d}-{calendar.monthrange(selected_year, selected_month)[1]:02d}"
+    
     # Display calendar
-    mood_calendar = create_mood_calendar(mood_data, selected_year, selected_month)
+    mood_calendar = get_chart_spec(
+        (st.session_state.username, "month", selected_year, selected_month, aggregate.version),
+        lambda: create_mood_calendar(aggregate.daily_mean(month_start, month_end), selected_year, selected_month)
+    )
     if mood_calendar:
-        st.altair_chart(mood_calendar, use_container_width=True)
+        show_chart_spec(mood_calendar)
     
     # Simple legend explanation
     st.markdown("""
@@ -155,27 +244,82 @@ def mood_tracker_page():
     
     # Add a simple monthly summary
     with st.expander("Monthly Summary"):
-        df = pd.DataFrame(mood_data)
-        df["date"] = pd.to_datetime(df["date"])
+        summary = aggregate.summary(month_start, month_end)
         
-        # Filter to selected month
-        month_df = df[
-            (df["date"].dt.year == selected_year) &
-            (df["date"].dt.month == selected_month)
-        ]
-        
-        if not month_df.empty:
-            avg_mood = month_df["mood_value"].mean()
-            
-            st.write(f"Average mood for {calendar.month_name[selected_month]} {selected_year}: **{avg_mood:.1f}/5**")
-            
-            mood_counts = month_df["mood"].value_counts()
-            if not mood_counts.empty:
-                most_common = mood_counts.idxmax()
-                st.write(f"Most common mood: **{most_common}** ({mood_counts[most_common]} days)")
+        if summary:
+            st.write(f"Average mood for {calendar.month_name[selected_month]} {selected_year}: **{summary['average']:.1f}/5**")
+            st.write(f"Most common mood: **{summary['most_common']}** "
+                     f"({summary['most_common_count']} {'entry' if summary['most_common_count'] == 1 else 'entries'})")
             
-            days_logged = month_df["date"].dt.date.nunique()
             days_in_month = calendar.monthrange(selected_year, selected_month)[1]
-            st.write(f"Days logged: **{days_logged}/{days_in_month}** days")
+            st.write(f"Days logged: **{summary['days_logged']}/{days_in_month}** days")
         else:
-            st.write("No mood data available for this month.")
\ No newline at end of file
+            st.write("No mood data available for this month.")
+
+def create_trend_chart(analytics, days=None):
+    """Line chart of daily mood with 7- and 30-day rolling averages over the last `days` days"""
+    trend = analytics["trend"]
+    if days:
+        trend = trend.tail(days)
+    
+    trend_long = trend.melt("date", value_vars=["mood_value", "rolling_7", "rolling_30"],
+                            var_name="series", value_name="mood").dropna()
+    trend_long["series"] = trend_long["series"].map({
+        "mood_value": "Daily", "rolling_7": "7-day average", "rolling_30": "30-day average"
+    })
+    trend_chart = alt.Chart(trend_long).mark_line(point=False).encode(
+        x=alt.X("date:T", title=None),
+        y=alt.Y("mood:Q", scale=alt.Scale(domain=[1, 5]), title="Mood"),
+        color=alt.Color("series:N", title=None),
+        strokeDash=alt.condition(alt.datum.series == "Daily", alt.value([2, 2]), alt.value([1, 0])),
+        tooltip=["date:T", "series:N", alt.Tooltip("mood:Q", format=".1f")]
+    ).properties(height=250)
+    return trend_chart
+
+def create_weekday_chart(analytics):
+    """Bar chart of average mood per weekday"""
+    weekday_chart = alt.Chart(analytics["weekday"].dropna()).mark_bar().encode(
+        x=alt.X("weekday:O", sort=list(analytics["weekday"]["weekday"]), title=None),
+        y=alt.Y("mood_value:Q", scale=alt.Scale(domain=[0, 5]), title="Average mood"),
+        tooltip=["weekday:O", alt.Tooltip("mood_value:Q", format=".2f"), "entries:Q"]
+    ).properties(height=200)
+    return weekday_chart
+
+def show_mood_trends(username, aggregate):
+    """Display rolling averages, logging streaks, weekday patterns and change hints"""
+    analytics = get_mood_analytics(username, aggregate)
+    if not analytics:
+        return
+    
+    st.header("Trends & Patterns")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Current logging streak", f"{analytics['current_streak']} days")
+    with col2:
+        st.metric("Longest logging streak", f"{analytics['longest_streak']} days")
+    
+    # Rolling averages
+    range_days = {"Last 90 days": 90, "Last year": 365, "All time": None}
+    selected_range = st.selectbox("Trend range", list(range_days.keys()), key="trend_range")
+    trend_chart = get_chart_spec(
+        (username, "trend", selected_range, aggregate.version, datetime.now().date()),
+        lambda: create_trend_chart(analytics, range_days[selected_range])
+    )
+    show_chart_spec(trend_chart)
+    
+    # Weekday seasonality
+    weekday_chart = get_chart_spec(
+        (username, "weekday", aggregate.version, datetime.now().date()),
+        lambda: create_weekday_chart(analytics)
+    )
+    st.subheader("Mood by weekday")
+    show_chart_spec(weekday_chart)
+    
+    # Change-point hints
+    if analytics["change_points"]:
+        st.subheader("Notable shifts")
+        for point in analytics["change_points"][-5:]:
+            direction = "improved" if point["shift"] > 0 else "dipped"
+            st.write(f"Around **{point['date'].strftime('%b %d, %Y')}** your mood {direction} "
+                     f"by {abs(point['shift']):.1f} points compared with the two weeks before.")
@@ -0,0 +1,248 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+from contextlib import contextmanager
+from datetime import datetime
+import streamlit as st
+from utils import get_user_data_path
+from storage import locked
+
+# Opt-in timing of every page function call. Turn it on for all sessions with
+# MIND_COMPANION_PROFILE=1 (timings only), =cprofile or =tracemalloc (timings
+# plus a snapshot of the slowest reruns), or per session with the sidebar
+# toggle that appears when the URL has ?profile=1. tracemalloc traces every
+# allocation in the process until it exits, so it is only offered through the
+# environment variable, never from a session's toggle.
+#
+# Each rerun appends one line to user_data/perf/reruns.jsonl (rotated at
+# PERF_LOG_MAX_BYTES, PERF_LOG_BACKUPS old files kept). Snapshots go to
+# user_data/perf/snapshots, keeping the PERF_KEEP_SLOWEST slowest per page.
+# `python profiling.py summary` and `python profiling.py show <file>` read
+# them back.
+PROFILE_ENV = "MIND_COMPANION_PROFILE"
+CAPTURE_MODES = ["off", "cprofile", "tracemalloc"]
+SESSION_CAPTURE_MODES = ["off", "cprofile"]
+PERF_LOG_MAX_BYTES = 1024 * 1024
+PERF_LOG_BACKUPS = 5
+PERF_KEEP_SLOWEST = 5
+# Deeper tracebacks make traced reruns much slower
+TRACEMALLOC_FRAMES = 5
+
+def _get_perf_path(filename):
+    return get_user_data_path(f"perf/{filename}")
+
+def profiling_settings():
+    """(enabled, capture mode) for the current session"""
+    value = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if value in CAPTURE_MODES[1:]:
+        return True, value
+    if value in ("1", "true", "on"):
+        return True, "off"
+    if st.session_state.get("profiling_enabled"):
+        capture = st.session_state.get("profiling_capture", "off")
+        return True, capture if capture in SESSION_CAPTURE_MODES else "off"
+    return False, "off"
+
+def show_profiling_toggle():
+    """Sidebar switch for profiling this session, only shown with ?profile=1 in the URL"""
+    if st.query_params.get("profile") != "1":
+        return
+    st.toggle("Profile page reruns", key="profiling_enabled")
+    if st.session_state.get("profiling_enabled"):
+        st.selectbox("Capture for slow reruns", SESSION_CAPTURE_MODES, key="profiling_capture")
+        last = st.session_state.get("profiling_last")
+        if last:
+            st.caption(f"Last rerun of {last['page']}: {last['wall_ms']:.0f} ms wall, "
+                       f"{last['cpu_ms']:.0f} ms CPU, {last['alloc_blocks']:+d} blocks")
+
+def _rotate(path):
+    for n in range(PERF_LOG_BACKUPS - 1, 0, -1):
+        if os.path.exists(f"{path}.{n}"):
+            os.replace(f"{path}.{n}", f"{path}.{n + 1}")
+    os.replace(path, f"{path}.1")
+
+def log_rerun(record):
+    """Append one rerun record to the perf log, rotating it when it gets too big"""
+    path = _get_perf_path("reruns.jsonl")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with locked("perf-log"):
+        if os.path.exists(path) and os.path.getsize(path) >= PERF_LOG_MAX_BYTES:
+            _rotate(path)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+
+def _snapshot_walls(directory, page):
+    """{filename: wall_ms} of the snapshots kept for a page"""
+    walls = {}
+    for filename in os.listdir(directory):
+        match = re.match(rf"^{re.escape(page)}-(\d+)ms-", filename)
+        if match:
+            walls[filename] = int(match.group(1))
+    return walls
+
+def _save_snapshot(page, wall_ms, extension, write):
+    """Keep a snapshot (written by write(path)) if it is among the PERF_KEEP_SLOWEST slowest for its page"""
+    directory = _get_perf_path("snapshots")
+    os.makedirs(directory, exist_ok=True)
+    with locked("perf-snapshots"):
+        walls = _snapshot_walls(directory, page)
+        if len(walls) >= PERF_KEEP_SLOWEST and wall_ms <= min(walls.values()):
+            return None
+        filename = f"{page}-{int(wall_ms):07d}ms-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}.{extension}"
+        write(os.path.join(directory, filename))
+        walls[filename] = int(wall_ms)
+        for stale in sorted(walls, key=walls.get)[:max(len(walls) - PERF_KEEP_SLOWEST, 0)]:
+            os.remove(os.path.join(directory, stale))
+    return filename
+
+@contextmanager
+def profile_page(page):
+    """Time one page function call when profiling is on.
+
+    Wall and CPU time are for the script thread only. alloc_blocks is the
+    change in live allocated blocks across the whole process, so it also
+    includes other sessions' work when several run at once.
+    """
+    enabled, capture = profiling_settings()
+    if not enabled:
+        yield
+        return
+
+    profiler = None
+    if capture == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another session's profiler is active (only one at a time on 3.12+)
+            profiler = None
+    elif capture == "tracemalloc":
+        # Only set process-wide (see profiling_settings), so tracing is left
+        # on for the life of the process
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    outcome = "ok"
+    start_blocks = sys.getallocatedblocks()
+    start_cpu = time.thread_time()
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        # st.rerun() and st.stop() end a page early by raising
+        outcome = type(e).__name__
+        raise
+    finally:
+        wall_ms = (time.perf_counter() - start) * 1000
+        cpu_ms = (time.thread_time() - start_cpu) * 1000
+        alloc_blocks = sys.getallocatedblocks() - start_blocks
+        if profiler:
+            profiler.disable()
+
+        snapshot = None
+        try:
+            if profiler:
+                snapshot = _save_snapshot(page, wall_ms, "prof", profiler.dump_stats)
+            elif capture == "tracemalloc":
+                import tracemalloc
+                snapshot = _save_snapshot(page, wall_ms, "tracemalloc", lambda path: tracemalloc.take_snapshot().dump(path))
+            record = {
+                "time": datetime.now().isoformat(timespec="milliseconds"),
+                "pid": os.getpid(),
+                "page": page,
+                "wall_ms": round(wall_ms, 2),
+                "cpu_ms": round(cpu_ms, 2),
+                "alloc_blocks": alloc_blocks,
+                "outcome": outcome,
+                "snapshot": snapshot
+            }
+            log_rerun(record)
+            st.session_state.profiling_last = record
+        except Exception as e:
+            print(f"Error recording profile for {page}: {e}")
+
+def read_rerun_log():
+    """All records from the perf log and its rotated copies, oldest first"""
+    path = _get_perf_path("reruns.jsonl")
+    records = []
+    for n in range(PERF_LOG_BACKUPS, -1, -1):
+        current = f"{path}.{n}" if n else path
+        if not os.path.exists(current):
+            continue
+        with open(current, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass  # Torn last line from a crashed worker
+    return records
+
+def summarize_reruns(records):
+    """Per-page count and wall/CPU percentiles"""
+    by_page = {}
+    for record in records:
+        by_page.setdefault(record["page"], []).append(record)
+    summary = {}
+    for page, items in sorted(by_page.items()):
+        walls = sorted(item["wall_ms"] for item in items)
+        summary[page] = {
+            "reruns": len(items),
+            "wall_p50_ms": statistics.median(walls),
+            "wall_p90_ms": walls[min(int(len(walls) * 0.9), len(walls) - 1)],
+            "wall_max_ms": walls[-1],
+            "cpu_mean_ms": statistics.fmean(item["cpu_ms"] for item in items),
+            "alloc_blocks_mean": statistics.fmean(item["alloc_blocks"] for item in items)
+        }
+    return summary
+
+def show_snapshot(path, top=25):
+    """Print the heaviest functions of a cProfile dump or allocation sites of a tracemalloc snapshot"""
+    if path.endswith(".prof"):
+        import pstats
+        pstats.Stats(path).sort_stats("cumulative").print_stats(top)
+    else:
+        import tracemalloc
+        for stat in tracemalloc.Snapshot.load(path).statistics("lineno")[:top]:
+            print(stat)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect page rerun profiles")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("summary", help="Per-page rerun times from the perf log")
+    subparsers.add_parser("snapshots", help="List the kept snapshots, slowest first")
+    show_parser = subparsers.add_parser("show", help="Print the top entries of one snapshot")
+    show_parser.add_argument("snapshot", help="File name in user_data/perf/snapshots or a path")
+    show_parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args(argv)
+
+    if args.command == "summary":
+        summary = summarize_reruns(read_rerun_log())
+        if not summary:
+            print(f"No reruns logged yet; set {PROFILE_ENV}=1 or use ?profile=1")
+            return 0
+        print(f"{'page':>20} {'reruns':>7} {'p50 ms':>8} {'p90 ms':>8} {'max ms':>8} {'cpu ms':>8} {'blocks':>8}")
+        for page, stats in summary.items():
+            print(f"{page:>20} {stats['reruns']:>7} {stats['wall_p50_ms']:>8.1f} {stats['wall_p90_ms']:>8.1f} "
+                  f"{stats['wall_max_ms']:>8.1f} {stats['cpu_mean_ms']:>8.1f} {stats['alloc_blocks_mean']:>8.0f}")
+    elif args.command == "snapshots":
+        directory = _get_perf_path("snapshots")
+        walls = {}
+        for filename in os.listdir(directory) if os.path.isdir(directory) else []:
+            match = re.search(r"-(\d+)ms-", filename)
+            if match:
+                walls[filename] = int(match.group(1))
+        for filename in sorted(walls, key=walls.get, reverse=True):
+            print(filename)
+    else:
+        path = args.snapshot if os.path.exists(args.snapshot) else _get_perf_path(f"snapshots/{args.snapshot}")
+        show_snapshot(path, args.top)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
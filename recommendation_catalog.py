@@ -0,0 +1,173 @@
+import re
+import sys
+import argparse
+from urllib.parse import quote_plus
+
+# Curated recommendations, answered locally so recommendations work without
+# network access and don't wait on a search. Videos and podcasts link to a
+# YouTube search rather than one video, so links don't go stale.
+#
+# states, approaches and keywords say what an item suits; an empty list
+# means it suits any. Keywords are matched against the words of the
+# detected stressors.
+
+def _youtube(query):
+    return f"https://www.youtube.com/results?search_query={quote_plus(query)}"
+
+def _video(category, title, query, snippet, states=(), approaches=(), keywords=()):
+    return {"category": category, "title": title, "link": _youtube(query), "source": "YouTube",
+            "snippet": snippet, "type": "video", "states": list(states), "approaches": list(approaches),
+            "keywords": list(keywords)}
+
+def _article(title, link, source, snippet, states=(), approaches=(), keywords=()):
+    return {"category": "mental_health_articles", "title": title, "link": link, "source": source,
+            "snippet": snippet, "type": "web", "states": list(states), "approaches": list(approaches),
+            "keywords": list(keywords)}
+
+CATALOG = [
+    # Meditation
+    _video("meditation", "5-minute guided breathing meditation", "5 minute guided breathing meditation",
+           "A short breath-focused practice to settle the body.", states=["stressed", "anxious", "overwhelmed"]),
+    _video("meditation", "Guided body scan meditation", "guided body scan meditation 10 minutes",
+           "Notice and release tension from head to toe.", states=["stressed", "angry"], approaches=["Mindfulness"]),
+    _video("meditation", "Self-compassion meditation", "self compassion guided meditation",
+           "Meet difficult feelings with kindness.", states=["sad", "overwhelmed"], approaches=["ACT", "Mindfulness"]),
+    _video("meditation", "Loving-kindness meditation", "loving kindness guided meditation",
+           "Build warmth toward yourself and others.", states=["sad", "angry"], keywords=["lonely", "loneliness", "relationship"]),
+    _video("meditation", "Guided sleep meditation", "guided sleep meditation for anxiety",
+           "Wind down and quiet racing thoughts before bed.", states=["anxious"], keywords=["sleep", "insomnia", "night"]),
+    _video("meditation", "Grounding meditation for panic", "5 4 3 2 1 grounding meditation",
+           "Use your senses to come back to the present moment.", states=["anxious", "overwhelmed"], keywords=["panic"]),
+    _video("meditation", "Short mindfulness meditation", "10 minute mindfulness meditation",
+           "A simple practice for any moment of the day."),
+
+    # Therapy technique videos
+    _video("therapy_resources", "Challenging negative thoughts (CBT)", "CBT thought record how to challenge negative thoughts",
+           "Catch, check and change unhelpful thinking.", approaches=["CBT"], states=["sad", "anxious"]),
+    _video("therapy_resources", "CBT techniques for anxiety", "CBT techniques for anxiety",
+           "Practical cognitive behavioural tools for worry.", approaches=["CBT"], states=["anxious"], keywords=["worry", "panic"]),
+    _video("therapy_resources", "CBT for work stress", "CBT techniques for work stress",
+           "Reframe pressure at work and plan manageable steps.", approaches=["CBT"],
+           keywords=["work", "job", "boss", "deadline", "deadlines", "career"]),
+    _video("therapy_resources", "Beating procrastination with CBT", "CBT for procrastination and study stress",
+           "Break tasks down and get started.", approaches=["CBT"], keywords=["exam", "exams", "school", "study", "college", "university"]),
+    _video("therapy_resources", "Behavioural activation for low mood", "behavioral activation for depression explained",
+           "Small, planned activities that lift mood.", approaches=["CBT"], states=["sad"]),
+    _video("therapy_resources", "DBT TIPP skills", "DBT TIPP skills distress tolerance",
+           "Fast ways to bring down intense emotion.", approaches=["DBT"], states=["angry", "overwhelmed"]),
+    _video("therapy_resources", "DBT emotion regulation skills", "DBT emotion regulation skills",
+           "Understand and change emotional responses.", approaches=["DBT"], states=["angry", "sad"]),
+    _video("therapy_resources", "DBT interpersonal effectiveness (DEAR MAN)", "DBT DEAR MAN interpersonal effectiveness",
+           "Ask for what you need and keep relationships healthy.", approaches=["DBT"],
+           keywords=["relationship", "partner", "family", "friend", "friends", "conflict"]),
+    _video("therapy_resources", "ACT cognitive defusion", "ACT cognitive defusion exercises",
+           "Step back from sticky thoughts.", approaches=["ACT"], states=["anxious", "sad"]),
+    _video("therapy_resources", "ACT values clarification", "acceptance and commitment therapy values exercise",
+           "Reconnect with what matters to you.", approaches=["ACT"], keywords=["purpose", "career", "future"]),
+    _video("therapy_resources", "Coping with grief", "coping with grief therapist advice",
+           "Understanding and moving through loss.", keywords=["grief", "loss", "death", "bereavement"]),
+    _video("therapy_resources", "Managing money worries", "how to cope with financial stress",
+           "Steps for when money is a source of stress.", keywords=["money", "debt", "bills", "financial", "finances"]),
+
+    # Relaxation music
+    _video("relaxation_music", "Calming music for anxiety", "relaxation music for anxiety stress relief",
+           "Slow, gentle music to ease tension.", states=["stressed", "anxious"]),
+    _video("relaxation_music", "Lo-fi beats to focus and relax", "lofi hip hop beats to relax study",
+           "Steady background music for work or study.", states=["overwhelmed"], keywords=["study", "work", "exam", "exams"]),
+    _video("relaxation_music", "Nature sounds: rain and forest", "rain and forest nature sounds relaxing",
+           "Natural soundscapes to unwind.", states=["angry", "stressed"]),
+    _video("relaxation_music", "Sleep music with delta waves", "deep sleep music relaxing",
+           "Soft music for falling asleep.", keywords=["sleep", "insomnia", "night"]),
+    _video("relaxation_music", "Uplifting acoustic music", "uplifting calm acoustic music",
+           "Gentle, hopeful music for low moments.", states=["sad"]),
+
+    # Podcasts
+    _video("podcasts", "Podcasts on anxiety", "best podcasts for anxiety mental health",
+           "Conversations and tools for living with anxiety.", states=["anxious"]),
+    _video("podcasts", "Podcasts on mindfulness", "mindfulness podcast episode",
+           "Short talks and practices on mindfulness.", approaches=["Mindfulness", "ACT"]),
+    _video("podcasts", "Podcasts on burnout", "podcast on burnout and work stress",
+           "Recognising and recovering from burnout.", states=["stressed", "overwhelmed"], keywords=["work", "job", "burnout"]),
+
+    # Articles
+    _article("I'm So Stressed Out! Fact Sheet", "https://www.nimh.nih.gov/health/publications/so-stressed-out-fact-sheet",
+             "NIMH", "How stress differs from anxiety and ways to cope.", states=["stressed", "overwhelmed"],
+             keywords=["work", "stress", "pressure"]),
+    _article("Anxiety Disorders", "https://www.nimh.nih.gov/health/topics/anxiety-disorders",
+             "NIMH", "Signs, symptoms and treatment options for anxiety.", states=["anxious"], keywords=["worry", "panic"]),
+    _article("Depression", "https://www.nimh.nih.gov/health/topics/depression",
+             "NIMH", "Understanding depression and getting help.", states=["sad"]),
+    _article("Stress", "https://www.apa.org/topics/stress",
+             "American Psychological Association", "Research and practical advice on managing stress.",
+             states=["stressed"], approaches=["CBT"]),
+    _article("Anger", "https://www.apa.org/topics/anger",
+             "American Psychological Association", "Understanding anger and strategies to control it.", states=["angry"]),
+    _article("Breathing exercises for stress", "https://www.nhs.uk/mental-health/self-help/guides-tools-and-activities/breathing-exercises-for-stress/",
+             "NHS", "A simple breathing exercise you can do anywhere.", states=["stressed", "anxious"],
+             approaches=["Mindfulness"]),
+]
+
+def _words(text):
+    return re.findall(r"[a-z]+", text.casefold())
+
+def _build_index(catalog):
+    """{category: [positions]} and {(field, value): {positions}} for the catalog"""
+    by_category = {}
+    by_value = {}
+    for position, item in enumerate(catalog):
+        by_category.setdefault(item["category"], []).append(position)
+        for field in ("states", "approaches", "keywords"):
+            for value in item[field]:
+                by_value.setdefault((field, value.casefold()), set()).add(position)
+    return by_category, by_value
+
+_by_category, _by_value = _build_index(CATALOG)
+
+def find_recommendations(category, emotional_state=None, approach=None, stressors=(), limit=2):
+    """The best catalog items of a category for a state, approach and stressors.
+
+    A stressor keyword match counts most, then the emotional state, then the
+    approach; items that suit any state or approach count a little for it, so
+    general items fill in when nothing specific matches. Ties keep catalog
+    order.
+    """
+    keywords = {word for stressor in stressors for word in _words(stressor)}
+    keyword_matches = set().union(*(_by_value.get(("keywords", word), ()) for word in keywords))
+    state_matches = _by_value.get(("states", (emotional_state or "").casefold()), set())
+    approach_matches = _by_value.get(("approaches", (approach or "").casefold()), set())
+
+    scored = []
+    for position in _by_category.get(category, []):
+        item = CATALOG[position]
+        score = (3 if position in keyword_matches else 0)
+        score += 2 if position in state_matches else (0.5 if not item["states"] else 0)
+        score += 1 if position in approach_matches else (0.25 if not item["approaches"] else 0)
+        # Items made for other approaches only help when they match something else
+        if item["approaches"] and position not in approach_matches and position not in keyword_matches:
+            score -= 1
+        scored.append((-score, position))
+    scored.sort()
+    return [{key: CATALOG[position][key] for key in ("title", "link", "source", "snippet", "type")}
+            for _, position in scored[:limit]]
+
+def merge_recommendations(items, extra, limit=None):
+    """items followed by the extra items whose links aren't already there"""
+    links = {item["link"] for item in items}
+    merged = list(items) + [item for item in extra if item.get("link") not in links]
+    return merged[:limit] if limit else merged
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look up catalog recommendations")
+    parser.add_argument("category", choices=sorted(_by_category))
+    parser.add_argument("--state")
+    parser.add_argument("--approach")
+    parser.add_argument("--stressor", action="append", default=[])
+    parser.add_argument("--limit", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    for item in find_recommendations(args.category, args.state, args.approach, args.stressor, args.limit):
+        print(f"{item['title']} - {item['link']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+
+# Streamlit serves every session from one Python process. To use more cores,
+# run several independent workers on consecutive ports behind a load balancer
+# with sticky sessions; they share user_data safely through storage.py.
+
+NGINX_TEMPLATE = """upstream mind_companion {{
+    ip_hash;  # a browser session must stay on the worker holding its session state
+{servers}
+}}
+
+server {{
+    listen 80;
+    location / {{
+        proxy_pass http://mind_companion;
+        proxy_http_version 1.1;
+        proxy_set_header Upgrade $http_upgrade;
+        proxy_set_header Connection "upgrade";
+        proxy_set_header Host $host;
+        proxy_read_timeout 86400;
+    }}
+}}
+"""
+
+def nginx_config(ports):
+    """nginx config that balances over the workers on the given ports"""
+    return NGINX_TEMPLATE.format(servers="\n".join(f"    server 127.0.0.1:{port};" for port in ports))
+
+def start_worker(port, script):
+    return subprocess.Popen([
+        sys.executable, "-m", "streamlit", "run", script,
+        "--server.port", str(port),
+        "--server.headless", "true",
+    ])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run several Streamlit workers for the app on one host")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--base-port", type=int, default=8501, help="Port of the first worker; the rest use the following ports")
+    parser.add_argument("--script", default="main.py")
+    parser.add_argument("--print-nginx", action="store_true", help="Print an nginx config for the workers and exit")
+    args = parser.parse_args(argv)
+
+    ports = [args.base_port + i for i in range(args.workers)]
+    if args.print_nginx:
+        print(nginx_config(ports), end="")
+        return 0
+
+    workers = {port: start_worker(port, args.script) for port in ports}
+    print(f"Started {len(workers)} worker(s) on ports {ports[0]}-{ports[-1]}")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # Restart workers that exit until we are asked to stop
+    while not stopping:
+        time.sleep(1)
+        for port, process in workers.items():
+            if process.poll() is not None and not stopping:
+                print(f"Worker on port {port} exited with code {process.returncode}, restarting")
+                workers[port] = start_worker(port, args.script)
+
+    for process in workers.values():
+        process.terminate()
+    for process in workers.values():
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from utils import get_user_data_path
+from storage import write_json, read_json
+from search_client import get_search_client
+
+# Recommendation searches repeat the same few queries turn after turn, so
+# their results are cached in memory (per worker process) and on disk
+# (shared by every worker) under user_data/search_cache, keyed by endpoint,
+# query and result count.
+#
+# A result is fresh for its category's TTL. After that it is still served,
+# and refreshed in the background, until it is SEARCH_CACHE_STALE_FACTOR
+# times the TTL old; older than that, the caller waits for a new search.
+SEARCH_CACHE_TTLS = {
+    "meditation": 7 * 24 * 3600,
+    "relaxation_music": 7 * 24 * 3600,
+    "therapy_resources": 3 * 24 * 3600,
+    "podcasts": 3 * 24 * 3600,
+    "mental_health_articles": 24 * 3600,
+}
+SEARCH_CACHE_DEFAULT_TTL = 6 * 3600
+SEARCH_CACHE_STALE_FACTOR = 4
+SEARCH_CACHE_MEMORY_ENTRIES = 256
+
+def _get_cache_path(key):
+    digest = hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()
+    return get_user_data_path(f"search_cache/{digest}.json")
+
+def cache_key(endpoint, query, num_results):
+    return [endpoint, " ".join(query.casefold().split()), num_results]
+
+class SearchCache:
+    def __init__(self, fetch, memory_entries=SEARCH_CACHE_MEMORY_ENTRIES):
+        # fetch(endpoint, query, num_results, api_key) returns the raw results or raises
+        self.fetch = fetch
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()  # tuple(key) -> (fetched_at, results)
+        self._lock = threading.Lock()
+        self._fetching = {}  # tuple(key) -> Lock held by the thread searching for it
+        self._refreshing = set()
+        self._counts = dict.fromkeys(
+            ["memory_hits", "disk_hits", "stale_hits", "misses", "refreshes", "refresh_errors"], 0)
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def metrics(self):
+        with self._lock:
+            counts = dict(self._counts)
+            counts["memory_entries"] = len(self._memory)
+        lookups = counts["memory_hits"] + counts["disk_hits"] + counts["misses"]
+        counts["hit_rate"] = round((counts["memory_hits"] + counts["disk_hits"]) / lookups, 3) if lookups else None
+        return counts
+
+    def _remember(self, key, fetched_at, results):
+        with self._lock:
+            self._memory[key] = (fetched_at, results)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, key):
+        """(fetched_at, results, tier) of the cached copy, or None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                self._memory.move_to_end(key)
+                return entry[0], entry[1], "memory"
+        stored = read_json(_get_cache_path(list(key)), None)
+        if stored and stored.get("key") == list(key):
+            self._remember(key, stored["fetched_at"], stored["results"])
+            return stored["fetched_at"], stored["results"], "disk"
+        return None
+
+    def _store(self, key, endpoint, query, num_results, api_key):
+        results = self.fetch(endpoint, query, num_results, api_key)
+        fetched_at = time.time()
+        self._remember(key, fetched_at, results)
+        write_json(_get_cache_path(list(key)), {"key": list(key), "fetched_at": fetched_at, "results": results})
+        return results
+
+    def _refresh(self, key, endpoint, query, num_results, api_key):
+        try:
+            self._store(key, endpoint, query, num_results, api_key)
+            self._count("refreshes")
+        except Exception as e:
+            # Keep serving the stale copy; the next lookup tries again
+            self._count("refresh_errors")
+            print(f"Error refreshing cached search {query!r}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def search(self, endpoint, query, num_results, category=None, api_key=None):
+        """Results of a search, from the cache when it has a usable copy.
+
+        The API key isn't part of the cache key, since any key gets the same
+        results.
+        """
+        key = tuple(cache_key(endpoint, query, num_results))
+        ttl = SEARCH_CACHE_TTLS.get(category, SEARCH_CACHE_DEFAULT_TTL)
+
+        cached = self._lookup(key)
+        if cached:
+            fetched_at, results, tier = cached
+            age = time.time() - fetched_at
+            if age < ttl:
+                self._count(f"{tier}_hits")
+                return results
+            if age < ttl * SEARCH_CACHE_STALE_FACTOR:
+                self._count(f"{tier}_hits")
+                self._count("stale_hits")
+                with self._lock:
+                    start = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start:
+                    threading.Thread(target=self._refresh, args=(key, endpoint, query, num_results, api_key),
+                                     daemon=True, name="search-cache-refresh").start()
+                return results
+
+        # Sessions missing the same query at once wait for one search
+        with self._lock:
+            fetch_lock = self._fetching.setdefault(key, threading.Lock())
+        with fetch_lock:
+            cached = self._lookup(key)
+            if cached and time.time() - cached[0] < ttl:
+                self._count(f"{cached[2]}_hits")
+                return cached[1]
+            self._count("misses")
+            try:
+                return self._store(key, endpoint, query, num_results, api_key)
+            finally:
+                with self._lock:
+                    self._fetching.pop(key, None)
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+def get_search_cache():
+    """The worker process's shared cache, searching through the shared client"""
+    global _cache, _cache_pid
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = SearchCache(lambda *args: get_search_client().search(*args))
+            _cache_pid = os.getpid()
+        return _cache
+
+def clear_expired():
+    """Delete disk entries older than any category would still serve; returns how many"""
+    directory = get_user_data_path("search_cache")
+    oldest = max([SEARCH_CACHE_DEFAULT_TTL, *SEARCH_CACHE_TTLS.values()]) * SEARCH_CACHE_STALE_FACTOR
+    removed = 0
+    for filename in os.listdir(directory) if os.path.isdir(directory) else []:
+        path = os.path.join(directory, filename)
+        stored = read_json(path, None)
+        if not stored or time.time() - stored.get("fetched_at", 0) > oldest:
+            os.remove(path)
+            removed += 1
+    return removed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search result cache maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("clear-expired", help="Delete cached results too old to be served")
+    args = parser.parse_args(argv)
+
+    if args.command == "clear-expired":
+        print(f"Removed {clear_expired()} cached search(es)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
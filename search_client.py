@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+
+# One pooled session per worker process for every Serper call, so requests
+# reuse kept-alive TLS connections instead of opening a new one each time.
+# Point SERPER_BASE_URL at a local server to run against a mock.
+SERPER_BASE_URL = os.getenv("SERPER_BASE_URL", "https://google.serper.dev")
+# (connect, read) seconds; a stalled call fails instead of hanging the rerun
+SEARCH_TIMEOUT = (3.05, 10)
+# Extra attempts after a connection error, timeout, 429 or 5xx response,
+# waiting a random time up to SEARCH_BACKOFF * 2**attempt seconds first
+SEARCH_RETRIES = 2
+SEARCH_BACKOFF = 0.5
+SEARCH_POOL_SIZE = 16
+# Latencies kept per endpoint for the metrics percentiles
+METRICS_WINDOW = 500
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class SearchError(Exception):
+    """A search that failed after all its attempts"""
+
+class SearchClient:
+    def __init__(self, api_key=None, base_url=None, timeout=SEARCH_TIMEOUT,
+                 retries=SEARCH_RETRIES, backoff=SEARCH_BACKOFF, pool_size=SEARCH_POOL_SIZE):
+        self.api_key = api_key or os.getenv("SERPER_API_KEY")
+        self.base_url = (base_url or SERPER_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        self._metrics = {}
+        self._metrics_lock = threading.Lock()
+
+    def _record(self, endpoint, latency_ms, attempts, ok):
+        with self._metrics_lock:
+            stats = self._metrics.setdefault(endpoint, {
+                "requests": 0, "errors": 0, "retries": 0, "latencies": deque(maxlen=METRICS_WINDOW)
+            })
+            stats["requests"] += 1
+            stats["retries"] += attempts - 1
+            if ok:
+                stats["latencies"].append(latency_ms)
+            else:
+                stats["errors"] += 1
+
+    def metrics(self):
+        """Per-endpoint request, error and retry counts and latency percentiles (ms) of recent successes"""
+        with self._metrics_lock:
+            summary = {}
+            for endpoint, stats in self._metrics.items():
+                latencies = sorted(stats["latencies"])
+                summary[endpoint] = {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "retries": stats["retries"],
+                    "p50_ms": latencies[len(latencies) // 2] if latencies else None,
+                    "p90_ms": latencies[min(int(len(latencies) * 0.9), len(latencies) - 1)] if latencies else None,
+                    "max_ms": latencies[-1] if latencies else None
+                }
+            return summary
+
+    def search(self, endpoint, query, num_results, api_key=None):
+        """Raw JSON results of one Serper query ("search", "videos", ...).
+
+        Raises SearchError once the retries are used up.
+        """
+        url = f"{self.base_url}/{endpoint}"
+        payload = json.dumps({"q": query, "num": num_results})
+        headers = {"X-API-KEY": api_key or self.api_key or ""}
+        start = time.perf_counter()
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+            try:
+                response = self.session.post(url, headers=headers, data=payload, timeout=self.timeout)
+                if response.status_code in RETRY_STATUSES:
+                    error = requests.HTTPError(f"{response.status_code} from {endpoint}", response=response)
+                    continue
+                response.raise_for_status()
+                results = response.json()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+                continue
+            except Exception as e:
+                # Bad request, bad key or a body that isn't JSON: retrying won't help
+                self._record(endpoint, (time.perf_counter() - start) * 1000, attempt + 1, False)
+                raise SearchError(f"{endpoint} search failed: {e}") from e
+            self._record(endpoint, (time.perf_counter() - start) * 1000, attempt + 1, True)
+            return results
+        self._record(endpoint, (time.perf_counter() - start) * 1000, self.retries + 1, False)
+        raise SearchError(f"{endpoint} search failed after {self.retries + 1} attempts: {error}") from error
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+def get_search_client():
+    """The worker process's shared client (a new one after a fork, since pooled sockets can't be shared)"""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = SearchClient()
+            _client_pid = os.getpid()
+        return _client
+
+def youtube_video_id(link):
+    """The video ID of a youtube.com/watch or youtu.be link, or None"""
+    if "youtube.com/watch?v=" in link:
+        return link.split("youtube.com/watch?v=")[1].split("&")[0]
+    if "youtu.be/" in link:
+        return link.split("youtu.be/")[1].split("?")[0]
+    return None
+
+def parse_videos(results):
+    """Video results of a "videos" search"""
+    videos = []
+    for video in results.get("videos", []):
+        link = video.get("link", "")
+        videos.append({
+            "title": video.get("title", ""),
+            "link": link,
+            "video_id": youtube_video_id(link),
+            "source": video.get("source", "YouTube"),
+            "snippet": video.get("snippet", ""),
+            "thumbnail": video.get("thumbnail", "")
+        })
+    return videos
+
+def parse_organic(results):
+    """Web results of a "search" search"""
+    return [{
+        "title": result.get("title", ""),
+        "link": result.get("link", ""),
+        "snippet": result.get("snippet", ""),
+        "source": result.get("source", "")
+    } for result in results.get("organic", [])]
+
+def parse_news(results):
+    """News results of a "search" search, when Serper includes any"""
+    return [{
+        "title": result.get("title", ""),
+        "link": result.get("link", ""),
+        "snippet": result.get("snippet", ""),
+        "source": result.get("source", ""),
+        "date": result.get("date", "")
+    } for result in results.get("news", [])]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Serper searches through the shared client")
+    parser.add_argument("query")
+    parser.add_argument("--endpoint", default="search", choices=["search", "videos"])
+    parser.add_argument("--num", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=1, help="Run the query this many times")
+    args = parser.parse_args(argv)
+
+    client = get_search_client()
+    parse = parse_videos if args.endpoint == "videos" else parse_organic
+    for _ in range(args.repeat):
+        try:
+            for result in parse(client.search(args.endpoint, args.query, args.num)):
+                print(f"{result['title']} - {result['link']}")
+        except SearchError as e:
+            print(e)
+    print(json.dumps(client.metrics(), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import os
+import re
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+from utils import get_user_data_path
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: locks still serialize threads, but not separate processes, so
+    # run a single worker there
+    fcntl = None
+
+# Several Streamlit worker processes can share one user_data directory. Every
+# read-modify-write of a shared file happens under locked(name), which holds
+# a per-process RLock plus an flock on user_data/locks/<name>.lock, and every
+# write goes through a uniquely named temp file that replaces the target, so
+# readers never see a partial file and writers never clobber each other's
+# temp files.
+
+_locks = {}
+_locks_guard = threading.Lock()
+_depth = {}
+
+def _get_lock_path(name):
+    return get_user_data_path(f"locks/{re.sub(r'[^A-Za-z0-9_.-]+', '_', name)}.lock")
+
+@contextmanager
+def locked(name):
+    """Hold an exclusive lock on name across threads and worker processes.
+
+    Reentrant within a thread, so a locked function can call another one
+    that takes the same lock.
+    """
+    with _locks_guard:
+        lock = _locks.setdefault(name, threading.RLock())
+    with lock:
+        if _depth.get(name):
+            _depth[name] += 1
+            try:
+                yield
+            finally:
+                _depth[name] -= 1
+            return
+
+        path = _get_lock_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            _depth[name] = 1
+            try:
+                yield
+            finally:
+                _depth[name] = 0
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+@contextmanager
+def atomic_write(path, mode='w', encoding=None):
+    """Open a temp file next to path and move it over path once the block succeeds"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+        # mkstemp creates files readable by the owner only
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_json(path, data, **dump_kwargs):
+    """Atomically replace path with data serialized as JSON"""
+    with atomic_write(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, **dump_kwargs)
+
+def read_json(path, default):
+    """Load JSON from path, or default if it is missing or unreadable"""
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            return json.load(f)
+        except:
+            return default
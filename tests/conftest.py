@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def user_data(tmp_path, monkeypatch):
+    """Run the test from an empty directory, so user_data/ files land in tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "user_data").mkdir()
+    yield tmp_path / "user_data"
+    # Let background journal indexing finish before the directory changes back
+    if "journal_search" in sys.modules:
+        sys.modules["journal_search"]._queue.join()
@@ -0,0 +1,115 @@
+import time
+
+import gemini_multiagent_chatbot
+from gemini_multiagent_chatbot import run_search_turn, run_therapy_turn, MoodTrackerAgent, ContentRecommendationAgent
+from mood_store import get_mood_series
+
+class StubCheck:
+    def __init__(self, **analysis):
+        self.analysis = analysis
+
+    def check_search_needed(self, user_query):
+        return dict({"needs_search": True, "search_query": user_query}, **self.analysis)
+
+class SlowSearch:
+    def __init__(self, results, delay=0.3):
+        self.results = results
+        self.delay = delay
+
+    def search(self, query):
+        time.sleep(self.delay)
+        return self.results
+
+class EchoResponse:
+    def generate_response(self, user_query, web_results, video_results, context_analysis):
+        return f"{user_query}: {len(web_results)} articles, {len(video_results)} videos"
+
+def test_search_turn_runs_news_and_videos_at_once():
+    videos = [{"title": "Breathing", "video_id": "abc", "link": "", "source": "YouTube", "snippet": ""}]
+    turn = run_search_turn("how to relax", StubCheck(needs_news=True, needs_videos=True),
+                           SlowSearch([{}, {}]), SlowSearch(videos), EchoResponse())
+    assert turn["text"] == "how to relax: 2 articles, 1 videos"
+    assert turn["videos"] == videos
+    nodes = turn["turn_report"]["nodes"]
+    assert nodes["news"]["start_ms"] < nodes["videos"]["end_ms"]
+    assert nodes["videos"]["start_ms"] < nodes["news"]["end_ms"]
+
+def test_search_turn_skips_searches_the_check_rules_out():
+    turn = run_search_turn("hello", StubCheck(needs_news=False, needs_videos=False),
+                           SlowSearch([{}]), SlowSearch([{}]), EchoResponse())
+    assert turn["text"] == "hello: 0 articles, 0 videos"
+    assert turn["turn_report"]["nodes"]["news"]["status"] == "skipped"
+
+class StubContext:
+    def __init__(self):
+        self.profiles_seen = []
+
+    def analyze_message(self, user_message, conversation_history, user_profile):
+        self.profiles_seen.append(dict(user_profile))
+        return {"emotional_state": "sad", "emotional_intensity": 3, "suggest_coping_strategies": True}
+
+class StubCoping:
+    def __init__(self):
+        self.profiles_seen = []
+
+    def get_strategies(self, emotional_state, therapeutic_approach, user_profile):
+        self.profiles_seen.append(dict(user_profile))
+        return []
+
+class StubResponse:
+    def craft_response(self, user_message, conversation_history, context, strategies, recommendations, question):
+        return {"text": "ok"}
+
+def test_therapy_turn_migrates_profile_moods_before_running(user_data):
+    profile = {"mood_tracker": [{"emotional_state": "anxious", "intensity": 4, "timestamp": "2024-05-01T10:00:00"}]}
+    context, coping = StubContext(), StubCoping()
+    agents = {"context": context, "coping": coping, "mood": MoodTrackerAgent(), "response": StubResponse(),
+              "question": None, "content": None}
+    response = run_therapy_turn("I feel low", [], profile, agents, username="alice")
+    assert response["text"] == "ok"
+    # The agents reading the profile already see it migrated
+    assert context.profiles_seen and coping.profiles_seen
+    assert all("mood_tracker" not in seen for seen in context.profiles_seen + coping.profiles_seen)
+    assert "mood_tracker" not in profile
+    labels = [label for item in get_mood_series("alice") for label in item["labels"]]
+    assert sorted(labels) == ["anxious", "sad"]
+
+def _recommendation_agent(delays):
+    """Agent whose searches return one "live <category>" item after the category's delay"""
+    agent = ContentRecommendationAgent()
+    agent.live_search = True
+    calls = []
+
+    def search(query, num_results=2, category=None):
+        calls.append(category)
+        time.sleep(delays.get(category, 0))
+        return [{"title": f"live {category}", "link": f"https://example.com/{category}", "type": "video"}]
+
+    agent.search_youtube = agent.search_web = search
+    return agent, calls
+
+def _live_titles(recommendations, category):
+    return [item["title"] for item in recommendations.get(category, []) if item["title"].startswith("live ")]
+
+def test_recommendations_trimmed_by_intensity_are_never_searched():
+    agent, calls = _recommendation_agent({})
+    context = {"emotional_intensity": 5, "potential_stressors": ["work"]}
+    recommendations = agent.get_recommendations(context, [], "anxious", "CBT")
+    assert list(recommendations) == ["therapy_resources"]
+    assert calls == ["therapy_resources"]
+
+def test_recommendation_searches_run_at_once_within_the_deadline(monkeypatch):
+    monkeypatch.setattr(gemini_multiagent_chatbot, "RECOMMENDATION_DEADLINE", 0.5)
+    agent, calls = _recommendation_agent({"therapy_resources": 0.2, "relaxation_music": 0.2, "meditation": 2})
+    context = {"emotional_intensity": 3, "potential_stressors": ["work"]}
+
+    start = time.perf_counter()
+    recommendations = agent.get_recommendations(context, [], "anxious", "CBT")
+    elapsed = time.perf_counter() - start
+
+    assert sorted(calls) == ["meditation", "relaxation_music", "therapy_resources"]
+    # Both fast searches finished inside one deadline, so they ran side by side
+    assert elapsed < 1.0
+    assert _live_titles(recommendations, "therapy_resources") == ["live therapy_resources"]
+    assert _live_titles(recommendations, "relaxation_music") == ["live relaxation_music"]
+    assert _live_titles(recommendations, "meditation") == []
@@ -0,0 +1,114 @@
+from urllib.parse import quote
+
+from starlette.testclient import TestClient
+
+import api
+import chat_agent
+import journal_search
+from api import app
+from journal import save_journal_entries
+from user_registry import register_user
+
+def test_int_param_errors_name_only_the_bounds_that_apply(user_data):
+    register_user("alice")
+    client = TestClient(app)
+    response = client.get("/api/users/alice/journal", params={"page": "0"})
+    assert response.status_code == 400
+    assert "page must be at least 1" in response.text
+
+    response = client.get("/api/users/alice/journal", params={"page_size": "0"})
+    assert "page_size must be between 1 and" in response.text
+
+def _client(username="alice"):
+    register_user(username)
+    return TestClient(app)
+
+def _url(vector_id):
+    return "/api/users/alice/journal/" + quote(vector_id)
+
+def test_users_are_created_once_and_listed_by_prefix(user_data):
+    client = TestClient(app)
+    assert client.post("/api/users", json={"username": "alice"}).status_code == 201
+    assert client.post("/api/users", json={"username": "alice"}).status_code == 409
+    assert client.post("/api/users", json={"username": ""}).status_code == 400
+    assert client.get("/api/users", params={"prefix": "al"}).json()["users"] == ["alice"]
+    assert client.get("/api/users/bob/journal").status_code == 404
+
+def test_created_entry_is_addressed_by_its_id(user_data):
+    client = _client()
+    response = client.post("/api/users/alice/journal", json={"entry": "Slept well", "mood": "Good", "tags": ["sleep"]})
+    assert response.status_code == 201
+    created = response.json()
+    assert created["entry"] == "Slept well" and created["id"].startswith(created["timestamp"] + "#")
+
+    assert client.get(_url(created["id"])).json() == created
+    assert client.get("/api/users/alice/journal").json()["entries"] == [created]
+
+    patched = client.patch(_url(created["id"]), json={"entry": "Slept badly", "mood": None}).json()
+    assert patched["mood"] is None and patched["tags"] == ["sleep"]
+    assert patched["id"] != created["id"]
+    assert client.get(_url(created["id"])).status_code == 404
+
+    assert client.delete(_url(patched["id"])).json() == {"deleted": patched["id"]}
+    assert client.delete(_url(patched["id"])).status_code == 404
+    assert client.get("/api/users/alice/journal").json()["total"] == 0
+
+def test_entries_sharing_a_timestamp_are_addressed_separately(user_data):
+    client = _client()
+    timestamp = "2024-03-01 00:00:00"
+    save_journal_entries("alice", [
+        {"timestamp": timestamp, "date": "2024-03-01", "entry": "First", "mood": "Low", "tags": []},
+        {"timestamp": timestamp, "date": "2024-03-01", "entry": "Second", "mood": "Good", "tags": []},
+    ])
+    ids = {entry["entry"]: entry["id"] for entry in client.get("/api/users/alice/journal").json()["entries"]}
+    assert len(set(ids.values())) == 2
+
+    assert client.get(_url(ids["Second"])).json()["entry"] == "Second"
+    assert client.patch(_url(ids["Second"]), json={"mood": "Excellent"}).json()["entry"] == "Second"
+    assert client.get(_url(ids["First"])).json()["mood"] == "Low"
+
+    client.delete(_url(ids["Second"]))
+    remaining = client.get("/api/users/alice/journal").json()["entries"]
+    assert [entry["entry"] for entry in remaining] == ["First"]
+
+def test_malformed_entry_ids_are_unknown_entries(user_data):
+    client = _client()
+    assert client.get("/api/users/alice/journal/2024-03-01").status_code == 404
+    assert client.delete(_url("../../x#00000000")).status_code == 404
+
+def test_journal_search_returns_entries_with_ids(user_data):
+    client = _client()
+    created = client.post("/api/users/alice/journal", json={"entry": "Worried about the exam"}).json()
+    client.post("/api/users/alice/journal", json={"entry": "Baked bread with friends"})
+    journal_search._queue.join()
+
+    results = client.get("/api/users/alice/journal/search", params={"q": "exam worries"}).json()["results"]
+    assert results[0]["id"] == created["id"] and results[0]["score"] > 0
+    assert client.get("/api/users/alice/journal/search").status_code == 400
+
+def test_mood_routes_read_the_daily_aggregate(user_data):
+    client = _client()
+    client.post("/api/users/alice/journal", json={"entry": "Morning", "mood": "Good"})
+    client.post("/api/users/alice/journal", json={"entry": "Evening", "mood": "Low"})
+
+    days = client.get("/api/users/alice/mood/daily").json()["days"]
+    assert len(days) == 1 and days[0]["count"] == 2 and days[0]["mean"] == 3
+    summary = client.get("/api/users/alice/mood/summary").json()["summary"]
+    assert summary["entries"] == 2 and summary["days_logged"] == 1
+
+    series = client.get("/api/users/alice/mood/series", params={"source": "journal"}).json()
+    assert series["summary"]["count"] == 2
+    assert client.get("/api/users/alice/mood/series", params={"source": "dreams"}).status_code == 400
+    assert client.get("/api/users/alice/mood/daily", params={"start": "March"}).status_code == 400
+
+def test_chat_turn_is_saved_to_the_history(user_data, monkeypatch):
+    client = _client()
+    # chat_agent keeps histories next to the module, not under the working directory
+    monkeypatch.setattr(chat_agent, "get_user_data_path", lambda path="": str(user_data / path))
+    monkeypatch.setattr(api, "generate_response", lambda message: f"echo: {message}")
+    assert client.post("/api/users/alice/chat", json={"message": "hello"}).json() == {"reply": "echo: hello"}
+    assert client.post("/api/users/alice/chat", json={"message": " "}).status_code == 400
+
+    history = client.get("/api/users/alice/chat").json()
+    assert history["total"] == 2
+    assert [(m["role"], m["content"]) for m in history["messages"]] == [("user", "hello"), ("assistant", "echo: hello")]
@@ -0,0 +1,37 @@
+import time
+
+from coping_library import CopingLibrary, normalize_request, DEFAULT_STATE, DEFAULT_APPROACH
+
+STRATEGIES = [{"name": "Walk", "description": "Take a walk", "implementation": "Ten minutes outside"}]
+
+def wait_for_personalizations(library, count):
+    deadline = time.time() + 5
+    while library.metrics()["personalizations"] < count and time.time() < deadline:
+        time.sleep(0.01)
+
+def test_free_form_states_share_the_library_key():
+    assert normalize_request("  Anxious ", "cbt") == ("anxious", "CBT")
+    assert normalize_request("kind of anxious but also tired", "a mix of CBT") == (DEFAULT_STATE, DEFAULT_APPROACH)
+
+def test_personalized_sets_are_keyed_by_normalized_state(user_data):
+    library = CopingLibrary()
+    calls = []
+
+    def personalize(state, approach, tried):
+        calls.append((state, approach))
+        return STRATEGIES
+
+    library.get_strategies("Anxious", "cbt", [], personalize)
+    wait_for_personalizations(library, 1)
+    assert calls == [("anxious", "CBT")]
+    assert library.get_strategies("anxious ", "CBT", [], personalize) == STRATEGIES
+
+def test_memory_is_bounded(user_data):
+    library = CopingLibrary(memory_entries=2)
+    for i, state in enumerate(["sad", "angry", "overwhelmed"], start=1):
+        library.get_strategies(state, "ACT", [], lambda *args: STRATEGIES)
+        wait_for_personalizations(library, i)
+    assert len(library._memory) == 2
+    assert library.metrics()["personalizations"] == 3
+    # Evicted sets are still read back from disk
+    assert library.get_strategies("sad", "ACT", [], None) == STRATEGIES
@@ -0,0 +1,107 @@
+from journal import save_journal_entry, update_journal_entry, backup_journal
+
+def test_backup_copies_partitions_changed_within_the_same_second(user_data, tmp_path):
+    timestamp = save_journal_entry("alice", "First draft", mood="Good")
+    backup_dir = tmp_path / "backup"
+    assert backup_journal("alice", str(backup_dir)) == [timestamp[:7]]
+
+    update_journal_entry("alice", timestamp, entry="Second draft")
+    assert backup_journal("alice", str(backup_dir)) == [timestamp[:7]]
+    assert "Second draft" in (backup_dir / "alice" / f"{timestamp[:7]}.json").read_text()
+    assert backup_journal("alice", str(backup_dir)) == []
+
+def test_aggregate_update_leaves_shared_copy_unchanged(user_data):
+    from mood_aggregate import get_daily_aggregate
+
+    save_journal_entry("alice", "Morning", mood="Good")
+    before = get_daily_aggregate("alice")
+    days, version = before.days.copy(), before.version
+
+    timestamp = save_journal_entry("alice", "Evening", mood="Low")
+    update_journal_entry("alice", timestamp, mood="Excellent")
+    assert (before.days == days).all() and before.version == version
+    after = get_daily_aggregate("alice")
+    assert after is not before and after.version > version
+    assert len(after.days) == len(after.label_counts)
+
+def test_aggregate_build_does_not_miss_concurrent_saves(user_data, monkeypatch):
+    import threading
+    import mood_aggregate
+    from mood_aggregate import get_daily_aggregate
+
+    save_journal_entry("alice", "Morning", mood="Good")
+    building = threading.Event()
+    build = mood_aggregate.build_daily_aggregate
+
+    def slow_build(entries):
+        building.set()
+        saver.join(0.2)
+        return build(entries)
+
+    monkeypatch.setattr(mood_aggregate, "build_daily_aggregate", slow_build)
+    saver = threading.Thread(target=lambda: (building.wait(), save_journal_entry("alice", "Evening", mood="Low")))
+    saver.start()
+    get_daily_aggregate("alice")
+    saver.join()
+    assert get_daily_aggregate("alice").summary()["entries"] == 2
+
+def test_missing_index_is_rebuilt_from_partitions(user_data):
+    import os
+    from journal import get_journal_index, _get_index_path
+
+    first = save_journal_entry("alice", "One", mood="Low", tags=["work"])
+    second = save_journal_entry("alice", "Two")
+    os.remove(_get_index_path("alice"))
+    index = get_journal_index("alice")
+    assert [item["timestamp"] for item in index] == sorted([first, second], reverse=True)
+    assert os.path.exists(_get_index_path("alice"))
+
+def _write_legacy_journal(user_data, entries):
+    import json
+    journals = user_data / "journals"
+    journals.mkdir(exist_ok=True)
+    (journals / "alice_journal.json").write_text(json.dumps(entries))
+
+LEGACY_ENTRIES = [
+    {"timestamp": f"2024-{month:02d}-{day:02d} 20:00:00", "date": f"2024-{month:02d}-{day:02d}",
+     "entry": f"Entry {month}/{day}", "mood": "Good", "tags": []}
+    for month in (1, 2, 3) for day in (5, 20)
+]
+
+def test_legacy_journal_is_split_into_month_partitions_on_first_read(user_data):
+    from journal import get_journal_entries, get_journal_manifest
+
+    _write_legacy_journal(user_data, LEGACY_ENTRIES)
+    entries = get_journal_entries("alice")
+    assert len(entries) == len(LEGACY_ENTRIES)
+    assert entries[0]["timestamp"] == "2024-03-20 20:00:00"
+
+    manifest = get_journal_manifest("alice")
+    assert {month: info["count"] for month, info in manifest["partitions"].items()} == \
+        {"2024-01": 2, "2024-02": 2, "2024-03": 2}
+    assert not (user_data / "journals" / "alice_journal.json").exists()
+    assert (user_data / "journals" / "alice_journal.json.bak").exists()
+
+def test_date_filtered_reads_load_only_overlapping_partitions(user_data, monkeypatch):
+    import journal
+    from journal import get_journal_entries, repartition_journal
+
+    _write_legacy_journal(user_data, LEGACY_ENTRIES)
+    repartition_journal("alice")
+    loaded = []
+    load_partition = journal._load_partition
+    monkeypatch.setattr(journal, "_load_partition", lambda username, month: loaded.append(month) or load_partition(username, month))
+
+    entries = get_journal_entries("alice", start_date="2024-02-10", end_date="2024-03-10")
+    assert [e["date"] for e in entries] == ["2024-03-05", "2024-02-20"]
+    assert loaded == ["2024-02", "2024-03"]
+
+def test_repartition_tool_merges_into_existing_partitions(user_data, capsys):
+    from journal import get_journal_entries
+    from journal_tools import main
+
+    save_journal_entry("alice", "Written after the upgrade")
+    _write_legacy_journal(user_data, LEGACY_ENTRIES)
+    assert main(["repartition", "alice"]) == 0
+    assert "alice: repartitioned 6 entries" in capsys.readouterr().out
+    assert len(get_journal_entries("alice")) == len(LEGACY_ENTRIES) + 1
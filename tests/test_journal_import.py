@@ -0,0 +1,79 @@
+import io
+import json
+
+import journal_import
+from journal import get_journal_entries, get_journal_manifest
+from journal_import import import_journal, normalize_mood, parse_timestamp
+
+CSV_EXPORT = """date,mood,note,activities
+2024-01-05 21:10,rad,Finished the project,work;friends
+2024-01-05 21:10,rad,Finished the project,work;friends
+2024-02-10,awful,Could not sleep,
+2024-02-11,purple,Odd day,
+,good,No date at all,
+2024-02-12,good,,
+"""
+
+def test_moods_and_timestamps_are_normalized():
+    assert normalize_mood("Rad") == ("Excellent", True)
+    assert normalize_mood("4") == ("Good", True)
+    assert normalize_mood("") == (None, True)
+    assert normalize_mood("purple") == (None, False)
+    assert parse_timestamp("2024-03-01T08:30:15.123Z") == "2024-03-01 08:30:15"
+    assert parse_timestamp("March 01, 2024") == "2024-03-01 00:00:00"
+    assert parse_timestamp("yesterday") is None
+
+def test_csv_import_validates_and_skips_duplicates(user_data):
+    stats = import_journal("alice", io.StringIO(CSV_EXPORT), "csv")
+    assert stats == {"read": 6, "imported": 3, "duplicates": 1, "invalid": 2, "unrecognized_moods": 1}
+
+    entries = {e["entry"]: e for e in get_journal_entries("alice")}
+    assert entries["Finished the project"]["mood"] == "Excellent"
+    assert entries["Finished the project"]["tags"] == ["work", "friends"]
+    assert entries["Could not sleep"]["timestamp"] == "2024-02-10 00:00:00"
+    assert entries["Odd day"]["mood"] is None
+    assert sorted(get_journal_manifest("alice")["partitions"]) == ["2024-01", "2024-02"]
+
+    # Importing the same export again adds nothing
+    again = import_journal("alice", io.StringIO(CSV_EXPORT), "csv")
+    assert again["imported"] == 0 and again["duplicates"] == 4
+
+def test_json_array_is_read_in_chunks(user_data, monkeypatch):
+    monkeypatch.setattr(journal_import, "JSON_CHUNK_SIZE", 7)
+    records = [{"timestamp": f"2024-03-{day:02d} 09:00", "text": f"Day {day} {'x' * day}", "mood": "ok"}
+               for day in range(1, 11)]
+    stats = import_journal("alice", io.StringIO(json.dumps(records, indent=1)), "json")
+    assert stats["imported"] == 10 and stats["invalid"] == 0
+    assert {e["mood"] for e in get_journal_entries("alice")} == {"Neutral"}
+
+def test_json_lines_and_markdown_exports(user_data):
+    lines = '{"created_at": "2024-04-01T07:00:00Z", "body": "Morning run"}\n["not a record"]\n'
+    assert import_journal("alice", io.StringIO(lines), "json")["imported"] == 1
+
+    markdown = """# Journal
+
+## 2024-04-02 22:00
+Mood: sad
+Tags: family
+Long call with mum.
+
+Felt better after.
+
+## 2024-04-03
+Quiet day.
+"""
+    stats = import_journal("alice", io.StringIO(markdown), "md")
+    assert stats["imported"] == 2
+    entries = {e["timestamp"]: e for e in get_journal_entries("alice")}
+    assert entries["2024-04-02 22:00:00"]["entry"] == "Long call with mum.\n\nFelt better after."
+    assert entries["2024-04-02 22:00:00"]["mood"] == "Low"
+    assert entries["2024-04-02 22:00:00"]["tags"] == ["family"]
+    assert entries["2024-04-03 00:00:00"]["entry"] == "Quiet day."
+
+def test_progress_reports_each_partition_written(user_data):
+    reports = []
+    records = [{"date": f"2023-{month:02d}-01", "entry": f"Month {month}"} for month in range(1, 13)]
+    import_journal("alice", io.StringIO(json.dumps(records)), "json",
+                   progress=lambda stage, done, total: reports.append((stage, done, total)))
+    writes = [r for r in reports if r[0] == "write"]
+    assert writes[-1] == ("write", 12, 12)
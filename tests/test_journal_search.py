@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+import journal_search
+from journal_search import (
+    add_entries, remove_entries, index_entries_async, remove_entries_async, find_related, entry_id,
+    _load_ids, _open_matrix, embed_text
+)
+
+ENTRIES = [
+    {"timestamp": "2024-03-01T00:00:00", "entry": "Anxious about work and the deadline tomorrow"},
+    {"timestamp": "2024-03-01T00:00:00", "entry": "Long walk in the rain, felt calm afterwards"},
+    {"timestamp": "2024-03-02T21:15:00", "entry": "Could not sleep, worried about the exam"},
+    {"timestamp": "2024-03-03T08:00:00", "entry": "Coffee with a friend, lots of laughing"},
+]
+
+def test_entries_sharing_a_timestamp_are_all_indexed(user_data):
+    assert add_entries("alice", ENTRIES) == len(ENTRIES)
+    assert add_entries("alice", ENTRIES) == 0
+    assert _load_ids("alice") == [entry_id(e) for e in ENTRIES]
+
+def test_remove_entry_clears_only_that_entry(user_data):
+    add_entries("alice", ENTRIES)
+    assert remove_entries("alice", [ENTRIES[1]]) == 1
+    ids = _load_ids("alice")
+    assert ids[1] is None
+    assert ids[0] == entry_id(ENTRIES[0])
+
+def test_queued_remove_runs_after_the_pending_add(user_data):
+    index_entries_async("alice", ENTRIES)
+    remove_entries_async("alice", [ENTRIES[2]])
+    journal_search._queue.join()
+    ids = _load_ids("alice")
+    assert entry_id(ENTRIES[2]) not in ids
+    assert [i for i in ids if i is not None] == [entry_id(e) for e in ENTRIES if e is not ENTRIES[2]]
+
+def test_dead_rows_are_compacted_away(user_data, monkeypatch):
+    monkeypatch.setattr(journal_search, "COMPACT_MIN_ROWS", 2)
+    add_entries("alice", ENTRIES)
+    before = np.asarray(_open_matrix("alice", len(ENTRIES))).copy()
+
+    remove_entries("alice", [ENTRIES[0]])
+    assert len(_load_ids("alice")) == len(ENTRIES)
+    remove_entries("alice", [ENTRIES[2]])
+
+    ids = _load_ids("alice")
+    assert ids == [entry_id(ENTRIES[1]), entry_id(ENTRIES[3])]
+    np.testing.assert_array_equal(np.asarray(_open_matrix("alice", len(ids))), before[[1, 3]])
+    assert find_related("alice", ENTRIES[3]["entry"], k=1)[0][0] == entry_id(ENTRIES[3])
+
+def test_matrix_shorter_than_ids_is_rebuilt(user_data):
+    add_entries("alice", ENTRIES)
+    journal_search._save_ids("alice", _load_ids("alice") + [None])
+    assert find_related("alice", ENTRIES[0]["entry"]) == []
+    assert add_entries("alice", ENTRIES) == len(ENTRIES)
+    assert _load_ids("alice") == [entry_id(e) for e in ENTRIES]
+
+def test_find_related_matches_full_matrix_scoring(user_data, monkeypatch):
+    monkeypatch.setattr(journal_search, "SCORE_BLOCK_ROWS", 3)
+    add_entries("alice", ENTRIES)
+    query = "worried about work"
+
+    matrix = np.asarray(_open_matrix("alice", len(ENTRIES)), dtype=np.float64)
+    idf = np.log((1 + len(matrix)) / (1 + np.count_nonzero(matrix, axis=0))) + 1.0
+    weighted_query = embed_text(query) * idf
+    expected = (matrix * idf) @ (weighted_query / np.linalg.norm(weighted_query))
+    expected /= np.linalg.norm(matrix * idf, axis=1)
+
+    related = find_related("alice", query, k=len(ENTRIES))
+    assert related
+    ids = [entry_id(e) for e in ENTRIES]
+    for vector_id, score in related:
+        assert score == pytest.approx(expected[ids.index(vector_id)], rel=1e-5)
+
+def test_find_related_excludes_by_entry_id(user_data):
+    add_entries("alice", ENTRIES)
+    excluded = entry_id(ENTRIES[0])
+    related = find_related("alice", ENTRIES[0]["entry"], k=len(ENTRIES), exclude_id=excluded)
+    assert excluded not in [vector_id for vector_id, _ in related]
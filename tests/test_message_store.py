@@ -0,0 +1,60 @@
+import pytest
+
+from message_store import ChatMessageBuffer, ROLES
+
+def _history(count):
+    return [{"role": "user", "content": f"legacy {i}"} for i in range(count)]
+
+def _save(buffer, history):
+    history.extend(buffer.pending())
+    buffer.mark_saved()
+
+def test_unknown_roles_are_rejected_without_growing_the_role_table():
+    buffer = ChatMessageBuffer()
+    with pytest.raises(ValueError):
+        buffer.append("tool", "result")
+    assert ROLES == ("user", "assistant", "system")
+    assert len(buffer) == 0
+
+def test_load_earlier_from_a_legacy_history():
+    history = _history(10)
+    buffer = ChatMessageBuffer.from_messages(history, max_window=4)
+    assert buffer.offset == 6
+    assert buffer.load_earlier(history, count=3) == 3
+    assert [content for _, content in buffer] == [f"legacy {i}" for i in range(3, 10)]
+    assert buffer.offset == 3
+
+def test_load_earlier_anchors_on_the_oldest_message_held():
+    history = _history(3)
+    buffer = ChatMessageBuffer.from_messages(history, max_window=2)
+    other = ChatMessageBuffer.from_messages(history, max_window=2)
+
+    buffer.append("user", "mine 1")
+    _save(buffer, history)
+    for i in range(3):
+        other.append("assistant", f"other {i}")
+    _save(other, history)
+    for content in ("mine 2", "mine 3"):
+        buffer.append("user", content)
+        _save(buffer, history)
+
+    # The other session's messages landed between "mine 1" and "mine 2",
+    # so counting evicted messages no longer gives a position in the file
+    assert [content for _, content in buffer] == ["mine 2", "mine 3"]
+    assert buffer.load_earlier(history, count=2) == 2
+    assert [content for _, content in buffer] == ["other 1", "other 2", "mine 2", "mine 3"]
+    assert buffer.offset == len(history) - 4
+
+def test_load_earlier_after_another_session_cleared_the_history():
+    history = _history(5)
+    buffer = ChatMessageBuffer.from_messages(history, max_window=2)
+    assert buffer.load_earlier([], count=10) == 0
+    assert buffer.offset == 0
+
+def test_pending_messages_carry_ids():
+    buffer = ChatMessageBuffer()
+    buffer.append("user", "hi")
+    buffer.append("assistant", "hello")
+    pending = buffer.pending()
+    assert [m["role"] for m in pending] == ["user", "assistant"]
+    assert len({m["id"] for m in pending}) == 2
@@ -0,0 +1,78 @@
+import json
+import time
+
+from model_router import ModelRouter, LocalBackend, LocalResponse, turn_budget, classify_message, classify_search
+
+class FixedBackend:
+    """Answers every agent with its own name, like a Gemini tier would"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def serves(self, agent):
+        return True
+
+    def generate(self, agent, prompt):
+        return LocalResponse(self.name)
+
+def make_router(routes=None):
+    backends = {"large": FixedBackend("large"), "small": FixedBackend("small"), "local": LocalBackend()}
+    return ModelRouter(backends, routes or {"response": "large", "context": "large"})
+
+def test_routed_tier_without_a_budget():
+    router = make_router()
+    assert router.choose_tier("response") == ("large", False)
+    assert router.choose_tier("context") == ("large", False)
+
+def test_budget_downgrades_to_the_first_tier_that_fits():
+    router = make_router()
+    router._latency.update({"large": 2500, "small": 800, "local": 1})
+    with turn_budget(10):
+        assert router.choose_tier("response") == ("large", False)
+    with turn_budget(1.5):
+        assert router.choose_tier("response") == ("small", True)
+    with turn_budget(0.5):
+        # The local tier can only answer the classification agents
+        assert router.choose_tier("context") == ("local", True)
+        assert router.choose_tier("response") == ("small", True)
+
+def test_budget_is_spent_as_the_turn_goes_on():
+    router = make_router()
+    router._latency.update({"large": 150, "small": 50, "local": 1})
+    with turn_budget(0.2):
+        assert router.choose_tier("response") == ("large", False)
+        time.sleep(0.1)
+        assert router.choose_tier("response") == ("small", True)
+
+def test_generate_records_downgrades():
+    router = make_router()
+    router._latency["large"] = 5000
+    with turn_budget(1):
+        assert router.generate("response", "hello").text == "small"
+    stats = router.metrics()["agents"]["response"]
+    assert (stats["calls"], stats["downgrades"], stats["tiers"]) == (1, 1, {"small": 1})
+
+def test_unserved_route_moves_up_to_a_tier_that_serves():
+    router = make_router(routes={"response": "local"})
+    assert router.choose_tier("response") == ("small", False)
+
+def test_classify_message():
+    prompt = 'User\'s current message: "I am so anxious about my exams and work"\n'
+    analysis = json.loads(classify_message(prompt))
+    assert analysis["emotional_state"] == "anxious"
+    assert analysis["therapeutic_approach"] == "CBT"
+    assert analysis["potential_stressors"] == ["work", "exams"]
+    assert analysis["suggest_coping_strategies"] and not analysis["needs_followup"]
+    assert 1 <= analysis["emotional_intensity"] <= 5
+
+def test_classify_message_neutral():
+    analysis = json.loads(classify_message('User\'s current message: "Nothing much going on"\n'))
+    assert analysis["emotional_state"] == "neutral"
+    assert not analysis["suggest_coping_strategies"] and not analysis["needs_followup"]
+
+def test_classify_search():
+    result = json.loads(classify_search('Analyze this user query: "How to make pasta video"\n'))
+    assert result == {"needs_search": True, "needs_news": False, "needs_videos": True,
+                      "search_query": "How to make pasta video", "reason": "Keyword rules (local model)"}
+    result = json.loads(classify_search('Analyze this user query: "tell me a joke"\n'))
+    assert not result["needs_search"]
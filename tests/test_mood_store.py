@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from datetime import datetime, timedelta
+
+from mood_store import record_mood_point, get_mood_series, _get_store_path
+from gemini_multiagent_chatbot import MoodTrackerAgent
+
+def test_record_mood_without_username_records_nothing(user_data):
+    agent = MoodTrackerAgent()
+    agent.record_mood({}, "anxious", 4)
+    assert not (user_data / "mood_data").exists()
+    assert agent.get_mood_summary({})["has_data"] is False
+
+def test_mood_summary_is_per_user_with_iso_timestamps(user_data):
+    agent = MoodTrackerAgent()
+    agent.record_mood({}, "anxious", 4, username="alice")
+    agent.record_mood({}, "happy", 2, username="bob")
+
+    summary = agent.get_mood_summary({}, username="alice")
+    assert summary["emotions"] == {"anxious": 1}
+    json.dumps(summary)
+    datetime.fromisoformat(summary["mood_data"][0]["timestamp"])
+
+def test_journal_moods_are_read_from_the_journal(user_data):
+    from journal import save_journal_entry, update_journal_entry, delete_journal_entry_by_timestamp
+
+    record_mood_point("alice", "chat", "sad", 2)
+    first = save_journal_entry("alice", "Morning", mood="Good")
+    save_journal_entry("alice", "Evening", mood="Low")
+
+    journal = get_mood_series("alice", source="journal")
+    assert len(journal) == 1
+    assert journal[0]["resolution"] == "daily"
+    assert journal[0]["labels"] == {"Good": 1, "Low": 1}
+    assert journal[0]["mean"] == 3
+    assert {item["source"] for item in get_mood_series("alice")} == {"chat", "journal"}
+
+    update_journal_entry("alice", first, mood="Excellent")
+    assert get_mood_series("alice", source="journal")[0]["labels"] == {"Excellent": 1, "Low": 1}
+    delete_journal_entry_by_timestamp("alice", first)
+    assert get_mood_series("alice", source="journal")[0]["labels"] == {"Low": 1}
+
+    # Journal moods are never copied into the store file
+    with open(_get_store_path("alice")) as f:
+        assert {row[1] for row in json.load(f)["raw"]} == {"chat"}
+
+def test_journal_points_cannot_be_recorded_directly(user_data):
+    with pytest.raises(ValueError):
+        record_mood_point("alice", "journal", "Good", 4)
+
+def test_old_points_roll_up_into_daily_and_weekly_buckets(user_data):
+    now = datetime.now()
+    record_mood_point("alice", "chat", "calm", 4, timestamp=now - timedelta(days=2))
+    record_mood_point("alice", "chat", "sad", 2, timestamp=now - timedelta(days=90))
+    record_mood_point("alice", "chat", "sad", 1, timestamp=now - timedelta(days=90))
+    record_mood_point("alice", "chat", "tired", 3, timestamp=now - timedelta(days=500))
+
+    series = get_mood_series("alice", source="chat")
+    assert [item["resolution"] for item in series] == ["weekly", "daily", "raw"]
+    assert series[1]["count"] == 2 and series[1]["labels"] == {"sad": 2}
+    assert series[1]["min"] == 1 and series[1]["max"] == 2
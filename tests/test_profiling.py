@@ -0,0 +1,26 @@
+import tracemalloc
+
+import profiling
+
+class SessionState(dict):
+    __getattr__ = dict.get
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+def test_session_toggle_never_starts_tracemalloc(user_data, monkeypatch):
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    monkeypatch.setattr(profiling.st, "session_state", SessionState(profiling_enabled=True, profiling_capture="tracemalloc"))
+    assert profiling.profiling_settings() == (True, "off")
+
+    with profiling.profile_page("journal"):
+        pass
+    assert not tracemalloc.is_tracing()
+    assert profiling.read_rerun_log()[-1]["page"] == "journal"
+
+def test_environment_variable_enables_tracemalloc(monkeypatch):
+    monkeypatch.setattr(profiling.st, "session_state", SessionState())
+    monkeypatch.setenv(profiling.PROFILE_ENV, "tracemalloc")
+    assert profiling.profiling_settings() == (True, "tracemalloc")
+    monkeypatch.setenv(profiling.PROFILE_ENV, "")
+    assert profiling.profiling_settings() == (False, "off")
@@ -0,0 +1,50 @@
+from recommendation_catalog import CATALOG, find_recommendations, merge_recommendations, main
+from gemini_multiagent_chatbot import ContentRecommendationAgent
+
+def test_every_category_answers_from_the_catalog_alone():
+    for category in {item["category"] for item in CATALOG}:
+        items = find_recommendations(category)
+        assert items and all(item["link"] for item in items)
+
+def test_stressor_keywords_rank_first():
+    items = find_recommendations("meditation", "sad", stressors=["can't sleep at night"], limit=1)
+    matching = [item for item in CATALOG
+                if item["category"] == "meditation" and "sleep" in item["keywords"]]
+    assert matching and items[0]["title"] == matching[0]["title"]
+
+def test_approach_specific_items_follow_the_approach():
+    def approaches(items):
+        by_title = {item["title"]: item for item in CATALOG}
+        return [by_title[item["title"]]["approaches"] for item in items]
+
+    dbt = find_recommendations("therapy_resources", approach="DBT", limit=1)
+    assert "DBT" in approaches(dbt)[0]
+    cbt = find_recommendations("therapy_resources", approach="CBT", limit=1)
+    assert "CBT" in approaches(cbt)[0]
+
+def test_lookups_are_case_insensitive_and_return_only_public_fields():
+    items = find_recommendations("meditation", "ANXIOUS", limit=3)
+    assert items == find_recommendations("meditation", "anxious", limit=3)
+    assert set(items[0]) == {"title", "link", "source", "snippet", "type"}
+
+def test_live_results_are_merged_after_catalog_items_without_duplicates():
+    items = [{"title": "a", "link": "https://a"}]
+    extra = [{"title": "a again", "link": "https://a"}, {"title": "b", "link": "https://b"}]
+    assert [item["title"] for item in merge_recommendations(items, extra)] == ["a", "b"]
+    assert len(merge_recommendations(items, extra, limit=1)) == 1
+
+def test_agent_answers_offline_without_searching():
+    agent = ContentRecommendationAgent(live_search=False)
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("live search used")
+
+    agent.search_youtube = agent.search_web = no_network
+    context = {"emotional_intensity": 3, "potential_stressors": ["exam"], "content_categories": ["learning"]}
+    recommendations = agent.get_recommendations(context, [], "anxious", "CBT")
+    assert list(recommendations) == ["therapy_resources", "meditation", "mental_health_articles"]
+    assert all(recommendations.values())
+
+def test_cli_prints_matches(capsys):
+    assert main(["meditation", "--state", "anxious", "--limit", "2"]) == 0
+    assert len(capsys.readouterr().out.strip().splitlines()) == 2
@@ -0,0 +1,87 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from search_client import SearchClient, SearchError
+
+class MockSerper(BaseHTTPRequestHandler):
+    """Answers each POST with the next (status, delay) of the server's script, then 200"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, body, self.headers.get("X-API-KEY")))
+            status, delay = server.script.pop(0) if server.script else (200, 0)
+        time.sleep(delay)
+        payload = json.dumps({"organic": [{"title": body["q"]}]} if status == 200 else {"error": status}).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up on a delayed response
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def serper():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockSerper)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.script = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_client(server, **kwargs):
+    return SearchClient(api_key="test-key", base_url=f"http://127.0.0.1:{server.server_port}",
+                        backoff=0.01, **kwargs)
+
+def test_retries_5xx_then_succeeds(serper):
+    serper.script = [(503, 0), (500, 0)]
+    client = make_client(serper, retries=2)
+    assert client.search("search", "calm", 3) == {"organic": [{"title": "calm"}]}
+    assert [path for path, _, _ in serper.requests] == ["/search"] * 3
+    assert serper.requests[0][1] == {"q": "calm", "num": 3}
+    assert serper.requests[0][2] == "test-key"
+
+    metrics = client.metrics()["search"]
+    assert (metrics["requests"], metrics["errors"], metrics["retries"]) == (1, 0, 2)
+    assert metrics["p50_ms"] is not None
+
+def test_gives_up_after_retries(serper):
+    serper.script = [(502, 0)] * 3
+    client = make_client(serper, retries=2)
+    with pytest.raises(SearchError, match="after 3 attempts"):
+        client.search("videos", "calm", 3)
+    assert len(serper.requests) == 3
+    metrics = client.metrics()["videos"]
+    assert (metrics["requests"], metrics["errors"], metrics["retries"]) == (1, 1, 2)
+    assert metrics["p50_ms"] is None
+
+def test_client_errors_are_not_retried(serper):
+    serper.script = [(403, 0)]
+    client = make_client(serper, retries=2)
+    with pytest.raises(SearchError):
+        client.search("search", "calm", 3)
+    assert len(serper.requests) == 1
+    assert client.metrics()["search"]["errors"] == 1
+
+def test_read_timeout_is_retried(serper):
+    serper.script = [(200, 1.0)]
+    client = make_client(serper, retries=1, timeout=(1, 0.2))
+    start = time.perf_counter()
+    assert client.search("search", "calm", 3) == {"organic": [{"title": "calm"}]}
+    assert time.perf_counter() - start < 1.0
+    assert len(serper.requests) == 2
+    assert client.metrics()["search"]["retries"] == 1
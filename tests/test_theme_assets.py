@@ -0,0 +1,37 @@
+import pytest
+
+import theme_assets
+from theme_assets import build_theme_css, font_stack, FALLBACK_FONT_STACKS
+
+def test_font_stack_lists_system_fallbacks_before_the_generic_family():
+    assert font_stack({"font": "'Inter', sans-serif"}) == f"'Inter', {FALLBACK_FONT_STACKS['sans-serif']}"
+    assert font_stack({"font": "'Some Font', cursive"}) == "'Some Font', cursive"
+
+THEME = {"font": "'Inter', sans-serif", "primary_color": "#336699",
+         "background_color": "#1e1e2e", "text_color": "#ffffff"}
+
+def test_compiling_without_font_files_fails_with_the_missing_files(tmp_path, monkeypatch):
+    monkeypatch.delenv(theme_assets.FONTS_ENV, raising=False)
+    monkeypatch.setattr(theme_assets, "FONTS_DIR", str(tmp_path / "fonts"))
+    monkeypatch.setattr(theme_assets, "CSS_DIR", str(tmp_path / "css"))
+    with pytest.raises(RuntimeError, match="inter-400.woff2.*fetch-fonts"):
+        theme_assets.compile_theme_assets()
+    assert not (tmp_path / "css").exists()
+
+def test_self_hosted_fonts_get_font_faces(tmp_path, monkeypatch):
+    monkeypatch.delenv(theme_assets.FONTS_ENV, raising=False)
+    monkeypatch.setattr(theme_assets, "FONTS_DIR", str(tmp_path))
+    for weights in theme_assets.FONT_FILES.values():
+        for filename in weights.values():
+            (tmp_path / filename).write_bytes(b"")
+    assert theme_assets.missing_font_files() == []
+    css = build_theme_css(THEME)
+    assert css.count("@font-face") == 2 and "inter-700.woff2" in css
+
+def test_system_fonts_opt_out_compiles_without_font_faces(tmp_path, monkeypatch):
+    monkeypatch.setenv(theme_assets.FONTS_ENV, "system")
+    monkeypatch.setattr(theme_assets, "FONTS_DIR", str(tmp_path / "fonts"))
+    monkeypatch.setattr(theme_assets, "CSS_DIR", str(tmp_path / "css"))
+    compiled = theme_assets.compile_theme_assets()
+    assert compiled and all("@font-face" not in css for _, css in compiled.values())
+    assert FALLBACK_FONT_STACKS["sans-serif"] in build_theme_css(THEME)
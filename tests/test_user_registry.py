@@ -0,0 +1,14 @@
+import user_registry
+from user_registry import register_user, list_users, get_user, _get_registry_path
+
+def test_unreadable_registry_keeps_names_without_data_files(user_data, monkeypatch):
+    monkeypatch.setattr(user_registry, "_cache", None)
+    assert register_user("Alice")
+    (user_data / "profiles" / "Alice.json").unlink()
+    assert list_users() == ["Alice"]
+
+    with open(_get_registry_path(), "w") as f:
+        f.write("{not json")
+    assert register_user("bob")
+    assert list_users() == ["Alice", "bob"]
+    assert get_user("ALICE") == "Alice"
@@ -0,0 +1,311 @@
+import os
+import re
+import sys
+import hashlib
+import argparse
+from utils import THEMES, adjust_color_brightness, is_dark_theme, get_contrast_color
+from storage import atomic_write, write_json
+
+# Served by Streamlit at app/static/... when server.enableStaticServing is on
+# (see .streamlit/config.toml). The folder has to sit next to main.py.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+CSS_DIR = os.path.join(STATIC_DIR, "css")
+FONTS_DIR = os.path.join(STATIC_DIR, "fonts")
+STATIC_URL = "app/static"
+
+# Self-hosted font files (latin subset, woff2) for the families used by
+# THEMES; download them with `python theme_assets.py fetch-fonts`. Compiling
+# the themes fails while any of them is missing, unless THEME_FONTS=system
+# is set: then no @font-face is emitted, a family is used only if it is
+# installed, and the theme's generic family resolves through
+# FALLBACK_FONT_STACKS to a font every platform ships.
+FONTS_ENV = "THEME_FONTS"
+FONT_FILES = {
+    "JetBrains Mono": {400: "jetbrains-mono-400.woff2", 700: "jetbrains-mono-700.woff2"},
+    "Inter": {400: "inter-400.woff2", 700: "inter-700.woff2"},
+    "Fira Code": {400: "fira-code-400.woff2", 700: "fira-code-700.woff2"},
+    "Source Code Pro": {400: "source-code-pro-400.woff2", 700: "source-code-pro-700.woff2"},
+    "Roboto Mono": {400: "roboto-mono-400.woff2", 700: "roboto-mono-700.woff2"},
+    "Nunito Sans": {400: "nunito-sans-400.woff2", 700: "nunito-sans-700.woff2"},
+}
+
+FALLBACK_FONT_STACKS = {
+    "monospace": "ui-monospace, SFMono-Regular, Menlo, Consolas, 'Liberation Mono', 'DejaVu Sans Mono', monospace",
+    "sans-serif": "system-ui, -apple-system, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, 'Noto Sans', sans-serif",
+}
+
+GOOGLE_FONTS_CSS_URL = "https://fonts.googleapis.com/css2"
+# Google Fonts only serves woff2 to browsers it recognizes
+FONT_FETCH_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+_stylesheets = None
+
+def _font_family(theme):
+    """First family named in a theme's font stack"""
+    return theme["font"].split(",")[0].strip().strip("'\"")
+
+def font_stack(theme):
+    """A theme's font stack with explicit fallbacks before its generic family"""
+    families = [family.strip() for family in theme["font"].split(",")]
+    generic = families[-1]
+    if generic not in FALLBACK_FONT_STACKS:
+        return theme["font"]
+    return ", ".join(families[:-1] + [FALLBACK_FONT_STACKS[generic]])
+
+def use_system_fonts():
+    """Whether THEME_FONTS=system opts out of the self-hosted font files"""
+    return os.environ.get(FONTS_ENV, "").strip().lower() == "system"
+
+def missing_font_files():
+    """FONT_FILES entries not present in static/fonts"""
+    return [
+        filename for weights in FONT_FILES.values() for filename in weights.values()
+        if not os.path.exists(os.path.join(FONTS_DIR, filename))
+    ]
+
+def build_font_faces(family):
+    """@font-face rules pointing at the self-hosted files for a family (none with THEME_FONTS=system)"""
+    if use_system_fonts():
+        return ""
+    rules = []
+    for weight, filename in FONT_FILES.get(family, {}).items():
+        rules.append(f"""@font-face {{
+    font-family: '{family}';
+    font-style: normal;
+    font-weight: {weight};
+    font-display: swap;
+    src: local('{family}'), url('../fonts/{filename}') format('woff2');
+}}""")
+    return "\n".join(rules)
+
+def build_theme_css(theme):
+    """Full stylesheet for one THEMES entry"""
+    dark = is_dark_theme(theme["background_color"])
+    background = theme["background_color"]
+    button_text = get_contrast_color(theme["primary_color"])
+
+    return build_font_faces(_font_family(theme)) + f"""
+:root {{
+    --primary-color: {theme["primary_color"]};
+    --background-color: {background};
+    --text-color: {theme["text_color"]};
+    --font: {font_stack(theme)};
+    --card-bg-color: {adjust_color_brightness(background, 15 if dark else -5)};
+    --hover-color: {adjust_color_brightness(theme["primary_color"], -20)};
+    --border-color: {adjust_color_brightness(background, 30 if dark else -15)};
+}}
+
+.stApp {{
+    background-color: var(--background-color);
+    color: var(--text-color);
+    font-family: var(--font);
+}}
+
+.stButton>button {{
+    background-color: var(--primary-color);
+    color: {button_text};
+    border-radius: 8px;
+    border: none;
+    font-weight: 500;
+    padding: 0.5rem 1rem;
+    transition: all 0.2s ease;
+}}
+
+.stButton>button:hover {{
+    background-color: var(--hover-color);
+    transform: translateY(-2px);
+    box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+}}
+
+.stTextInput>div>div>input, .stTextArea>div>div>textarea {{
+    border-radius: 8px;
+    border: 1px solid var(--border-color);
+    background-color: {adjust_color_brightness(background, 10 if dark else -3)};
+    color: var(--text-color);
+    font-family: var(--font);
+}}
+
+.stSidebar {{
+    background-color: {adjust_color_brightness(background, 10 if dark else -8)};
+    border-right: 1px solid var(--border-color);
+}}
+
+.stSidebar .stButton>button {{
+    width: 100%;
+}}
+
+.stExpander {{
+    border-radius: 8px;
+    border: 1px solid var(--border-color);
+    background-color: var(--card-bg-color);
+    margin-bottom: 1rem;
+    overflow: hidden;
+}}
+
+.stTabs {{
+    border-radius: 8px;
+    overflow: hidden;
+}}
+
+.stTabs [data-baseweb="tab-list"] {{
+    gap: 2px;
+    background-color: {adjust_color_brightness(background, 5 if dark else -3)};
+    border-radius: 8px 8px 0 0;
+    padding: 0 4px;
+}}
+
+.stTabs [data-baseweb="tab"] {{
+    border-radius: 8px 8px 0 0;
+    padding: 10px 16px;
+    margin: 4px 4px 0 0;
+    background-color: {adjust_color_brightness(background, 15 if dark else -5)};
+}}
+
+.stTabs [aria-selected="true"] {{
+    background-color: var(--primary-color) !important;
+    color: {button_text} !important;
+    font-weight: 500;
+}}
+
+.stTabs [data-baseweb="tab-panel"] {{
+    background-color: var(--card-bg-color);
+    border-radius: 0 0 8px 8px;
+    border: 1px solid var(--border-color);
+    border-top: none;
+    padding: 1rem;
+}}
+
+h1, h2, h3 {{
+    color: {adjust_color_brightness(theme["text_color"], 20 if dark else -20)};
+    font-weight: 700;
+}}
+
+.element-container {{
+    margin-bottom: 1rem;
+}}
+
+/* Improve select boxes */
+.stSelectbox label,
+.stMultiselect label {{
+    color: var(--text-color);
+}}
+
+.stSelectbox div[data-baseweb="select"] div,
+.stMultiselect div[data-baseweb="select"] div {{
+    background-color: var(--card-bg-color);
+    border-color: var(--border-color);
+    color: var(--text-color);
+}}
+
+/* Streamlit chat styling */
+.stChatMessage {{
+    background-color: var(--card-bg-color);
+    border-radius: 12px;
+    padding: 1rem;
+    margin-bottom: 1rem;
+    border: 1px solid var(--border-color);
+}}
+
+.stChatInputContainer {{
+    border-radius: 12px;
+    border: 1px solid var(--border-color);
+    background-color: var(--card-bg-color);
+    padding: 0.5rem;
+}}
+"""
+
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+def compile_theme_assets():
+    """Write one content-hashed stylesheet per theme to static/css.
+
+    Files are only written when missing, and bundles left over from older
+    theme definitions are removed. Returns {theme name: (filename, css)}.
+    Raises RuntimeError if font files are missing and THEME_FONTS=system
+    is not set.
+    """
+    missing = [] if use_system_fonts() else missing_font_files()
+    if missing:
+        raise RuntimeError(
+            f"Missing theme font files in {FONTS_DIR}: {', '.join(missing)}. "
+            f"Run `python theme_assets.py fetch-fonts`, or set {FONTS_ENV}=system to use system fonts."
+        )
+    os.makedirs(CSS_DIR, exist_ok=True)
+    compiled = {}
+    for name, theme in THEMES.items():
+        css = build_theme_css(theme)
+        digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:10]
+        filename = f"theme-{_slug(name)}-{digest}.css"
+        path = os.path.join(CSS_DIR, filename)
+        if not os.path.exists(path):
+            with atomic_write(path, "w", encoding="utf-8") as f:
+                f.write(css)
+        compiled[name] = (filename, css)
+
+    current = {filename for filename, _ in compiled.values()}
+    for filename in os.listdir(CSS_DIR):
+        if filename.startswith("theme-") and filename.endswith(".css") and filename not in current:
+            try:
+                os.remove(os.path.join(CSS_DIR, filename))
+            except FileNotFoundError:
+                pass  # Another worker removed it first
+
+    write_json(os.path.join(CSS_DIR, "manifest.json"), {name: filename for name, (filename, _) in compiled.items()}, indent=2)
+    return compiled
+
+def get_theme_stylesheet(theme_name):
+    """(url, css) of a theme's precompiled bundle; themes are compiled once per process"""
+    global _stylesheets
+    if _stylesheets is None:
+        _stylesheets = compile_theme_assets()
+    filename, css = _stylesheets[theme_name]
+    return f"{STATIC_URL}/css/{filename}", css
+
+def fetch_fonts(force=False):
+    """Download the FONT_FILES woff2 files from Google Fonts into static/fonts"""
+    import requests
+
+    os.makedirs(FONTS_DIR, exist_ok=True)
+    fetched = []
+    for family, weights in FONT_FILES.items():
+        for weight, filename in weights.items():
+            path = os.path.join(FONTS_DIR, filename)
+            if os.path.exists(path) and not force:
+                continue
+            response = requests.get(
+                GOOGLE_FONTS_CSS_URL,
+                params={"family": f"{family}:wght@{weight}", "display": "swap"},
+                headers={"User-Agent": FONT_FETCH_USER_AGENT},
+                timeout=30
+            )
+            response.raise_for_status()
+            # The stylesheet has one block per unicode subset; keep latin
+            match = re.search(r"/\* latin \*/[^}]*?url\((\S+?)\) format\('woff2'\)", response.text)
+            if not match:
+                raise RuntimeError(f"No latin woff2 source found for {family} {weight}")
+            font = requests.get(match.group(1), timeout=30)
+            font.raise_for_status()
+            with open(path, "wb") as f:
+                f.write(font.content)
+            fetched.append(filename)
+    return fetched
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Theme stylesheet and font assets")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("compile", help="Write the per-theme stylesheets to static/css")
+    fonts_parser = subparsers.add_parser("fetch-fonts", help="Download the theme fonts to static/fonts")
+    fonts_parser.add_argument("--force", action="store_true", help="Download files that already exist")
+    args = parser.parse_args(argv)
+
+    if args.command == "compile":
+        for name, (filename, _) in compile_theme_assets().items():
+            print(f"{name}: static/css/{filename}")
+    else:
+        fetched = fetch_fonts(args.force)
+        print(f"Downloaded {len(fetched)} font file(s) to {FONTS_DIR}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
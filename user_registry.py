@@ -0,0 +1,199 @@
+import os
+import re
+import sys
+import glob
+import json
+import bisect
+import argparse
+import threading
+from datetime import datetime
+from utils import get_user_data_path
+from storage import locked, write_json
+
+# The registry maps the case-folded profile name to the name as entered, so
+# names are unique regardless of case. It is built once from the data
+# directories and then kept up to date as profiles are created; reruns only
+# read it (and only re-read it when the file changes).
+_cache = None  # (mtime, {key: name}, sorted keys)
+_cache_lock = threading.Lock()
+
+def _registry_lock():
+    return locked("user-registry")
+
+def _get_registry_path():
+    return get_user_data_path("users.json")
+
+def _get_profile_path(username):
+    return get_user_data_path(f"profiles/{username}.json")
+
+def normalize_username(username):
+    """Registry key for a profile name"""
+    return username.strip().casefold()
+
+MAX_USERNAME_LENGTH = 50
+
+def validate_username(username):
+    """Error message for an unusable profile name, or None if it is fine"""
+    username = username.strip()
+    if not username:
+        return "Profile name cannot be empty."
+    if len(username) > MAX_USERNAME_LENGTH:
+        return f"Profile name is too long (max {MAX_USERNAME_LENGTH} characters)."
+    # Letters, numbers, spaces, hyphens and underscores keep file names safe
+    if not re.match("^[a-zA-Z0-9 _-]+$", username):
+        return "Profile name can only contain letters, numbers, spaces, underscores, and hyphens."
+    return None
+
+def scan_user_data():
+    """Find every profile name that has a journal, chat history or profile file"""
+    names = []
+    journal_dir = get_user_data_path("journals")
+    for path in glob.glob(os.path.join(journal_dir, "*_journal.json")):
+        names.append(os.path.basename(path)[:-len("_journal.json")])
+    for path in glob.glob(os.path.join(journal_dir, "*", "manifest.json")):
+        names.append(os.path.basename(os.path.dirname(path)))
+    for path in glob.glob(os.path.join(get_user_data_path("chats"), "*_chat.json")):
+        names.append(os.path.basename(path)[:-len("_chat.json")])
+    for path in glob.glob(os.path.join(get_user_data_path("profiles"), "*.json")):
+        names.append(os.path.basename(path)[:-len(".json")])
+
+    users = {}
+    for name in sorted(n for n in names if n):
+        # Journal and profile files keep the name as entered, so they win
+        # over the sanitized names used for chat files
+        users.setdefault(normalize_username(name), name)
+    return users
+
+def _set_cache(mtime, users):
+    global _cache
+    with _cache_lock:
+        _cache = (mtime, users, sorted(users))
+        return _cache
+
+def _write_registry(users):
+    path = _get_registry_path()
+    write_json(path, {"users": users}, indent=2, ensure_ascii=False, sort_keys=True)
+    _set_cache(os.path.getmtime(path), users)
+
+def rebuild_registry():
+    """Rebuild the registry from the data directories, keeping registered names that have no files yet"""
+    with _registry_lock():
+        users = dict(_read_registry()[0]) if os.path.exists(_get_registry_path()) else {}
+        for key, name in scan_user_data().items():
+            users.setdefault(key, name)
+        _write_registry(users)
+    return len(users)
+
+def _parse_registry(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["users"]
+
+def _read_registry():
+    """(users, sorted keys) from the registry file, using the cached copy while the file is unchanged"""
+    path = _get_registry_path()
+    mtime = os.path.getmtime(path)
+    with _cache_lock:
+        cached = _cache
+    if cached and cached[0] == mtime:
+        return cached[1], cached[2]
+    try:
+        users = _parse_registry(path)
+    except Exception as e:
+        return _recover_registry(e)
+    cached = _set_cache(mtime, users)
+    return cached[1], cached[2]
+
+def _recover_registry(error):
+    """Rewrite an unreadable registry from the data directories and the last copy read successfully"""
+    path = _get_registry_path()
+    with _registry_lock():
+        # Another worker may have rewritten it while this one waited
+        try:
+            cached = _set_cache(os.path.getmtime(path), _parse_registry(path))
+            return cached[1], cached[2]
+        except Exception:
+            pass
+        print(f"Error loading user registry, rebuilding: {error}")
+        # Names registered without any data files yet are only in the last
+        # good copy, so start from it rather than from the scan alone
+        with _cache_lock:
+            users = dict(_cache[1]) if _cache else {}
+        for key, name in scan_user_data().items():
+            users.setdefault(key, name)
+        _write_registry(users)
+    return users, sorted(users)
+
+def _load():
+    if not os.path.exists(_get_registry_path()):
+        # First run: bootstrap from whatever is on disk
+        with _registry_lock():
+            if not os.path.exists(_get_registry_path()):
+                _write_registry(scan_user_data())
+    return _read_registry()
+
+def get_user(username):
+    """The registered spelling of a profile name (matched case-insensitively), or None"""
+    users, _ = _load()
+    return users.get(normalize_username(username))
+
+def user_exists(username):
+    return get_user(username) is not None
+
+def count_users():
+    return len(_load()[0])
+
+def list_users():
+    """All profile names in case-insensitive order"""
+    users, keys = _load()
+    return [users[key] for key in keys]
+
+def search_users(prefix="", limit=50):
+    """Profile names starting with prefix (case-insensitive), in order, at most limit"""
+    users, keys = _load()
+    prefix = normalize_username(prefix)
+    start = bisect.bisect_left(keys, prefix)
+    matches = []
+    for key in keys[start:start + limit]:
+        if not key.startswith(prefix):
+            break
+        matches.append(users[key])
+    return matches
+
+def register_user(username):
+    """Add a new profile and create its profile file.
+
+    Returns False if a profile with the same name (ignoring case) exists.
+    """
+    username = username.strip()
+    key = normalize_username(username)
+    _load()
+    with _registry_lock():
+        users, _ = _read_registry()
+        if key in users:
+            return False
+        users = dict(users)
+        users[key] = username
+        _write_registry(users)
+
+    profile_path = _get_profile_path(username)
+    if not os.path.exists(profile_path):
+        write_json(profile_path, {"created_at": datetime.now().isoformat(), "preferences": {}})
+    return True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile registry maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild", help="Add profiles found in user_data to the registry")
+    search_parser = subparsers.add_parser("search", help="List profiles starting with a prefix")
+    search_parser.add_argument("prefix", nargs="?", default="")
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        print(f"Registry has {rebuild_registry()} profile(s)")
+    else:
+        for name in search_users(args.prefix, limit=1000):
+            print(name)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -76,145 +76,19 @@ def get_user_data_path(filename):
 
 def apply_theme(theme_name):
     """Apply theme settings to Streamlit"""
+    # Imported here because theme_assets builds on the helpers in this module
+    from theme_assets import get_theme_stylesheet
+
     if theme_name not in THEMES:
-        theme_name = "Adwaita Light"
-    
-    theme = THEMES[theme_name]
-    
-    # Apply theme using Streamlit's custom theming
-    st.markdown(f"""
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Ubuntu:wght@300;400;500;700&family=JetBrains+Mono:wght@400;700&family=Fira+Sans:wght@400;500;700&family=Source+Code+Pro:wght@400;700&family=Inter:wght@400;500;700&family=Roboto:wght@300;400;500;700&display=swap');
-        
-        :root {{
-            --primary-color: {theme["primary_color"]};
-            --background-color: {theme["background_color"]};
-            --text-color: {theme["text_color"]};
-            --font: {theme["font"]};
-            --card-bg-color: {adjust_color_brightness(theme["background_color"], 15 if is_dark_theme(theme["background_color"]) else -5)};
-            --hover-color: {adjust_color_brightness(theme["primary_color"], -20)};
-            --border-color: {adjust_color_brightness(theme["background_color"], 30 if is_dark_theme(theme["background_color"]) else -15)};
-        }}
-        
-        .stApp {{
-            background-color: var(--background-color);
-            color: var(--text-color);
-            font-family: var(--font);
-        }}
-        
-        .stButton>button {{
-            background-color: var(--primary-color);
-            color: {get_contrast_color(theme["primary_color"])};
-            border-radius: 8px;
-            border: none;
-            font-weight: 500;
-            padding: 0.5rem 1rem;
-            transition: all 0.2s ease;
-        }}
-        
-        .stButton>button:hover {{
-            background-color: var(--hover-color);
-            transform: translateY(-2px);
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }}
-        
-        .stTextInput>div>div>input, .stTextArea>div>div>textarea {{
-            border-radius: 8px;
-            border: 1px solid var(--border-color);
-            background-color: {adjust_color_brightness(theme["background_color"], 10 if is_dark_theme(theme["background_color"]) else -3)};
-            color: var(--text-color);
-            font-family: var(--font);
-        }}
-        
-        .stSidebar {{
-            background-color: {adjust_color_brightness(theme["background_color"], 10 if is_dark_theme(theme["background_color"]) else -8)};
-            border-right: 1px solid var(--border-color);
-        }}
-        
-        .stSidebar .stButton>button {{
-            width: 100%;
-        }}
-        
-        .stExpander {{
-            border-radius: 8px;
-            border: 1px solid var(--border-color);
-            background-color: var(--card-bg-color);
-            margin-bottom: 1rem;
-            overflow: hidden;
-        }}
-        
-        .stTabs {{
-            border-radius: 8px;
-            overflow: hidden;
-        }}
-        
-        .stTabs [data-baseweb="tab-list"] {{
-            gap: 2px;
-            background-color: {adjust_color_brightness(theme["background_color"], 5 if is_dark_theme(theme["background_color"]) else -3)};
-            border-radius: 8px 8px 0 0;
-            padding: 0 4px;
-        }}
-        
-        .stTabs [data-baseweb="tab"] {{
-            border-radius: 8px 8px 0 0;
-            padding: 10px 16px;
-            margin: 4px 4px 0 0;
-            background-color: {adjust_color_brightness(theme["background_color"], 15 if is_dark_theme(theme["background_color"]) else -5)};
-        }}
-        
-        .stTabs [aria-selected="true"] {{
-            background-color: var(--primary-color) !important;
-            color: {get_contrast_color(theme["primary_color"])} !important;
-            font-weight: 500;
-        }}
-        
-        .stTabs [data-baseweb="tab-panel"] {{
-            background-color: var(--card-bg-color);
-            border-radius: 0 0 8px 8px;
-            border: 1px solid var(--border-color);
-            border-top: none;
-            padding: 1rem;
-        }}
-        
-        h1, h2, h3 {{
-            color: {adjust_color_brightness(theme["text_color"], 20 if is_dark_theme(theme["background_color"]) else -20)};
-            font-weight: 700;
-        }}
-        
-        .element-container {{
-            margin-bottom: 1rem;
-        }}
-        
-        /* Improve select boxes */
-        .stSelectbox label,
-        .stMultiselect label {{
-            color: var(--text-color);
-        }}
-        
-        .stSelectbox div[data-baseweb="select"] div,
-        .stMultiselect div[data-baseweb="select"] div {{
-            background-color: var(--card-bg-color);
-            border-color: var(--border-color);
-            color: var(--text-color);
-        }}
-        
-        /* Streamlit chat styling */
-        .stChatMessage {{
-            background-color: var(--card-bg-color);
-            border-radius: 12px;
-            padding: 1rem;
-            margin-bottom: 1rem;
-            border: 1px solid var(--border-color);
-        }}
-        
-        .stChatInputContainer {{
-            border-radius: 12px;
-            border: 1px solid var(--border-color);
-            background-color: var(--card-bg-color);
-            padding: 0.5rem;
-        }}
-    </style>
-    """, unsafe_allow_html=True)
+        theme_name = "Tokyo Night"
+
+    # Each theme is compiled once per process into a hashed bundle under
+    # static/css, so a rerun only emits a reference to it
+    url, css = get_theme_stylesheet(theme_name)
+    if st.get_option("server.enableStaticServing"):
+        st.markdown(f'<link rel="stylesheet" href="{url}">', unsafe_allow_html=True)
+    else:
+        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
 
 def is_dark_theme(color_hex):
     """Determine if a color is dark based on its hex value"""